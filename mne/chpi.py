@@ -34,6 +34,7 @@
 # License: BSD (3-clause)
 
 from functools import partial
+import logging
 
 import numpy as np
 from scipy import linalg
@@ -47,9 +48,16 @@ from .forward import (_magnetic_dipole_field_vec, _create_meg_coils,
 from .cov import make_ad_hoc_cov, compute_whitener
 from .transforms import (apply_trans, invert_transform, _angle_between_quats,
                          quat_to_rot, rot_to_quat)
+from .parallel import parallel_func
 from .utils import verbose, logger, use_log_level, _check_fname, warn
 from .externals.six import string_types
 
+# Duration (sec) of the segments of data read (and fit in parallel) at once
+_CHPI_SEGMENT_DURATION = 10.
+# Maximum number of data values used to fit the amplitudes of several windows
+# in one matrix operation
+_CHPI_BATCH_SIZE = 4e6
+
 # Eventually we should add:
 #   hpicons
 #   high-passing of data during fits
@@ -98,8 +106,10 @@ def write_head_pos(fname, pos):
     ----------
     fname : str
         The filename to write.
-    pos : array, shape (N, 10)
+    pos : array, shape (N, 10) | iterator
         The position and quaternion parameters from cHPI fitting.
+        Can also be an iterator (e.g., a generator) of rows of shape (10,),
+        which are written to disk as they are produced.
 
     See Also
     --------
@@ -111,16 +121,25 @@ def write_head_pos(fname, pos):
     .. versionadded:: 0.12
     """
     _check_fname(fname, overwrite=True)
-    pos = np.array(pos, np.float64)
-    if pos.ndim != 2 or pos.shape[1] != 10:
-        raise ValueError('pos must be a 2D array of shape (N, 10)')
+    stream = hasattr(pos, '__next__') or hasattr(pos, 'next')
+    if not stream:
+        pos = np.array(pos, np.float64)
+        if pos.ndim != 2 or pos.shape[1] != 10:
+            raise ValueError('pos must be a 2D array of shape (N, 10)')
     with open(fname, 'wb') as fid:
         fid.write(' Time       q1       q2       q3       q4       q5       '
                   'q6       g-value  error    velocity\n'.encode('ASCII'))
         for p in pos:
+            if stream:
+                p = np.array(p, np.float64)
+                if p.shape != (10,):
+                    raise ValueError('pos rows must have shape (10,), got '
+                                     '%s' % (p.shape,))
             fmts = ['% 9.3f'] + ['% 8.5f'] * 9
             fid.write(((' ' + ' '.join(fmts) + '\n')
                        % tuple(p)).encode('ASCII'))
+            if stream:
+                fid.flush()
 
 
 def head_pos_to_trans_rot_t(quats):
@@ -547,67 +566,143 @@ def _fit_cHPI_amplitudes(raw, time_sl, hpi, fit_time, verbose=None):
         The sin amplitudes matching each cHPI frequency
             or None if this time window should be skipped
     """
+    data, chpi_data = _read_chpi_data(raw, hpi, time_sl.start, time_sl.stop)
+    sin_fits, skip = _fit_cHPI_amplitudes_batch(
+        data, chpi_data, np.array([0]), time_sl.stop - time_sl.start, hpi,
+        np.array([fit_time], float))
+    return None if skip[0] else sin_fits[0]
+
+
+def _read_chpi_data(raw, hpi, start, stop):
+    """Read the MEG and HPI status channel data used by the cHPI fits."""
     # No need to detrend the data because our model has a DC term
     with use_log_level(False):
         # loads good channels
-        this_data = raw[hpi['meg_picks'], time_sl][0]
-
-    # which HPI coils to use
-    # other then erroring I don't see this getting used elsewhere?
-    if hpi['hpi_pick'] is not None:
-        with use_log_level(False):
+        data = raw[hpi['meg_picks'], start:stop][0]
+        chpi_data = None
+        # which HPI coils to use
+        # other then erroring I don't see this getting used elsewhere?
+        if hpi['hpi_pick'] is not None:
             # loads hpi_stim channel
-            chpi_data = raw[hpi['hpi_pick'], time_sl][0]
+            chpi_data = raw[[hpi['hpi_pick']], start:stop][0][0]
+    return data, chpi_data
 
-        ons = (np.round(chpi_data).astype(np.int) &
+
+def _fit_cHPI_amplitudes_batch(data, chpi_data, rel_starts, this_len, hpi,
+                               fit_times):
+    """Fit cHPI amplitudes for several windows of the same length at once.
+
+    Parameters
+    ----------
+    data : ndarray, shape (n_channels, n_times)
+        The MEG data containing all windows.
+    chpi_data : ndarray, shape (n_times,) | None
+        The HPI status channel data.
+    rel_starts : ndarray, shape (n_windows,)
+        The first sample of each window in ``data``.
+    this_len : int
+        The number of samples in each window.
+    hpi : dict
+        The cHPI structure from ``_setup_hpi_struct``.
+    fit_times : ndarray, shape (n_windows,)
+        The time of each window (for logging).
+
+    Returns
+    -------
+    sin_fits : ndarray, shape (n_windows, n_freqs, n_channels)
+        The sin amplitudes matching each cHPI frequency.
+    skip : ndarray of bool, shape (n_windows,)
+        Windows that should be skipped because too few coils were on.
+    """
+    idx = rel_starts[:, np.newaxis] + np.arange(this_len)
+    skip = np.zeros(len(rel_starts), bool)
+    if chpi_data is not None:
+        ons = (np.round(chpi_data[idx]).astype(np.int)[:, np.newaxis] &
                hpi['on'][:, np.newaxis]).astype(bool)
-        n_on = np.sum(ons, axis=0)
-        if not (n_on >= 3).all():
+        n_on = np.sum(ons, axis=1).min(axis=-1)
+        skip = n_on < 3
+        for fit_time, this_n_on in zip(fit_times[skip], n_on[skip]):
             logger.info(_time_prefix(fit_time) + '%s < 3 HPI coils turned on, '
-                        'skipping fit' % (n_on.min(),))
-            return None
-        # #TODO REMOVE # ons = ons.all(axis=1)  # which HPI coils to use
+                        'skipping fit' % (this_n_on,))
 
     n_freqs = hpi['n_freqs']
-    this_len = time_sl.stop - time_sl.start
     if this_len == hpi['n_window']:
         model, inv_model = hpi['model'], hpi['inv_model']
     else:  # first or last window
         model = hpi['model'][:this_len]
         inv_model = linalg.pinv(model)
-    X = np.dot(inv_model, this_data.T)
-    X_sin, X_cos = X[:n_freqs], X[n_freqs:2 * n_freqs]
-
-    # use SVD across all sensors to estimate the sinusoid phase
-    sin_fit = np.zeros((n_freqs, X_sin.shape[1]))
-    for fi in range(n_freqs):
-        u, s, vt = np.linalg.svd(np.vstack((X_sin[fi, :], X_cos[fi, :])),
-                                 full_matrices=False)
-        # the first component holds the predominant phase direction
-        # (so ignore the second, effectively doing s[1] = 0):
-        sin_fit[fi, :] = vt[0]
-        # Do not modify X, however, because it will break the signal
-        # reconstruction step.
-
-    data_diff_sq = np.dot(model, X).T - this_data
-    data_diff_sq *= data_diff_sq
-    data_diff_sq = np.sum(data_diff_sq, axis=-1)
-
-    # compute amplitude correlation (for logging), protect against zero
-    norm = this_data
-    del this_data
-    norm *= norm
-    norm = np.sum(norm, axis=-1)
-    norm_sum = norm.sum()
-    norm_sum = np.inf if norm_sum == 0 else norm_sum
-    norm[norm == 0] = np.inf
-    g_sin = 1 - data_diff_sq.sum() / norm_sum
-    g_chan = 1 - data_diff_sq / norm
-    logger.debug('    HPI amplitude correlation %0.3f: %0.3f '
-                 '(%s chnls > 0.95)' % (fit_time, g_sin,
-                                        (g_chan > 0.95).sum()))
-
-    return sin_fit
+    this_data = data[:, idx].transpose(1, 0, 2)  # windows, channels, times
+    X = np.matmul(this_data, inv_model.T)
+
+    # use SVD across all sensors to estimate the sinusoid phase,
+    # for all windows and frequencies at once
+    X_sin_cos = np.stack((X[:, :, :n_freqs], X[:, :, n_freqs:2 * n_freqs]))
+    X_sin_cos = X_sin_cos.transpose(1, 3, 0, 2)  # windows, freqs, 2, chs
+    # the first component holds the predominant phase direction
+    # (so ignore the second, effectively doing s[1] = 0):
+    sin_fits = np.linalg.svd(X_sin_cos, full_matrices=False)[2][:, :, 0]
+    # Do not modify X, however, because it will break the signal
+    # reconstruction step.
+
+    if logger.level <= logging.DEBUG:
+        data_diff_sq = np.matmul(X, model.T) - this_data
+        data_diff_sq *= data_diff_sq
+        data_diff_sq = np.sum(data_diff_sq, axis=-1)
+
+        # compute amplitude correlation (for logging), protect against zero
+        norm = this_data
+        del this_data
+        norm *= norm
+        norm = np.sum(norm, axis=-1)
+        norm_sum = norm.sum(axis=-1)
+        norm_sum[norm_sum == 0] = np.inf
+        norm[norm == 0] = np.inf
+        g_sin = 1 - data_diff_sq.sum(axis=-1) / norm_sum
+        g_chan = 1 - data_diff_sq / norm
+        for fit_time, this_g_sin, this_g_chan in zip(fit_times, g_sin,
+                                                     g_chan):
+            logger.debug('    HPI amplitude correlation %0.3f: %0.3f '
+                         '(%s chnls > 0.95)' % (fit_time, this_g_sin,
+                                                (this_g_chan > 0.95).sum()))
+
+    return sin_fits, skip
+
+
+def _iter_chpi_segments(raw, fit_idxs, hpi):
+    """Read the data for consecutive segments of cHPI fit windows."""
+    sfreq = raw.info['sfreq']
+    seg_len = max(int(round(_CHPI_SEGMENT_DURATION * sfreq)), 1)
+    seg_ids = fit_idxs // seg_len
+    n_times = len(raw.times)
+    for seg_id in np.unique(seg_ids):
+        midpts = fit_idxs[seg_ids == seg_id]
+        fit_times = (midpts + raw.first_samp - hpi['n_window'] / 2.) / sfreq
+        starts = midpts - hpi['n_window'] // 2
+        stops = np.minimum(starts + hpi['n_window'], n_times)
+        starts = np.maximum(starts, 0)
+        data, chpi_data = _read_chpi_data(raw, hpi, starts[0], stops[-1])
+        yield data, chpi_data, starts - starts[0], stops - starts, fit_times
+
+
+def _iter_cHPI_amplitudes(data, chpi_data, rel_starts, lens, fit_times, hpi):
+    """Fit the cHPI amplitudes of a segment in batches of windows.
+
+    Yields the fit time and the sin amplitudes (or None if the window
+    should be skipped) of each window, in order.
+    """
+    n_batch = max(int(_CHPI_BATCH_SIZE // (len(data) * hpi['n_window'])), 1)
+    for b_start in range(0, len(fit_times), n_batch):
+        batch = np.arange(b_start, min(b_start + n_batch, len(fit_times)))
+        sin_fits = [None] * len(batch)
+        for this_len in np.unique(lens[batch]):
+            use = np.where(lens[batch] == this_len)[0]
+            these_fits, skip = _fit_cHPI_amplitudes_batch(
+                data, chpi_data, rel_starts[batch[use]], this_len, hpi,
+                fit_times[batch[use]])
+            for ui, sin_fit, this_skip in zip(use, these_fits, skip):
+                sin_fits[ui] = None if this_skip else sin_fit
+        for bi, sin_fit in zip(batch, sin_fits):
+            yield fit_times[bi], sin_fit
 
 
 @verbose
@@ -685,7 +780,7 @@ def _check_too_close(too_close):
 def _calculate_chpi_positions(raw, t_step_min=0.1, t_step_max=10.,
                               t_window=0.2, dist_limit=0.005, gof_limit=0.98,
                               use_distances=True, too_close='raise',
-                              verbose=None):
+                              n_jobs=1, verbose=None):
     """Calculate head positions using cHPI coils.
 
     Parameters
@@ -708,6 +803,12 @@ def _calculate_chpi_positions(raw, t_step_min=0.1, t_step_max=10.,
     too_close : str
         How to handle HPI positions too close to the sensors,
         can be 'raise', 'warning', or 'info'.
+    n_jobs : int
+        Number of jobs to run in parallel. The fit windows are split into
+        segments of 10 seconds that are processed independently, each
+        starting from the first fitted head position (velocities are still
+        computed relative to the previous fit). With ``n_jobs=1``, each
+        segment instead continues from the last fit of the previous one.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -722,11 +823,34 @@ def _calculate_chpi_positions(raw, t_step_min=0.1, t_step_max=10.,
     The number of time points ``N`` will depend on the velocity of head
     movements as well as ``t_step_max`` and ``t_step_min``.
 
+    The data are read from disk in segments of 10 seconds, so ``raw`` does
+    not need to be preloaded. To get the positions as they are fit, use
+    ``_iter_chpi_positions``.
+
     See Also
     --------
     read_head_pos
     write_head_pos
     """
+    quats = np.array(list(_iter_chpi_positions(
+        raw, t_step_min, t_step_max, t_window, dist_limit, gof_limit,
+        use_distances, too_close, n_jobs)), np.float64)
+    quats = np.zeros((0, 10)) if quats.size == 0 else quats
+    return quats
+
+
+def _iter_chpi_positions(raw, t_step_min=0.1, t_step_max=10., t_window=0.2,
+                         dist_limit=0.005, gof_limit=0.98, use_distances=True,
+                         too_close='raise', n_jobs=1):
+    """Estimate head positions using cHPI coils, one segment at a time.
+
+    This generator yields each ``[t, q1, q2, q3, x, y, z, gof, err, v]``
+    row of :func:`_calculate_chpi_positions` (with the same parameters)
+    as soon as the segment of data it belongs to has been fit, so that
+    memory use does not grow with the duration of the recording. The rows
+    can be written to disk as they are produced using
+    :func:`mne.chpi.write_head_pos`.
+    """
     from scipy.spatial.distance import cdist
     # extract initial geometry from info['hpi_results']
     hpi_dig_head_rrs = _get_hpi_initial_fit(raw.info)
@@ -754,28 +878,68 @@ def _calculate_chpi_positions(raw, t_step_min=0.1, t_step_max=10.,
     fit_idxs = raw.time_as_index(np.arange(t_begin + t_window / 2., t_end,
                                            t_step_min),
                                  use_rounding=True)
-    quats = []
     logger.info('Fitting up to %s time points (%0.1f sec duration)'
                 % (len(fit_idxs), t_end - t_begin))
-    pos_0 = None
 
     hpi['n_freqs'] = len(hpi['freqs'])
-    for midpt in fit_idxs:
-        #
-        # 0. determine samples to fit.
-        #
-        fit_time = (midpt + raw.first_samp - hpi['n_window'] / 2.) /\
-            raw.info['sfreq']
+    last['pos_0'] = None
+    fit_segment = partial(
+        _fit_chpi_positions_segment, hpi=hpi,
+        hpi_dig_head_rrs=hpi_dig_head_rrs, hpi_coil_dists=hpi_coil_dists,
+        t_step_max=t_step_max, t_window=t_window, dist_limit=dist_limit,
+        gof_limit=gof_limit, use_distances=use_distances,
+        too_close=too_close)
+    segments = _iter_chpi_segments(raw, fit_idxs, hpi)
+    parallel, p_fun, n_jobs = parallel_func(fit_segment, n_jobs)
+    if n_jobs == 1:
+        # each segment continues from the last fit of the previous one
+        for segment in segments:
+            these_quats, last = fit_segment(*segment, last=last)
+            for quat in these_quats:
+                yield quat
+    else:
+        # fit serially until the first position (from which distances are
+        # logged) is known, so that all segments share it
+        for segment in segments:
+            these_quats, last = fit_segment(*segment, last=last)
+            for quat in these_quats:
+                yield quat
+            if last['pos_0'] is not None:
+                break
+        # the other segments all start from the same head position, and only
+        # n_jobs segments are held in memory at once
+        prev_quat = last['quat']
+        while True:
+            group = list(itertools.islice(segments, n_jobs))
+            if len(group) == 0:
+                break
+            for these_quats, _ in parallel(
+                    p_fun(*segment, last=dict(last)) for segment in group):
+                if len(these_quats) > 0:
+                    # the velocity of the first fit of a segment must be
+                    # relative to the last fit of the previous one
+                    quat = these_quats[0]
+                    quat[9] = 100 * np.sqrt(np.sum(
+                        prev_quat[3:] - quat[4:7]) ** 2) / t_window
+                    prev_quat = these_quats[-1][1:7]
+                for quat in these_quats:
+                    yield quat
+    logger.info('[done]')
 
-        time_sl = midpt - hpi['n_window'] // 2
-        time_sl = slice(max(time_sl, 0),
-                        min(time_sl + hpi['n_window'], len(raw.times)))
-
-        #
-        # 1. Fit amplitudes for each channel from each of the N cHPI sinusoids
-        #
-        sin_fit = _fit_cHPI_amplitudes(raw, time_sl, hpi, fit_time)
 
+def _fit_chpi_positions_segment(data, chpi_data, rel_starts, lens,
+                                fit_times, hpi, last, hpi_dig_head_rrs,
+                                hpi_coil_dists, t_step_max, t_window,
+                                dist_limit, gof_limit, use_distances,
+                                too_close):
+    """Fit head positions for the windows of one segment of data."""
+    from scipy.spatial.distance import cdist
+    quats = list()
+    #
+    # 1. Fit amplitudes for each channel from each of the N cHPI sinusoids
+    #
+    for fit_time, sin_fit in _iter_cHPI_amplitudes(
+            data, chpi_data, rel_starts, lens, fit_times, hpi):
         # skip this window if bad
         # logging has already been done! Maybe turn this into an Exception
         if sin_fit is None:
@@ -869,9 +1033,10 @@ def _calculate_chpi_positions(raw, t_step_min=0.1, t_step_max=10.,
         d = 100 * np.sqrt(np.sum(last['quat'][3:] - this_quat[3:]) ** 2)  # cm
         r = _angle_between_quats(last['quat'][:3], this_quat[:3]) / dt
         v = d / dt  # cm/sec
-        if pos_0 is None:
-            pos_0 = this_quat[3:].copy()
-        d = 100 * np.sqrt(np.sum((this_quat[3:] - pos_0) ** 2))  # dis from 1st
+        if last['pos_0'] is None:
+            last['pos_0'] = this_quat[3:].copy()
+        # distance from the first fit
+        d = 100 * np.sqrt(np.sum((this_quat[3:] - last['pos_0']) ** 2))
         # MaxFilter averages over a 200 ms window for display, but we don't
         for ii in range(hpi['n_freqs']):
             if use_mask[ii]:
@@ -906,10 +1071,7 @@ def _calculate_chpi_positions(raw, t_step_min=0.1, t_step_max=10.,
         last['fit_time'] = fit_time
         last['quat'] = this_quat
         last['coil_dev_rrs'] = this_coil_dev_rrs
-    logger.info('[done]')
-    quats = np.array(quats, np.float64)
-    quats = np.zeros((0, 10)) if quats.size == 0 else quats
-    return quats
+    return quats, last
 
 
 @verbose
@@ -985,61 +1147,53 @@ def _calculate_chpi_coil_locs(raw, t_step_min=0.1, t_step_max=10.,
                 % (len(fit_idxs), t_end - t_begin))
 
     hpi['n_freqs'] = len(hpi['freqs'])
-    for midpt in fit_idxs:
-        #
-        # 0. determine samples to fit.
-        #
-        fit_time = (midpt + raw.first_samp - hpi['n_window'] / 2.) /\
-            raw.info['sfreq']
-
-        time_sl = midpt - hpi['n_window'] // 2
-        time_sl = slice(max(time_sl, 0),
-                        min(time_sl + hpi['n_window'], len(raw.times)))
-
+    for segment in _iter_chpi_segments(raw, fit_idxs, hpi):
         #
-        # 1. Fit amplitudes for each channel from each of the N cHPI sinusoids
+        # 1. Fit amplitudes for each channel from each of the N cHPI
+        #    sinusoids
         #
-        sin_fit = _fit_cHPI_amplitudes(raw, time_sl, hpi, fit_time)
-
-        # skip this window if bad
-        # logging has already been done! Maybe turn this into an Exception
-        if sin_fit is None:
-            continue
-
-        # check if data has sufficiently changed
-        if last['sin_fit'] is not None:  # first iteration
-            corr = np.corrcoef(sin_fit.ravel(), last['sin_fit'].ravel())[0, 1]
-            # check to see if we need to continue
-            if fit_time - last['fit_time'] <= t_step_max - 1e-7 and \
-                    corr * corr > 0.98:
-                # don't need to refit data
+        for fit_time, sin_fit in _iter_cHPI_amplitudes(*segment, hpi=hpi):
+            # skip this window if bad
+            # logging has already been done! Maybe turn this into an
+            # Exception
+            if sin_fit is None:
                 continue
 
-        # update 'last' sin_fit *before* inplace sign mult
-        last['sin_fit'] = sin_fit.copy()
-
-        #
-        # 2. Fit magnetic dipole for each coil to obtain coil positions
-        #    in device coordinates
-        #
-        outs = [_fit_magnetic_dipole(f, pos, hpi['coils'], hpi['scale'],
-                                     hpi['method'], too_close)
-                for f, pos in zip(sin_fit, last['coil_dev_rrs'])]
-
-        dig = []
-        for idx, o in enumerate(outs):
-            dig.append({'r': o[0], 'ident': idx + 1,
-                        'kind': FIFF.FIFFV_POINT_HPI,
-                        'coord_frame': FIFF.FIFFV_COORD_DEVICE,
-                        'gof': o[1]})
-
-        this_coil_dev_rrs = np.array([o[0] for o in outs])
-
-        times.append(fit_time)
-        chpi_digs.append(dig)
-
-        last['fit_time'] = fit_time
-        last['coil_dev_rrs'] = this_coil_dev_rrs
+            # check if data has sufficiently changed
+            if last['sin_fit'] is not None:  # first iteration
+                corr = np.corrcoef(sin_fit.ravel(),
+                                   last['sin_fit'].ravel())[0, 1]
+                # check to see if we need to continue
+                if fit_time - last['fit_time'] <= t_step_max - 1e-7 and \
+                        corr * corr > 0.98:
+                    # don't need to refit data
+                    continue
+
+            # update 'last' sin_fit *before* inplace sign mult
+            last['sin_fit'] = sin_fit.copy()
+
+            #
+            # 2. Fit magnetic dipole for each coil to obtain coil positions
+            #    in device coordinates
+            #
+            outs = [_fit_magnetic_dipole(f, pos, hpi['coils'], hpi['scale'],
+                                         hpi['method'], too_close)
+                    for f, pos in zip(sin_fit, last['coil_dev_rrs'])]
+
+            dig = []
+            for idx, o in enumerate(outs):
+                dig.append({'r': o[0], 'ident': idx + 1,
+                            'kind': FIFF.FIFFV_POINT_HPI,
+                            'coord_frame': FIFF.FIFFV_COORD_DEVICE,
+                            'gof': o[1]})
+
+            this_coil_dev_rrs = np.array([o[0] for o in outs])
+
+            times.append(fit_time)
+            chpi_digs.append(dig)
+
+            last['fit_time'] = fit_time
+            last['coil_dev_rrs'] = this_coil_dev_rrs
     logger.info('[done]')
     return times, chpi_digs
 
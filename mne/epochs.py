@@ -43,6 +43,7 @@ from .channels.channels import (ContainsMixin, UpdateChannelsMixin,
 from .filter import detrend, FilterMixin
 from .event import _read_events_fif, make_fixed_length_events
 from .fixes import _get_args
+from .parallel import parallel_func
 from .viz import (plot_epochs, plot_epochs_psd, plot_epochs_psd_topomap,
                   plot_epochs_image, plot_topo_image_epochs, plot_drop_log)
 from .utils import (check_fname, logger, verbose, _check_type_picks,
@@ -687,23 +688,57 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
     @verbose
     def _is_good_epoch(self, data, verbose=None):
         """Determine if epoch is good."""
-        if isinstance(data, string_types):
-            return False, [data]
-        if data is None:
-            return False, ['NO_DATA']
+        is_good, reasons = self._is_good_epochs([data])
+        return is_good[0], reasons[0]
+
+    @verbose
+    def _is_good_epochs(self, epochs, verbose=None):
+        """Determine which epochs are good, vectorized over epochs.
+
+        Parameters
+        ----------
+        epochs : ndarray, shape (n_epochs, n_channels, n_times) | list
+            The epochs data, or a list of epochs as returned by
+            ``_get_epoch_from_raw`` (array, str or None).
+
+        Returns
+        -------
+        is_good : ndarray of bool, shape (n_epochs,)
+            Whether or not each epoch is good.
+        reasons : list of (list | None)
+            The offending reasons for each bad epoch (None if good).
+        """
         n_times = len(self.times)
-        if data.shape[1] < n_times:
-            # epoch is too short ie at the end of the data
-            return False, ['TOO_SHORT']
-        if self.reject is None and self.flat is None:
-            return True, None
+        reasons = [None] * len(epochs)
+        if isinstance(epochs, np.ndarray):
+            full = np.arange(len(epochs))
         else:
+            full = list()
+            for ii, data in enumerate(epochs):
+                if isinstance(data, string_types):
+                    reasons[ii] = [data]
+                elif data is None:
+                    reasons[ii] = ['NO_DATA']
+                elif data.shape[1] < n_times:
+                    # epoch is too short ie at the end of the data
+                    reasons[ii] = ['TOO_SHORT']
+                else:
+                    full.append(ii)
+        if len(full) > 0 and (self.reject is not None or
+                              self.flat is not None):
+            if isinstance(epochs, np.ndarray):
+                data = epochs
+            else:
+                data = np.array([epochs[ii] for ii in full])
             if self._reject_time is not None:
-                data = data[:, self._reject_time]
-
-            return _is_good(data, self.ch_names, self._channel_type_idx,
-                            self.reject, self.flat, full_report=True,
-                            ignore_chs=self.info['bads'])
+                data = data[:, :, self._reject_time]
+            bad_lists = _get_bad_epochs(
+                data, self.ch_names, self._channel_type_idx, self.reject,
+                self.flat, ignore_chs=self.info['bads'])
+            for ii, bad_list in zip(full, bad_lists):
+                reasons[ii] = bad_list
+        is_good = np.array([reason is None for reason in reasons], bool)
+        return is_good, reasons
 
     @verbose
     def _detrend_offset_decim(self, epoch, verbose=None):
@@ -831,7 +866,7 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         """Provide a wrapper for Py3k."""
         return self.next(*args, **kwargs)
 
-    def average(self, picks=None, method="mean"):
+    def average(self, picks=None, method="mean", n_jobs=1):
         """Compute an average over epochs.
 
         Parameters
@@ -847,6 +882,11 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             (n_channels, n_time).
             Note that due to file type limitations, the kind for all
             these will be "average".
+        n_jobs : int
+            Number of jobs to run in parallel over blocks of epochs. Only
+            used when the data are not preloaded.
+
+            .. versionadded:: 0.17
 
         Returns
         -------
@@ -873,10 +913,14 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
 
         This would compute the trimmed mean.
 
+        When the data are not preloaded, the mean is accumulated over blocks
+        of epochs read from disk, so that the epochs are never all held in
+        memory at once.
         """
-        return self._compute_aggregate(picks=picks, mode=method)
+        return self._compute_aggregate(picks=picks, mode=method,
+                                       n_jobs=n_jobs)
 
-    def standard_error(self, picks=None):
+    def standard_error(self, picks=None, n_jobs=1):
         """Compute standard error over epochs.
 
         Parameters
@@ -884,15 +928,20 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         picks : array-like of int | None
             If None only MEG, EEG, SEEG, ECoG, and fNIRS channels are kept
             otherwise the channels indices in picks are kept.
+        n_jobs : int
+            Number of jobs to run in parallel over blocks of epochs. Only
+            used when the data are not preloaded.
+
+            .. versionadded:: 0.17
 
         Returns
         -------
         evoked : instance of Evoked
             The standard error over epochs.
         """
-        return self._compute_aggregate(picks, "std")
+        return self._compute_aggregate(picks, "std", n_jobs=n_jobs)
 
-    def _compute_aggregate(self, picks, mode='mean'):
+    def _compute_aggregate(self, picks, mode='mean', n_jobs=1):
         """Compute the mean or std over epochs and return Evoked."""
         # if instance contains ICA channels they won't be included unless picks
         # is specified
@@ -905,9 +954,6 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
                 warn('ICA channels will not be included unless explicitly '
                      'selected in picks')
 
-        n_channels = len(self.ch_names)
-        n_times = len(self.times)
-
         if self.preload:
             n_events = len(self.events)
 
@@ -933,25 +979,14 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             if mode not in {"mean", "std"}:
                 raise ValueError("If data are not preloaded, can only compute "
                                  "mean or standard deviation.")
-            data = np.zeros((n_channels, n_times))
-            n_events = 0
-            for e in self:
-                data += e
-                n_events += 1
-
-            if n_events > 0:
-                data /= n_events
-            else:
+            # accumulate running statistics over blocks of epochs
+            n_events, data, m2 = self._compute_running_stats(n_jobs)
+            if n_events == 0:
                 data.fill(np.nan)
 
-            # convert to stderr if requested, could do in one pass but do in
-            # two (slower) in case there are large numbers
+            # convert to stderr if requested
             if mode == "std":
-                data_mean = data.copy()
-                data.fill(0.)
-                for e in self:
-                    data += (e - data_mean) ** 2
-                data = np.sqrt(data / n_events)
+                data = np.sqrt(m2 / n_events)
 
         if mode == "std":
             kind = 'standard_error'
@@ -962,6 +997,26 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         return self._evoked_from_epoch_data(data, self.info, picks, n_events,
                                             kind, self._name)
 
+    def _compute_running_stats(self, n_jobs=1):
+        """Compute the count, mean and sum of squared deviations of epochs.
+
+        The good epochs are read from disk in blocks of bounded size, whose
+        statistics are computed (possibly in parallel) and merged.
+        """
+        parallel, p_fun, n_jobs = parallel_func(_epochs_block_stats, n_jobs)
+        n_events = len(self.events)
+        n_batch = self._get_batch_size()
+        blocks = [np.arange(start, min(start + n_batch, n_events))
+                  for start in range(0, n_events, n_batch)]
+        stats = (0, np.zeros((len(self.ch_names), len(self.times))),
+                 np.zeros((len(self.ch_names), len(self.times))))
+        # only run n_jobs blocks at once to bound memory usage
+        for start in range(0, len(blocks), n_jobs):
+            for block_stats in parallel(p_fun(self, block) for block in
+                                        blocks[start:start + n_jobs]):
+                stats = _combine_stats(stats, block_stats)
+        return stats
+
     @property
     def _name(self):
         """Give a nice string representation based on event ids."""
@@ -1210,6 +1265,48 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         """Get a given epoch from disk."""
         raise NotImplementedError
 
+    def _get_epochs_from_raw(self, indices, verbose=None):
+        """Get several epochs from disk.
+
+        Subclasses can override this to read epochs in batches.
+        """
+        return [self._get_epoch_from_raw(idx) for idx in indices]
+
+    def _get_batch_size(self):
+        """Get the number of epochs to process at once (~64 MB)."""
+        n_bytes = 8 * len(self.ch_names) * len(self._raw_times)
+        return max(2 ** 26 // max(n_bytes, 1), 1)
+
+    def _iter_epochs_from_raw(self):
+        """Iterate over all epochs from disk, reading them in batches."""
+        n_events = len(self.events)
+        n_batch = self._get_batch_size()
+        for start in range(0, n_events, n_batch):
+            indices = np.arange(start, min(start + n_batch, n_events))
+            for epoch in self._get_epochs_from_raw(indices):
+                yield epoch
+
+    def _load_epochs_from_raw(self, indices):
+        """Load, process and check several epochs from disk.
+
+        Returns
+        -------
+        epochs_out : list of (array | str | None)
+            The processed epochs (not projected in delayed SSP mode).
+        is_good : ndarray of bool
+            Whether or not each epoch is good.
+        reasons : list of (list | None)
+            The offending reasons for each bad epoch (None if good).
+        """
+        epochs, epochs_out = list(), list()
+        for epoch_noproj in self._get_epochs_from_raw(indices):
+            epoch_noproj = self._detrend_offset_decim(epoch_noproj)
+            epoch = self._project_epoch(epoch_noproj)
+            epochs.append(epoch)
+            epochs_out.append(epoch_noproj if self._do_delayed_proj else epoch)
+        is_good, reasons = self._is_good_epochs(epochs)
+        return epochs_out, is_good, reasons
+
     def _project_epoch(self, epoch):
         """Process a raw epoch based on the delayed param."""
         # whenever requested, the first epoch is being projected.
@@ -1252,9 +1349,10 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
                 return data
 
             # we need to load from disk, drop, and return data
+            raw_epochs = self._iter_epochs_from_raw()
             for idx in range(n_events):
                 # faster to pre-allocate memory here
-                epoch_noproj = self._get_epoch_from_raw(idx)
+                epoch_noproj = next(raw_epochs)
                 epoch_noproj = self._detrend_offset_decim(epoch_noproj)
                 if self._do_delayed_proj:
                     epoch_out = epoch_noproj
@@ -1270,35 +1368,35 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             good_idx = []
             n_out = 0
             assert n_events == len(self.selection)
-            for idx, sel in enumerate(self.selection):
+            # check rejection for batches of epochs of bounded size
+            n_batch = self._get_batch_size()
+            for b_start in range(0, n_events, n_batch):
+                b_idx = np.arange(b_start, min(b_start + n_batch, n_events))
                 if self.preload:  # from memory
-                    if self._do_delayed_proj:
-                        epoch_noproj = self._data[idx]
-                        epoch = self._project_epoch(epoch_noproj)
-                    else:
-                        epoch_noproj = None
-                        epoch = self._data[idx]
+                    epochs_out = epochs = self._data[b_idx[0]:b_idx[-1] + 1]
+                    if self._do_delayed_proj and self._projector is not None:
+                        epochs = np.matmul(self._projector, epochs)
+                    is_good, reasons = self._is_good_epochs(epochs)
                 else:  # from disk
-                    epoch_noproj = self._get_epoch_from_raw(idx)
-                    epoch_noproj = self._detrend_offset_decim(epoch_noproj)
-                    epoch = self._project_epoch(epoch_noproj)
-
-                epoch_out = epoch_noproj if self._do_delayed_proj else epoch
-                is_good, offending_reason = self._is_good_epoch(epoch)
-                if not is_good:
-                    self.drop_log[sel] += offending_reason
-                    continue
-                good_idx.append(idx)
-
-                # store the epoch if there is a reason to (output or update)
-                if out or self.preload:
-                    # faster to pre-allocate, then trim as necessary
-                    if n_out == 0 and not self.preload:
-                        data = np.empty((n_events, epoch_out.shape[0],
-                                         epoch_out.shape[1]),
-                                        dtype=epoch_out.dtype, order='C')
-                    data[n_out] = epoch_out
-                    n_out += 1
+                    epochs_out, is_good, reasons = \
+                        self._load_epochs_from_raw(b_idx)
+                for idx, epoch_out, good, offending_reason in zip(
+                        b_idx, epochs_out, is_good, reasons):
+                    if not good:
+                        self.drop_log[self.selection[idx]] += offending_reason
+                        continue
+                    good_idx.append(idx)
+
+                    # store the epoch if there is a reason to (output or
+                    # update)
+                    if out or self.preload:
+                        # faster to pre-allocate, then trim as necessary
+                        if n_out == 0 and not self.preload:
+                            data = np.empty((n_events, epoch_out.shape[0],
+                                             epoch_out.shape[1]),
+                                            dtype=epoch_out.dtype, order='C')
+                        data[n_out] = epoch_out
+                        n_out += 1
 
             self._bad_dropped = True
             logger.info("%d bad epochs dropped" % (n_events - len(good_idx)))
@@ -1895,6 +1993,40 @@ class BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         self._set_times(np.arange(first, last + 1, dtype=np.float) / sfreq)
 
 
+def _epochs_block_stats(epochs, indices):
+    """Compute the statistics of the good epochs of a block read from disk."""
+    epochs_out, is_good, _ = epochs._load_epochs_from_raw(indices)
+    data = [epoch for epoch, good in zip(epochs_out, is_good) if good]
+    if len(data) == 0:
+        return (0, 0., 0.)
+    return _block_stats(np.array(data))
+
+
+def _block_stats(data):
+    """Compute the count, mean and sum of squared deviations of a block."""
+    mean = np.mean(data, axis=0)
+    m2 = np.sum(np.abs(data - mean) ** 2, axis=0)
+    return len(data), mean, m2
+
+
+def _combine_stats(stats_a, stats_b):
+    """Merge the (count, mean, M2) statistics of two blocks.
+
+    This is the parallel variant of Welford's algorithm (Chan et al., 1979).
+    """
+    n_a, mean_a, m2_a = stats_a
+    n_b, mean_b, m2_b = stats_b
+    if n_b == 0:
+        return stats_a
+    if n_a == 0:
+        return stats_b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (float(n_b) / n)
+    m2 = m2_a + m2_b + np.abs(delta) ** 2 * (float(n_a) * n_b / n)
+    return n, mean, m2
+
+
 def _hid_match(event_id, keys):
     """Match event IDs using HID selection.
 
@@ -2187,6 +2319,28 @@ class Epochs(BaseEpochs):
                                             self.reject_by_annotation)
         return data
 
+    def _get_epochs_from_raw(self, indices, verbose=None):
+        """Load several epochs from disk, reading nearby epochs together.
+
+        Returns
+        -------
+        data : list of (array | str | None)
+            See :meth:`_get_epoch_from_raw`.
+        """
+        if self._raw is None:
+            # This should never happen, as raw=None only if preload=True
+            raise ValueError('An error has occurred, no valid raw file found.'
+                             ' Please report this to the mne-python '
+                             'developers.')
+        sfreq = self._raw.info['sfreq']
+        first_samp = self._raw.first_samp
+        starts = np.array([int(round(event_samp + self._raw_times[0] * sfreq))
+                           for event_samp in self.events[indices, 0]],
+                          dtype=np.int64) - first_samp
+        stops = starts + len(self._raw_times)
+        return self._raw._check_bad_segments(starts, stops, self.picks,
+                                             self.reject_by_annotation)
+
 
 class EpochsArray(BaseEpochs):
     """Epochs object from numpy array.
@@ -2486,43 +2640,69 @@ def _is_good(e, ch_names, channel_type_idx, reject, flat, full_report=False,
     If full_report=True, it will give True/False as well as a list of all
     offending channels.
     """
-    bad_list = list()
-    has_printed = False
-    checkable = np.ones(len(ch_names), dtype=bool)
-    checkable[np.array([c in ignore_chs
-                        for c in ch_names], dtype=bool)] = False
-    for refl, f, t in zip([reject, flat], [np.greater, np.less], ['', 'flat']):
-        if refl is not None:
-            for key, thresh in iteritems(refl):
-                idx = channel_type_idx[key]
-                name = key.upper()
-                if len(idx) > 0:
-                    e_idx = e[idx]
-                    deltas = np.max(e_idx, axis=1) - np.min(e_idx, axis=1)
-                    checkable_idx = checkable[idx]
-                    idx_deltas = np.where(np.logical_and(f(deltas, thresh),
-                                                         checkable_idx))[0]
-
-                    if len(idx_deltas) > 0:
-                        ch_name = [ch_names[idx[i]] for i in idx_deltas]
-                        if (not has_printed):
-                            logger.info('    Rejecting %s epoch based on %s : '
-                                        '%s' % (t, name, ch_name))
-                            has_printed = True
-                        if not full_report:
-                            return False
-                        else:
-                            bad_list.extend(ch_name)
-
+    bad_list = _get_bad_epochs(e[np.newaxis], ch_names, channel_type_idx,
+                               reject, flat, ignore_chs)[0]
     if not full_report:
-        return True
+        return bad_list is None
     else:
-        if bad_list == []:
+        if bad_list is None:
             return True, None
         else:
             return False, bad_list
 
 
+def _get_bad_epochs(data, ch_names, channel_type_idx, reject, flat,
+                    ignore_chs=[]):
+    """Find the offending channels of several epochs at once.
+
+    Parameters
+    ----------
+    data : ndarray, shape (n_epochs, n_channels, n_times)
+        The epochs data.
+    ch_names : list of str
+        The channel names.
+    channel_type_idx : dict
+        The channel indices by type.
+    reject : dict | None
+        The rejection thresholds (peak-to-peak above).
+    flat : dict | None
+        The flatness thresholds (peak-to-peak below).
+    ignore_chs : list of str
+        Channels that are not checked.
+
+    Returns
+    -------
+    bad_lists : list of (list | None)
+        For each epoch, the offending channels (None if the epoch is good).
+    """
+    n_epochs = len(data)
+    bad_lists = [list() for _ in range(n_epochs)]
+    has_printed = np.zeros(n_epochs, bool)
+    checkable = np.ones(len(ch_names), dtype=bool)
+    checkable[np.array([c in ignore_chs
+                        for c in ch_names], dtype=bool)] = False
+    for refl, f, t in zip([reject, flat], [np.greater, np.less], ['', 'flat']):
+        if refl is None:
+            continue
+        for key, thresh in iteritems(refl):
+            idx = channel_type_idx[key]
+            name = key.upper()
+            if len(idx) == 0:
+                continue
+            e_idx = data[:, idx]
+            deltas = np.max(e_idx, axis=-1) - np.min(e_idx, axis=-1)
+            bads = np.logical_and(f(deltas, thresh), checkable[idx])
+            for ei in np.where(bads.any(axis=1))[0]:
+                ch_name = [ch_names[idx[i]] for i in np.where(bads[ei])[0]]
+                if not has_printed[ei]:
+                    logger.info('    Rejecting %s epoch based on %s : '
+                                '%s' % (t, name, ch_name))
+                    has_printed[ei] = True
+                bad_lists[ei].extend(ch_name)
+    return [bad_list if len(bad_list) > 0 else None
+            for bad_list in bad_lists]
+
+
 def _read_one_epoch_file(f, tree, preload):
     """Read a single FIF file."""
     with f as fid:
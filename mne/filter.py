@@ -10,14 +10,76 @@ from .cuda import (_setup_cuda_fft_multiply_repeated, _fft_multiply_repeated,
                    _setup_cuda_fft_resample, _fft_resample, _smart_pad)
 from .externals.six import string_types, integer_types
 from .fixes import get_sosfiltfilt, minimum_phase
-from .parallel import parallel_func, check_n_jobs
+from .parallel import parallel_func, check_n_jobs, _check_n_jobs_threads
 from .time_frequency.multitaper import _mt_spectra, _compute_mt_params
 from .utils import (logger, verbose, sum_squared, check_version, warn,
-                    _check_preload, _validate_type)
+                    _check_preload, _validate_type, object_hash, _LRUCache)
 
 # These values from Ifeachor and Jervis.
 _length_factors = dict(hann=3.1, hamming=3.3, blackman=5.0)
 
+# Designed filters and FIR kernel FFTs, keyed by a hash of their parameters
+_filter_cache = _LRUCache(32, max_nbytes=128 * 1024 ** 2,
+                          config='MNE_FILTER_CACHE_SIZE')
+
+# Approximate number of input samples resampled at once by method='polyphase'
+_POLYPHASE_BLOCK_SIZE = 2 ** 16
+
+
+def get_filter_cache_info():
+    """Get statistics of the filter design cache.
+
+    Designed FIR and IIR filters, as well as the FFTs of the FIR kernels
+    used by overlap-add filtering, are kept in a least-recently-used cache,
+    so that filtering repeatedly with identical parameters (e.g., the same
+    pipeline run across subjects) skips the design work. The number of
+    cached entries can be set with the ``MNE_FILTER_CACHE_SIZE`` config
+    value (default 32, 0 disables the cache).
+
+    Returns
+    -------
+    info : dict
+        The number of cache ``hits`` and ``misses``, the current number of
+        entries ``size``, the maximum number of entries ``max_size``, and
+        the estimated memory used by the entries ``nbytes``.
+
+    See Also
+    --------
+    clear_filter_cache
+
+    Notes
+    -----
+    .. versionadded:: 0.17
+    """
+    return _filter_cache.info()
+
+
+def clear_filter_cache():
+    """Clear the filter design cache and reset its statistics.
+
+    See Also
+    --------
+    get_filter_cache_info
+
+    Notes
+    -----
+    .. versionadded:: 0.17
+    """
+    _filter_cache.clear()
+
+
+def _cached_design(key, fun, *args, **kwargs):
+    """Get fun(*args, **kwargs) from the filter cache using key."""
+    copy = kwargs.pop('copy', True)
+    key = object_hash(key)
+    out = _filter_cache.get(key)
+    if out is None:
+        out = fun(*args, **kwargs)
+        if isinstance(out, np.ndarray):
+            out.flags.writeable = False
+        _filter_cache.set(key, out)
+    return deepcopy(out) if copy else out
+
 
 def is_power2(num):
     """Test if number is a power of 2.
@@ -159,6 +221,7 @@ def _overlap_add_filter(x, h, n_fft=None, phase='zero', picks=None,
     xf : array, shape (n_signals, n_times)
         x filtered.
     """
+    n_jobs, use_threads = _check_n_jobs_threads(n_jobs)
     n_jobs = check_n_jobs(n_jobs, allow_cuda=True)
     # set up array for filtering, reshape to 2D, operate on last axis
     x, orig_shape, picks = _prep_for_filtering(x, copy, picks)
@@ -199,25 +262,41 @@ def _overlap_add_filter(x, h, n_fft=None, phase='zero', picks=None,
                          '2 * len(h) - 1 (%s), got %s' % (min_fft, n_fft))
 
     # Figure out if we should use CUDA
+    h_fft = _cached_design(('rfft', h, n_fft), np.fft.rfft, h, n=n_fft,
+                           copy=False)
     n_jobs, cuda_dict = _setup_cuda_fft_multiply_repeated(
-        n_jobs, h, n_fft)
+        n_jobs, h, n_fft, h_fft)
 
     # Process each row separately
     picks = np.arange(len(x)) if picks is None else picks
+    fun = partial(_1d_overlap_filter, n_h=len(h), n_edge=n_edge, phase=phase,
+                  cuda_dict=cuda_dict, pad=pad, n_fft=n_fft)
+    _filter_rows(fun, x, picks, n_jobs, use_threads)
+
+    x.shape = orig_shape
+    return x
+
+
+def _filter_rows(fun, x, picks, n_jobs, use_threads=False):
+    """Replace each picked row of x by fun(x=row), in place."""
     if n_jobs == 1:
         for p in picks:
-            x[p] = _1d_overlap_filter(x[p], len(h), n_edge, phase,
-                                      cuda_dict, pad, n_fft)
+            x[p] = fun(x=x[p])
+    elif use_threads:
+        # Threads share x, so each task writes its row back directly rather
+        # than returning a filtered copy of all picked channels
+        def _filter_row(p):
+            x[p] = fun(x=x[p])
+
+        parallel, p_fun, _ = parallel_func(_filter_row, n_jobs,
+                                           backend='threading')
+        parallel(p_fun(p) for p in picks)
     else:
-        parallel, p_fun, _ = parallel_func(_1d_overlap_filter, n_jobs)
-        data_new = parallel(p_fun(x[p], len(h), n_edge, phase,
-                                  cuda_dict, pad, n_fft) for p in picks)
+        parallel, p_fun, _ = parallel_func(fun, n_jobs)
+        data_new = parallel(p_fun(x=x[p]) for p in picks)
         for pp, p in enumerate(picks):
             x[p] = data_new[pp]
 
-    x.shape = orig_shape
-    return x
-
 
 def _1d_overlap_filter(x, n_h, n_edge, phase, cuda_dict, pad, n_fft):
     """Do one-dimensional overlap-add FFT FIR filtering."""
@@ -367,6 +446,7 @@ def _construct_fir_filter(sfreq, freq, gain, filter_length, phase, fir_window,
         Filter coefficients.
     """
     assert freq[0] == 0
+    design_name = fir_design
     if fir_design == 'firwin2':
         from scipy.signal import firwin2 as fir_design
     else:
@@ -385,14 +465,9 @@ def _construct_fir_filter(sfreq, freq, gain, filter_length, phase, fir_window,
 
     # Use overlap-add filter with a fixed length
     N = _check_zero_phase_length(filter_length, phase, gain[-1])
-    # construct symmetric (linear phase) filter
-    if phase == 'minimum':
-        h = fir_design(N * 2 - 1, freq, gain, window=fir_window)
-        h = minimum_phase(h)
-    else:
-        h = fir_design(N, freq, gain, window=fir_window)
-    assert h.size == N
-    att_db, att_freq = _filter_attenuation(h, freq, gain)
+    h, att_db, att_freq = _cached_design(
+        ('fir', sfreq, freq, gain, N, phase, fir_window, design_name),
+        _design_fir, fir_design, N, freq, gain, phase, fir_window)
     if phase == 'zero-double':
         att_db += 6
     if att_db < min_att_db:
@@ -403,6 +478,19 @@ def _construct_fir_filter(sfreq, freq, gain, filter_length, phase, fir_window,
     return h
 
 
+def _design_fir(fir_design, N, freq, gain, phase, fir_window):
+    """Design a FIR filter and compute its attenuation."""
+    # construct symmetric (linear phase) filter
+    if phase == 'minimum':
+        h = fir_design(N * 2 - 1, freq, gain, window=fir_window)
+        h = minimum_phase(h)
+    else:
+        h = fir_design(N, freq, gain, window=fir_window)
+    assert h.size == N
+    att_db, att_freq = _filter_attenuation(h, freq, gain)
+    return h, att_db, att_freq
+
+
 def _check_zero_phase_length(N, phase, gain_nyq=0):
     N = int(N)
     if N % 2 == 0:
@@ -433,6 +521,7 @@ def _filtfilt(x, iir_params, picks, n_jobs, copy):
     # set up array for filtering, reshape to 2D, operate on last axis
     from scipy.signal import filtfilt
     padlen = min(iir_params['padlen'], x.shape[-1] - 1)
+    n_jobs, use_threads = _check_n_jobs_threads(n_jobs)
     n_jobs = check_n_jobs(n_jobs)
     x, orig_shape, picks = _prep_for_filtering(x, copy, picks)
     if 'sos' in iir_params:
@@ -444,14 +533,7 @@ def _filtfilt(x, iir_params, picks, n_jobs, copy):
         fun = partial(filtfilt, b=iir_params['b'], a=iir_params['a'],
                       padlen=padlen, axis=-1)
         _check_coefficients((iir_params['b'], iir_params['a']))
-    if n_jobs == 1:
-        for p in picks:
-            x[p] = fun(x=x[p])
-    else:
-        parallel, p_fun, _ = parallel_func(fun, n_jobs)
-        data_new = parallel(p_fun(x=x[p]) for p in picks)
-        for pp, p in enumerate(picks):
-            x[p] = data_new[pp]
+    _filter_rows(fun, x, picks, n_jobs, use_threads)
     x.shape = orig_shape
     return x
 
@@ -657,16 +739,21 @@ def construct_iir_filter(iir_params, f_pass=None, f_stop=None, sfreq=None,
         # use order-based design
         Wp = np.asanyarray(f_pass) / (float(sfreq) / 2)
         if 'order' in iir_params:
-            system = iirfilter(iir_params['order'], Wp, btype=btype,
-                               ftype=ftype, output=output)
+            system = _cached_design(
+                ('iirfilter', iir_params['order'], Wp, btype, ftype, output),
+                iirfilter, iir_params['order'], Wp, btype=btype, ftype=ftype,
+                output=output)
         else:
             # use gpass / gstop design
             Ws = np.asanyarray(f_stop) / (float(sfreq) / 2)
             if 'gpass' not in iir_params or 'gstop' not in iir_params:
                 raise ValueError('iir_params must have at least ''gstop'' and'
                                  ' ''gpass'' (or ''N'') entries')
-            system = iirdesign(Wp, Ws, iir_params['gpass'],
-                               iir_params['gstop'], ftype=ftype, output=output)
+            system = _cached_design(
+                ('iirdesign', Wp, Ws, iir_params['gpass'], iir_params['gstop'],
+                 ftype, output),
+                iirdesign, Wp, Ws, iir_params['gpass'], iir_params['gstop'],
+                ftype=ftype, output=output)
 
     if system is None:
         raise RuntimeError('coefficients could not be created from iir_params')
@@ -675,7 +762,8 @@ def construct_iir_filter(iir_params, f_pass=None, f_stop=None, sfreq=None,
 
     # now deal with padding
     if 'padlen' not in iir_params:
-        padlen = estimate_ringing_samples(system)
+        padlen = _cached_design(('ringing', system), estimate_ringing_samples,
+                                system)
     else:
         padlen = iir_params['padlen']
 
@@ -783,7 +871,10 @@ def filter_data(data, sfreq, l_freq, h_freq, picks=None, filter_length='auto',
         Only used for ``method='fir'``.
     n_jobs : int | str
         Number of jobs to run in parallel. Can be 'cuda' if ``cupy``
-        is installed properly and method='fir'.
+        is installed properly and method='fir'. Can also be
+        ``'threads:N'`` (or ``'threads'`` for one thread per CPU) to
+        filter the channels in place with ``N`` threads, which avoids
+        copying the data to worker processes.
     method : str
         'fir' will use overlap-add FIR filtering, 'iir' will use IIR
         forward-backward filtering (via filtfilt).
@@ -1226,7 +1317,10 @@ def notch_filter(x, Fs, freqs, filter_length='auto', notch_widths=None,
         (n_epochs, n_channels, n_times) data.
     n_jobs : int | str
         Number of jobs to run in parallel. Can be 'cuda' if ``cupy``
-        is installed properly and method='fir'.
+        is installed properly and method='fir'. Can also be
+        ``'threads:N'`` (or ``'threads'`` for one thread per CPU) to
+        filter the channels in place with ``N`` threads, which avoids
+        copying the data to worker processes.
     copy : bool
         If True, a copy of x, filtered, is returned. Otherwise, it operates
         on x in place.
@@ -1340,6 +1434,7 @@ def _mt_spectrum_proc(x, sfreq, line_freqs, notch_widths, mt_bandwidth,
     """Call _mt_spectrum_remove."""
     from scipy import stats
     # set up array for filtering, reshape to 2D, operate on last axis
+    n_jobs, use_threads = _check_n_jobs_threads(n_jobs)
     n_jobs = check_n_jobs(n_jobs)
     x, orig_shape, picks = _prep_for_filtering(x, copy, picks)
 
@@ -1369,7 +1464,9 @@ def _mt_spectrum_proc(x, sfreq, line_freqs, notch_widths, mt_bandwidth,
                                                threshold)
                 freq_list.append(f)
     else:
-        parallel, p_fun, _ = parallel_func(_mt_spectrum_remove, n_jobs)
+        backend = 'threading' if use_threads else None
+        parallel, p_fun, _ = parallel_func(_mt_spectrum_remove, n_jobs,
+                                           backend=backend)
         data_new = parallel(p_fun(x_, sfreq, line_freqs, notch_widths,
                                   window_fun, threshold)
                             for xi, x_ in enumerate(x)
@@ -1468,7 +1565,7 @@ def _mt_spectrum_remove(x, sfreq, line_freqs, notch_widths,
 
 @verbose
 def resample(x, up=1., down=1., npad=100, axis=-1, window='boxcar', n_jobs=1,
-             pad='reflect_limited', verbose=None):
+             pad='reflect_limited', method='fft', verbose=None):
     """Resample an array.
 
     Operates along the last dimension of the array.
@@ -1483,14 +1580,16 @@ def resample(x, up=1., down=1., npad=100, axis=-1, window='boxcar', n_jobs=1,
         Factor to downsample by.
     npad : int | str
         Number of samples to use at the beginning and end for padding.
-        Can be "auto" to pad to the next highest power of 2.
+        Can be "auto" to pad to the next highest power of 2. Only used
+        with ``method='fft'``.
     axis : int
         Axis along which to resample (default is the last axis).
     window : string or tuple
-        See :func:`scipy.signal.resample` for description.
+        See :func:`scipy.signal.resample` for description. Only used with
+        ``method='fft'``.
     n_jobs : int | str
         Number of jobs to run in parallel. Can be 'cuda' if ``cupy``
-        is installed properly.
+        is installed properly and ``method='fft'``.
     pad : str
         The type of padding to use. Supports all :func:`numpy.pad` ``mode``
         options. Can also be "reflect_limited" (default), which pads with a
@@ -1498,6 +1597,15 @@ def resample(x, up=1., down=1., npad=100, axis=-1, window='boxcar', n_jobs=1,
         values of the vector, followed by zeros.
 
         .. versionadded:: 0.15
+    method : str
+        Can be "fft" (default) to resample in the frequency domain, or
+        "polyphase" to use polyphase FIR filtering
+        (:func:`scipy.signal.resample_poly`) of overlapping blocks, which is
+        much faster for long signals. "polyphase" requires ``up / down`` to
+        be a ratio of integers no larger than 1000 (e.g., 1000 / 5000 =
+        1 / 5).
+
+        .. versionadded:: 0.17
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -1515,12 +1623,17 @@ def resample(x, up=1., down=1., npad=100, axis=-1, window='boxcar', n_jobs=1,
     important consequences, and the default choices should work well
     for most natural signals.
 
-    Resampling arguments are broken into "up" and "down" components for future
-    compatibility in case we decide to use an upfirdn implementation. The
-    current implementation is functionally equivalent to passing
-    up=up/down and down=1.
+    Resampling arguments are broken into "up" and "down" components for
+    compatibility with the upfirdn implementation used by
+    ``method='polyphase'``. The "fft" method is functionally equivalent to
+    passing up=up/down and down=1. Both methods return
+    ``int(round(len(x) * up / down))`` samples.
     """
     from scipy.signal import get_window
+    if not isinstance(method, string_types) or \
+            method not in ('fft', 'polyphase'):
+        raise ValueError('method must be "fft" or "polyphase", got %r'
+                         % (method,))
     # check explicitly for backwards compatibility
     if not isinstance(axis, int):
         err = ("The axis parameter needs to be an integer (got %s). "
@@ -1542,6 +1655,12 @@ def resample(x, up=1., down=1., npad=100, axis=-1, window='boxcar', n_jobs=1,
     if x_len == 0:
         warn('x has zero length along last axis, returning a copy of x')
         return x.copy()
+    if method == 'polyphase':
+        y = _resample_polyphase(x.reshape((-1, x_len)), ratio, n_jobs, pad)
+        y.shape = orig_shape[:-1] + (y.shape[1],)
+        if axis != orig_last_axis:
+            y = y.swapaxes(axis, orig_last_axis)
+        return y
     bad_msg = 'npad must be "auto" or an integer'
     if isinstance(npad, string_types):
         if npad != 'auto':
@@ -1605,6 +1724,67 @@ def resample(x, up=1., down=1., npad=100, axis=-1, window='boxcar', n_jobs=1,
     return y
 
 
+def _resample_polyphase(x, ratio, n_jobs, pad):
+    """Resample the rows of x by a rational ratio with polyphase filtering."""
+    from fractions import Fraction
+    if not check_version('scipy', '0.18'):
+        raise RuntimeError('scipy >= 0.18 must be installed for '
+                           'method="polyphase"')
+    frac = Fraction(ratio).limit_denominator(1000)
+    up, down = frac.numerator, frac.denominator
+    if abs(up - ratio * down) > 1e-9 * up or max(up, down) > 1000:
+        raise ValueError('method="polyphase" requires the resampling ratio '
+                         '(%s) to be a ratio of integers no larger than 1000, '
+                         'consider using method="fft" instead' % (ratio,))
+    n_jobs = check_n_jobs(n_jobs, allow_cuda=True)
+    if n_jobs == 'cuda':
+        logger.info('CUDA is not used for polyphase resampling, falling '
+                    'back to n_jobs=1')
+        n_jobs = 1
+    final_len = int(round(ratio * x.shape[1]))
+    # Pad by at least the half-length of the resample_poly anti-aliasing
+    # filter (10 * max(up, down) at the upsampled rate), using a multiple
+    # of down so that the padding maps to whole output samples
+    n_pad = int(np.ceil(10. * max(up, down) / up / down)) * down
+    n_block = max(_POLYPHASE_BLOCK_SIZE // down, 1) * down
+    logger.debug('Polyphase resampling with up=%d, down=%d' % (up, down))
+    if n_jobs == 1:
+        y = np.zeros((len(x), final_len), dtype=x.dtype)
+        for xi, x_ in enumerate(x):
+            y[xi] = _polyphase_resample(x_, up, down, n_pad, n_block,
+                                        final_len, pad)
+    else:
+        parallel, p_fun, _ = parallel_func(_polyphase_resample, n_jobs)
+        y = parallel(p_fun(x_, up, down, n_pad, n_block, final_len, pad)
+                     for x_ in x)
+        y = np.array(y, dtype=x.dtype).reshape(len(x), final_len)
+    return y
+
+
+def _polyphase_resample(x, up, down, n_pad, n_block, final_len, pad):
+    """Resample a vector with resample_poly in overlapping blocks.
+
+    The padded vector is filtered in blocks of ``n_block`` input samples (a
+    multiple of ``down``), each extended on both sides by the ``n_pad``
+    samples needed by the anti-aliasing filter. This gives the same output
+    as filtering the whole vector, but the temporary arrays of the filtering
+    only scale with ``n_block``; the padded copy of the vector and the output
+    are the only full-length arrays.
+    """
+    from scipy.signal import resample_poly
+    x = _smart_pad(x, (n_pad, n_pad), pad)
+    to_remove = n_pad * up // down
+    n_out = n_block * up // down  # output samples of each block
+    y = np.empty(final_len, x.dtype)
+    for start in range(0, final_len, n_out):
+        stop = min(start + n_out, final_len)
+        first = start // n_out * n_block
+        this_x = x[first:first + n_block + 2 * n_pad]
+        y[start:stop] = resample_poly(this_x, up, down)[
+            to_remove:to_remove + stop - start]
+    return y
+
+
 def _resample_stim_channels(stim_data, up, down):
     """Resample stim channels, carefully.
 
@@ -1644,17 +1824,17 @@ def _resample_stim_channels(stim_data, up, down):
     )
 
     # Create windows starting from sample_picks[i], ending at sample_picks[i+1]
-    windows = zip(sample_picks, np.r_[sample_picks[1:], n_samples])
+    window_ends = np.r_[sample_picks[1:], n_samples]
 
     # Use the first non-zero value in each window
-    for window_i, window in enumerate(windows):
-        for stim_num, stim in enumerate(stim_data):
-            nonzero = stim[window[0]:window[1]].nonzero()[0]
-            if len(nonzero) > 0:
-                val = stim[window[0] + nonzero[0]]
-            else:
-                val = stim[window[0]]
-            stim_resampled[stim_num, window_i] = val
+    for stim_num, stim in enumerate(stim_data):
+        nonzero = np.flatnonzero(stim)
+        first = np.searchsorted(nonzero, sample_picks)
+        use = sample_picks.copy()
+        found = first < len(nonzero)
+        found[found] = nonzero[first[found]] < window_ends[found]
+        use[found] = nonzero[first[found]]
+        stim_resampled[stim_num] = stim[use]
 
     return stim_resampled
 
@@ -1990,7 +2170,10 @@ class FilterMixin(object):
             Only used for ``method='fir'``.
         n_jobs : int | str
             Number of jobs to run in parallel. Can be 'cuda' if ``cupy``
-            is installed properly and method='fir'.
+            is installed properly and method='fir'. Can also be
+            ``'threads:N'`` (or ``'threads'`` for one thread per CPU) to
+            filter the channels in place with ``N`` threads, which avoids
+            copying the data to worker processes.
         method : str
             'fir' will use overlap-add FIR filtering, 'iir' will use IIR
             forward-backward filtering (via filtfilt).
@@ -2048,7 +2231,7 @@ class FilterMixin(object):
 
     @verbose
     def resample(self, sfreq, npad='auto', window='boxcar', n_jobs=1,
-                 pad='edge', verbose=None):
+                 pad='edge', method='fft', verbose=None):
         """Resample data.
 
         .. note:: Data must be loaded.
@@ -2073,6 +2256,11 @@ class FilterMixin(object):
             which pads with the edge values of each vector.
 
             .. versionadded:: 0.15
+        method : str
+            Can be "fft" (default) or "polyphase". See
+            :func:`mne.filter.resample`.
+
+            .. versionadded:: 0.17
         verbose : bool, str, int, or None
             If not None, override default verbose level (see
             :func:`mne.verbose` :ref:`Logging documentation <tut_logging>` for
@@ -2097,7 +2285,7 @@ class FilterMixin(object):
         sfreq = float(sfreq)
         o_sfreq = self.info['sfreq']
         self._data = resample(self._data, sfreq, o_sfreq, npad, window=window,
-                              n_jobs=n_jobs, pad=pad)
+                              n_jobs=n_jobs, pad=pad, method=method)
         self.info['sfreq'] = float(sfreq)
         new_times = (np.arange(self._data.shape[-1], dtype=np.float) /
                      sfreq + self.times[0])
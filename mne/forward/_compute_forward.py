@@ -25,6 +25,10 @@ from ..io.compensator import get_current_comp, make_compensator
 from ..io.pick import pick_types
 from ..fixes import einsum
 
+# Maximum number of values per orientation in the arrays of a tile of source
+# points (one value per BEM vertex or MEG integration point and source)
+_FWD_BATCH_SIZE = 1.5e6
+
 
 # #############################################################################
 # COIL SPECIFICATION AND FIELD COMPUTATION MATRIX
@@ -315,20 +319,26 @@ def _bem_inf_pots(mri_rr, bem_rr, mri_Q=None):
     """
     # NOTE: the (μ_0 / (4π) factor has been moved to _prep_field_communication
     # Get position difference vector between BEM vertex and dipole
-    diff = np.empty((len(mri_rr), 3, len(bem_rr)))
-    for ri, rr in enumerate(mri_rr):
-        this_diff = bem_rr - rr
-        diff_norm = np.sum(this_diff * this_diff, axis=1, keepdims=True)
-        diff_norm *= np.sqrt(diff_norm)
-        diff_norm[diff_norm == 0] = 1
-        if mri_Q is not None:
-            this_diff = np.dot(this_diff, mri_Q.T)
-        this_diff /= diff_norm
-        diff[ri] = this_diff.T
-
+    diff = bem_rr.T[np.newaxis] - mri_rr[:, :, np.newaxis]
+    diff_norm = _norm_cubed(diff)
+    if mri_Q is not None:
+        # (bem_rr - rr) Q.T, as a difference of the transformed positions
+        np.subtract(np.dot(mri_Q, bem_rr.T)[np.newaxis],
+                    np.dot(mri_rr, mri_Q.T)[:, :, np.newaxis], out=diff)
+    diff /= diff_norm[:, np.newaxis]
     return diff
 
 
+def _norm_cubed(diff):
+    """Compute the cubed norms of the vectors along axis 1, zeros set to 1."""
+    diff_norm = diff[:, 0] * diff[:, 0]
+    diff_norm += diff[:, 1] * diff[:, 1]
+    diff_norm += diff[:, 2] * diff[:, 2]
+    diff_norm *= np.sqrt(diff_norm)
+    diff_norm[diff_norm == 0] = 1  # avoid nans
+    return diff_norm
+
+
 # This function has been refactored to process all points simultaneously
 # def _bem_inf_field(rd, Q, rp, d):
 # """Infinite-medium magnetic field. See (7) in Mosher, 1999"""
@@ -368,9 +378,7 @@ def _bem_inf_fields(rr, rmag, cosmag):
     # Knowing that we're doing all directions, refactor above function:
 
     diff = rmag.T[np.newaxis, :, :] - rr[:, :, np.newaxis]
-    diff_norm = np.sum(diff * diff, axis=1)
-    diff_norm *= np.sqrt(diff_norm)  # Get magnitude of distance cubed
-    diff_norm[diff_norm == 0] = 1  # avoid nans
+    diff_norm = _norm_cubed(diff)  # Get magnitude of distance cubed
 
     # This is the result of cross-prod calcs with basis vectors,
     # as if we had taken (Q=np.eye(3)), then multiplied by cosmags
@@ -382,7 +390,7 @@ def _bem_inf_fields(rr, rmag, cosmag):
 
 
 def _bem_pot_or_field(rr, mri_rr, mri_Q, coils, solution, bem_rr, n_jobs,
-                      coil_type):
+                      coil_type, use_threads=False):
     """Calculate the magnetic field or electric potential forward solution.
 
     The code is very similar between EEG and MEG potentials, so combine them.
@@ -407,12 +415,34 @@ def _bem_pot_or_field(rr, mri_rr, mri_Q, coils, solution, bem_rr, n_jobs,
         Number of jobs to run in parallel
     coil_type : str
         'meg' or 'eeg'
+    use_threads : bool
+        If True, split the source points across ``n_jobs`` threads, which
+        share the solution and the coil arrays.
 
     Returns
     -------
     B : ndarray, shape (n_dipoles * 3, n_sensors)
         Forward solution for a set of sensors
     """
+    if use_threads:
+        B = np.empty((3 * len(rr), len(solution)))
+
+        def _block(start, stop):
+            sl = slice(start, stop)
+            B[3 * start:3 * stop] = _do_inf_pots(mri_rr[sl], bem_rr, mri_Q,
+                                                 solution.T)
+            if coil_type == 'meg':
+                B[3 * start:3 * stop] += _do_prim_curr(rr[sl], coils)
+
+        parallel, p_fun, _ = parallel_func(_block, n_jobs,
+                                           backend='threading')
+        bounds = np.linspace(0, len(rr), n_jobs + 1).astype(int)
+        parallel(p_fun(start, stop)
+                 for start, stop in zip(bounds[:-1], bounds[1:]))
+        if coil_type == 'meg':
+            B *= _MAG_FACTOR
+        return B
+
     # Both MEG and EEG have the inifinite-medium potentials
     # This could be just vectorized, but eats too much memory, so instead we
     # reduce memory by chunking within _do_inf_pots and parallelize, too:
@@ -453,12 +483,21 @@ def _do_prim_curr(rr, coils):
     pc : ndarray, shape (n_sources, n_MEG_sensors)
         Primary current for set of MEG coils due to all sources
     """
+    if len(coils) == 0:  # empty chunk when n_jobs > len(coils)
+        return np.empty((3 * len(rr), 0))
+    rmags, cosmags, ws, bins = _concatenate_coils(coils)
+    starts = np.searchsorted(bins, np.arange(len(coils)))
+    n_batch = max(int(_FWD_BATCH_SIZE // len(rmags)), 1)
     pc = np.empty((len(rr) * 3, len(coils)))
-    for ci, c in enumerate(coils):
-        # For all integration points, multiply by weights, sum across pts
-        # and then flatten
-        pc[:, ci] = np.sum(c['w'] * _bem_inf_fields(rr, c['rmag'],
-                                                    c['cosmag']), 2).ravel()
+    # We chunk the sources in order to save memory
+    for start in range(0, len(rr), n_batch):
+        stop = min(start + n_batch, len(rr))
+        # For all integration points, multiply by weights, sum across the
+        # points of each coil and then flatten
+        fields = _bem_inf_fields(rr[start:stop], rmags, cosmags)
+        fields *= ws
+        pc[3 * start:3 * stop] = np.add.reduceat(
+            fields, starts, axis=2).reshape(-1, len(coils))
     return pc
 
 
@@ -488,13 +527,14 @@ def _do_inf_pots(mri_rr, bem_rr, mri_Q, sol):
     # B = np.dot(v0s, sol)
 
     # We chunk the source mri_rr's in order to save memory
-    bounds = np.concatenate([np.arange(0, len(mri_rr), 200), [len(mri_rr)]])
+    n_batch = max(int(_FWD_BATCH_SIZE // len(bem_rr)), 1)
     B = np.empty((len(mri_rr) * 3, sol.shape[1]))
-    for bi in range(len(bounds) - 1):
+    for start in range(0, len(mri_rr), n_batch):
+        stop = min(start + n_batch, len(mri_rr))
         # v0 in Hamalainen et al., 1989 == v_inf in Mosher, et al., 1999
-        v0s = _bem_inf_pots(mri_rr[bounds[bi]:bounds[bi + 1]], bem_rr, mri_Q)
+        v0s = _bem_inf_pots(mri_rr[start:stop], bem_rr, mri_Q)
         v0s = v0s.reshape(-1, v0s.shape[2])
-        B[3 * bounds[bi]:3 * bounds[bi + 1]] = np.dot(v0s, sol)
+        B[3 * start:3 * stop] = np.dot(v0s, sol)
     return B
 
 
@@ -502,10 +542,11 @@ def _do_inf_pots(mri_rr, bem_rr, mri_Q, sol):
 # SPHERE COMPUTATION
 
 def _sphere_pot_or_field(rr, mri_rr, mri_Q, coils, sphere, bem_rr,
-                         n_jobs, coil_type):
+                         n_jobs, coil_type, use_threads=False):
     """Do potential or field for spherical model."""
     fun = _eeg_spherepot_coil if coil_type == 'eeg' else _sphere_field
-    parallel, p_fun, _ = parallel_func(fun, n_jobs)
+    backend = 'threading' if use_threads else None
+    parallel, p_fun, _ = parallel_func(fun, n_jobs, backend=backend)
     B = np.concatenate(parallel(p_fun(r, coils, sphere)
                                 for r in np.array_split(rr, n_jobs)))
     return B
@@ -762,7 +803,7 @@ def _prep_field_computation(rr, bem, fwd_data, n_jobs, verbose=None):
 
 
 @verbose
-def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
+def _compute_forwards_meeg(rr, fd, n_jobs, use_threads=False, verbose=None):
     """Compute MEG and EEG forward solutions for all sensor types.
 
     Parameters
@@ -773,6 +814,8 @@ def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
         Dict containing forward data after update in _prep_field_computation
     n_jobs : int
         Number of jobs to run in parallel
+    use_threads : bool
+        If True, the jobs are threads that split the source points.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -806,13 +849,13 @@ def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
                     % (coil_type.upper(), len(rr), _pl(rr)))
         # Calculate forward solution using spherical or BEM model
         B = fun(rr, mri_rr, mri_Q, coils, solution, bem_rr, n_jobs,
-                coil_type)
+                coil_type, use_threads)
 
         # Compensate if needed (only done for MEG systems w/compensation)
         if compensator is not None:
             # Compute the field in the compensation sensors
             work = fun(rr, mri_rr, mri_Q, ccoils, csolution, bem_rr,
-                       n_jobs, coil_type)
+                       n_jobs, coil_type, use_threads)
             # Combine solutions so we can do the compensation
             both = np.zeros((work.shape[0], B.shape[1] + work.shape[1]))
             picks = pick_types(info, meg=True, ref_meg=False, exclude=[])
@@ -826,7 +869,7 @@ def _compute_forwards_meeg(rr, fd, n_jobs, verbose=None):
 
 @verbose
 def _compute_forwards(rr, bem, coils_list, ccoils_list, infos, coil_types,
-                      n_jobs, verbose=None):
+                      n_jobs, use_threads=False, verbose=None):
     """Compute the MEG and EEG forward solutions.
 
     This effectively combines compute_forward_meg and compute_forward_eeg
@@ -848,6 +891,9 @@ def _compute_forwards(rr, bem, coils_list, ccoils_list, infos, coil_types,
         Number of jobs to run in parallel
     infos : list, len(2)
         infos[0] is MEG info, infos[1] is EEG info
+    use_threads : bool
+        If True, compute the fields of the source points with ``n_jobs``
+        threads instead of worker processes.
 
     Returns
     -------
@@ -860,5 +906,5 @@ def _compute_forwards(rr, bem, coils_list, ccoils_list, infos, coil_types,
     fwd_data = dict(coils_list=coils_list, ccoils_list=ccoils_list,
                     infos=infos, coil_types=coil_types)
     _prep_field_computation(rr, bem, fwd_data, n_jobs)
-    Bs = _compute_forwards_meeg(rr, fwd_data, n_jobs)
+    Bs = _compute_forwards_meeg(rr, fwd_data, n_jobs, use_threads)
     return Bs
@@ -20,7 +20,7 @@ from ..transforms import (_ensure_trans, transform_surface_to, apply_trans,
                           _get_trans, _print_coord_trans, _coord_frame_name,
                           Transform)
 from ..utils import logger, verbose, warn, _pl
-from ..parallel import check_n_jobs
+from ..parallel import check_n_jobs, _check_n_jobs_threads
 from ..source_space import (_ensure_src, _filter_source_spaces,
                             _make_discrete_source_space, SourceSpaces)
 from ..source_estimate import VolSourceEstimate
@@ -540,8 +540,11 @@ def make_forward_solution(info, trans, src, bem, meg=True, eeg=True,
         If True, do not include reference channels in compensation. This
         option should be True for KIT files, since forward computation
         with reference channels is not currently supported.
-    n_jobs : int
-        Number of jobs to run in parallel.
+    n_jobs : int | str
+        Number of jobs to run in parallel. Can also be ``'threads:N'`` (or
+        ``'threads'`` for one thread per CPU) to compute the fields of the
+        source points with ``N`` threads, which share the BEM solution
+        instead of copying it to worker processes.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -582,6 +585,7 @@ def make_forward_solution(info, trans, src, bem, meg=True, eeg=True,
         info = read_info(info, verbose=False)
     else:
         info_extra = 'instance of Info'
+    n_jobs, use_threads = _check_n_jobs_threads(n_jobs)
     n_jobs = check_n_jobs(n_jobs)
 
     # Report the setup
@@ -612,7 +616,7 @@ def make_forward_solution(info, trans, src, bem, meg=True, eeg=True,
     ccoils = [compcoils, None]
     infos = [meg_info, None]
     megfwd, eegfwd = _compute_forwards(rr, bem, coils, ccoils,
-                                       infos, coil_types, n_jobs)
+                                       infos, coil_types, n_jobs, use_threads)
 
     # merge forwards
     fwd = _merge_meg_eeg_fwds(_to_forward_dict(megfwd, megnames),
@@ -17,7 +17,8 @@ from mne import (read_forward_solution, write_forward_solution,
 from mne.utils import (requires_mne, requires_nibabel, _TempDir,
                        run_tests_if_main, run_subprocess)
 from mne.forward._make_forward import _create_meg_coils, make_forward_dipole
-from mne.forward._compute_forward import _magnetic_dipole_field_vec
+from mne.forward._compute_forward import (_magnetic_dipole_field_vec,
+                                          _bem_pot_or_field)
 from mne.forward import Forward, _do_forward_solution
 from mne.dipole import Dipole, fit_dipole
 from mne.simulation import simulate_evoked
@@ -90,6 +91,22 @@ def _compare_forwards(fwd, fwd_py, n_sensors, n_src,
                             err_msg='EEG mismatch')
 
 
+def test_bem_field_more_jobs_than_coils():
+    """Test BEM fields when there are more jobs than coils."""
+    rng = np.random.RandomState(0)
+    coils = [dict(rmag=rng.randn(n_int, 3) * 0.01 + [0., 0., 0.1],
+                  cosmag=rng.randn(n_int, 3), w=rng.rand(n_int))
+             for n_int in (1, 4)]
+    rr = rng.randn(5, 3) * 0.01
+    solution = rng.randn(len(coils), 10)
+    bem_rr = rng.randn(10, 3) * 0.08
+    args = (rr, rr, np.eye(3), coils, solution, bem_rr)
+    want = _bem_pot_or_field(*args, n_jobs=1, coil_type='meg')
+    assert want.shape == (3 * len(rr), len(coils))
+    got = _bem_pot_or_field(*args, n_jobs=3, coil_type='meg')
+    assert_allclose(got, want, rtol=1e-10)
+
+
 def test_magnetic_dipole():
     """Test basic magnetic dipole forward calculation."""
     info = read_info(fname_raw)
@@ -216,7 +233,7 @@ def test_make_forward_solution_kit():
 
 @pytest.mark.slowtest
 @testing.requires_testing_data
-def test_make_forward_solution():
+def test_make_forward_solution(monkeypatch):
     """Test making M-EEG forward solution from python."""
     fwd_py = make_forward_solution(fname_raw, fname_trans, fname_src,
                                    fname_bem, mindist=5.0, eeg=True, meg=True)
@@ -224,6 +241,14 @@ def test_make_forward_solution():
     fwd = read_forward_solution(fname_meeg)
     assert (isinstance(fwd, Forward))
     _compare_forwards(fwd, fwd_py, 366, 1494, meg_rtol=1e-3)
+    # small tiles of source points, split across threads
+    from mne.forward import _compute_forward
+    monkeypatch.setattr(_compute_forward, '_FWD_BATCH_SIZE', 1e4)
+    fwd_threads = make_forward_solution(fname_raw, fname_trans, fname_src,
+                                        fname_bem, mindist=5.0, eeg=True,
+                                        meg=True, n_jobs='threads:2')
+    assert_allclose(fwd_threads['sol']['data'], fwd_py['sol']['data'],
+                    rtol=1e-10)
 
 
 @testing.requires_testing_data
@@ -34,7 +34,8 @@ from ..annotations import (_annotations_starts_stops, _write_annotations,
                            _handle_meas_date)
 from ..filter import (filter_data, notch_filter, resample, next_fast_len,
                       _resample_stim_channels, _filt_check_picks,
-                      _filt_update_info)
+                      _filt_update_info, create_filter, _check_method,
+                      _overlap_add_filter)
 from ..parallel import parallel_func
 from ..utils import (_check_fname, _check_pandas_installed, sizeof_fmt,
                      _check_pandas_index_arguments,
@@ -401,6 +402,7 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         self._projectors = list()
         self._projector = None
         self._dtype_ = dtype
+        self._stream_filters = list()
         self.set_annotations(None)
         # If we have True or a string, actually do the preloading
         self._update_times()
@@ -440,6 +442,9 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             if self.proj:
                 raise RuntimeError('Cannot change compensation on data where '
                                    'projectors have been applied')
+            if not self.preload and len(self._stream_filters) > 0:
+                raise RuntimeError('Cannot change compensation on data with '
+                                   'pending filters, load the data first')
             # Figure out what operator to use (varies depending on preload)
             from_comp = current_comp if self.preload else self._read_comp_grade
             comp = make_compensator(self.info, from_comp, grade)
@@ -522,6 +527,73 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         else:
             data = np.zeros(data_shape, dtype=dtype)
 
+        self._read_segment_filtered(data, start, stop, idx, projector,
+                                    len(self._stream_filters))
+        return data
+
+    def _read_segment_filtered(self, data, start, stop, idx, projector,
+                               n_filters):
+        """Read data with the first n_filters streaming filters applied.
+
+        Each filter is applied to the requested range of its segments, read
+        together with enough surrounding samples (clipped to the segment
+        boundaries) for the result to match filtering the whole segment.
+        The projector is applied after the filters that were added before
+        the projection, as it would have been to the loaded data.
+        """
+        if n_filters == 0:
+            self._read_segment_unfiltered(data, start, stop, idx, projector)
+            return
+        filt = self._stream_filters[n_filters - 1]
+        if projector is not None and not filt['projected']:
+            # filter the unprojected data, then project them (which needs
+            # all the channels)
+            if isinstance(idx, slice) and idx == slice(None):
+                full = data
+            else:
+                full = np.zeros((self.info['nchan'], stop - start),
+                                data.dtype)
+            self._read_segment_filtered(full, start, stop, slice(None), None,
+                                        n_filters)
+            lims = np.concatenate([np.arange(0, stop - start, 10000),
+                                   [stop - start]])
+            for b_start, b_stop in zip(lims[:-1], lims[1:]):
+                data[:, b_start:b_stop] = np.dot(projector[idx],
+                                                 full[:, b_start:b_stop])
+            return
+        rows = np.where(np.in1d(np.arange(self.info['nchan'])[idx],
+                                filt['picks']))[0]
+        n_margin = len(filt['h'])
+        onsets = filt['onsets'] - self.first_samp
+        ends = filt['ends'] - self.first_samp
+        if len(rows) == 0:
+            onsets = ends = np.array([], int)
+        pos = start
+        for onset, end in zip(onsets, ends):
+            this_start, this_stop = max(onset, start), min(end, stop)
+            if this_start >= this_stop:
+                continue
+            if this_start > pos:
+                self._read_segment_filtered(
+                    data[:, pos - start:this_start - start], pos, this_start,
+                    idx, projector, n_filters - 1)
+            w_start = max(onset, this_start - n_margin, 0)
+            w_stop = min(end, this_stop + n_margin, self.n_times)
+            window = np.zeros((len(data), w_stop - w_start), data.dtype)
+            self._read_segment_filtered(window, w_start, w_stop, idx,
+                                        projector, n_filters - 1)
+            window = _overlap_add_filter(
+                window, filt['h'], None, filt['phase'], rows, filt['n_jobs'],
+                copy=False, pad=filt['pad'])
+            data[:, this_start - start:this_stop - start] = \
+                window[:, this_start - w_start:this_stop - w_start]
+            pos = max(pos, this_stop)
+        if pos < stop:
+            self._read_segment_filtered(data[:, pos - start:], pos, stop, idx,
+                                        projector, n_filters - 1)
+
+    def _read_segment_unfiltered(self, data, start, stop, idx, projector):
+        """Read data from the files into data."""
         # deal with having multiple files accessed by the raw object
         cumul_lens = np.concatenate(([0], np.array(self._raw_lengths,
                                                    dtype='int')))
@@ -561,7 +633,6 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
                                     int(start_file), int(stop_file),
                                     cals, mult)
             offset += n_read
-        return data
 
     def _read_segment_file(self, data, idx, fi, start, stop, cals, mult):
         """Read a segment of data from a file.
@@ -628,6 +699,91 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
                     return descr
         return self[picks, start:stop][0]
 
+    def _check_bad_segments(self, starts, stops, picks,
+                            reject_by_annotation=False):
+        """Check if several data segments are bad, reading them in batches.
+
+        This is a vectorized version of :meth:`_check_bad_segment`. Nearby
+        segments are read together with a single read, so that data buffers
+        shared by several segments are only read and calibrated once.
+
+        Parameters
+        ----------
+        starts : array of int
+            First sample of each slice.
+        stops : array of int
+            End of each slice.
+        picks : array of int
+            Channel picks.
+        reject_by_annotation : bool
+            Whether to perform rejection based on annotations.
+            False by default.
+
+        Returns
+        -------
+        data : list of (array | str | None)
+            For each segment, the data in the desired range (good segment),
+            the description of the bad segment, or None if the segment
+            starts before the data.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        out = [None] * len(starts)
+        good = starts >= 0
+        if reject_by_annotation and len(self.annotations) > 0:
+            annot = self.annotations
+            sfreq = self.info['sfreq']
+            is_bad = np.array([descr.lower().startswith('bad')
+                               for descr in annot.description], bool)
+            onset = _sync_onset(self, annot.onset)[is_bad]
+            offset = onset + annot.duration[is_bad]
+            description = annot.description[is_bad]
+            overlaps = ((onset < stops[:, np.newaxis] / sfreq) &
+                        (offset > starts[:, np.newaxis] / sfreq))
+            rejected = good & overlaps.any(axis=1)
+            first_bad = np.argmax(overlaps, axis=1)
+            for ii in np.where(rejected)[0]:
+                out[ii] = description[first_bad[ii]]
+            good &= ~rejected
+
+        # group sorted segments into spans that are read at once, allowing
+        # gaps of up to one segment length and a bounded span size
+        use = np.where(good)[0]
+        if len(use) == 0:
+            return out
+        use = use[np.argsort(starts[use], kind='mergesort')]
+        n_picks = self.info['nchan'] if picks is None else len(picks)
+        seg_len = int((stops[use] - starts[use]).max())
+        max_span = max(2 ** 23 // max(n_picks, 1), seg_len)  # ~64 MB
+        spans = [[use[0]]]
+        span_start, span_stop = starts[use[0]], stops[use[0]]
+        for ii in use[1:]:
+            if starts[ii] <= span_stop + seg_len and \
+                    max(span_stop, stops[ii]) - span_start <= max_span:
+                spans[-1].append(ii)
+                span_stop = max(span_stop, stops[ii])
+            else:
+                spans.append([ii])
+                span_start, span_stop = starts[ii], stops[ii]
+        for span in spans:
+            span = np.array(span)
+            span_start = starts[span].min()
+            span_data = self[picks, span_start:stops[span].max()][0]
+            offsets = starts[span] - span_start
+            lens = stops[span] - starts[span]
+            # scatter full-length segments of equal length with one
+            # fancy-indexing operation, slice the others (e.g., truncated)
+            full = (offsets + lens <= span_data.shape[1]) & (lens == seg_len)
+            if full.any():
+                idx = offsets[full][:, np.newaxis] + np.arange(seg_len)
+                segs = span_data[:, idx].transpose(1, 0, 2)
+                for ii, seg in zip(span[full], segs):
+                    out[ii] = seg
+            for ii, offset, n in zip(span[~full], offsets[~full],
+                                     lens[~full]):
+                out[ii] = span_data[:, offset:offset + n].copy()
+        return out
+
     @verbose
     def load_data(self, verbose=None):
         """Load raw data.
@@ -666,6 +822,7 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         assert len(self._data) == self.info['nchan']
         self.preload = True
         self._comp = None  # no longer needed
+        self._stream_filters = list()  # applied while reading
         self.close()
 
     def _update_times(self):
@@ -1210,8 +1367,9 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         filter to the channels selected by ``picks``. By default the data
         of the Raw object is modified inplace.
 
-        The Raw object has to have the data loaded e.g. with ``preload=True``
-        or ``self.load_data()``.
+        With ``method='iir'``, the Raw object has to have the data loaded
+        e.g. with ``preload=True`` or ``self.load_data()``. FIR filters can
+        also be applied to data that are not loaded, see Notes.
 
         ``l_freq`` and ``h_freq`` are the frequencies below which and above
         which, respectively, to filter out of the data. Thus the uses are:
@@ -1272,6 +1430,9 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         n_jobs : int | str
             Number of jobs to run in parallel.
             Can be 'cuda' if ``cupy`` is installed properly and method='fir'.
+            Can also be ``'threads:N'`` (or ``'threads'`` for one thread per
+            CPU) to filter the channels in place with ``N`` threads, which
+            avoids copying the data to worker processes.
         method : str
             'fir' will use overlap-add FIR filtering, 'iir' will use IIR
             forward-backward filtering (via filtfilt).
@@ -1343,13 +1504,47 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         :ref:`sphx_glr_auto_tutorials_plot_background_filtering.py`
         and
         :ref:`sphx_glr_auto_tutorials_plot_artifacts_correction_filtering.py`.
+
+        If the data are not loaded and ``method='fir'``, the filter is
+        designed immediately but applied on the fly whenever data are read
+        (e.g., by :meth:`get_data`, when creating :class:`mne.Epochs`, or
+        block by block by :meth:`save`), using enough neighboring samples
+        to give the same result as filtering the loaded data. Memory use is
+        then bounded by the size of the blocks that are read. If such a
+        Raw instance is cropped afterward, the new first and last samples
+        are treated as the edges of the signal. Projectors are applied in
+        the same order relative to the filters as they would be to loaded
+        data, and the compensation grade cannot be changed until the data
+        are loaded.
+
+        .. versionadded:: 0.17
+           Support for FIR filtering of data that are not loaded.
         """
-        _check_preload(self, 'raw.filter')
+        iir_params, method = _check_method(method, iir_params)
+        if method != 'fir':
+            _check_preload(self, 'raw.filter with method="%s"' % (method,))
         update_info, picks = _filt_check_picks(self.info, picks,
                                                l_freq, h_freq)
         # Deal with annotations
         onsets, ends = _annotations_starts_stops(
             self, skip_by_annotation, 'skip_by_annotation', invert=True)
+        if not self.preload:
+            keep = ends > onsets
+            onsets, ends = onsets[keep], ends[keep]
+            for start, stop in zip(onsets, ends):
+                h = create_filter(
+                    np.empty((0, stop - start)), self.info['sfreq'], l_freq,
+                    h_freq, filter_length, l_trans_bandwidth,
+                    h_trans_bandwidth, method, iir_params, phase, fir_window,
+                    fir_design)
+            if len(onsets) > 0:
+                self._stream_filters.append(dict(
+                    h=h, phase=phase, picks=picks, n_jobs=n_jobs, pad=pad,
+                    onsets=onsets + self.first_samp,
+                    ends=ends + self.first_samp,
+                    projected=self._projector is not None))
+            _filt_update_info(self.info, update_info, l_freq, h_freq)
+            return self
         for start, stop in zip(onsets, ends):
             filter_data(
                 self._data[:, start:stop], self.info['sfreq'], l_freq, h_freq,
@@ -1411,7 +1606,10 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             Only used for ``method='fir'``.
         n_jobs : int | str
             Number of jobs to run in parallel. Can be 'cuda' if ``cupy``
-            is installed properly and method='fir'.
+            is installed properly and method='fir'. Can also be
+            ``'threads:N'`` (or ``'threads'`` for one thread per CPU) to
+            filter the channels in place with ``N`` threads, which avoids
+            copying the data to worker processes.
         method : str
             'fir' will use overlap-add FIR filtering, 'iir' will use IIR
             forward-backward filtering (via filtfilt). 'spectrum_fit' will
@@ -1495,7 +1693,8 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
 
     @verbose
     def resample(self, sfreq, npad='auto', window='boxcar', stim_picks=None,
-                 n_jobs=1, events=None, pad='reflect_limited', verbose=None):
+                 n_jobs=1, events=None, pad='reflect_limited', method='fft',
+                 verbose=None):
         """Resample all channels.
 
         The Raw object has to have the data loaded e.g. with ``preload=True``
@@ -1548,6 +1747,14 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             values of the vector, followed by zeros.
 
             .. versionadded:: 0.15
+        method : str
+            Can be "fft" (default) to resample in the frequency domain, or
+            "polyphase" to use polyphase FIR filtering, which is much faster
+            for long recordings but requires the ratio of the new and old
+            sample rates to be a ratio of small integers. See
+            :func:`mne.filter.resample`.
+
+            .. versionadded:: 0.17
         verbose : bool, str, int, or None
             If not None, override default verbose level (see
             :func:`mne.verbose` and :ref:`Logging documentation <tut_logging>`
@@ -1600,7 +1807,8 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         for ri in range(len(self._raw_lengths)):
             data_chunk = self._data[:, offsets[ri]:offsets[ri + 1]]
             new_data.append(resample(data_chunk, sfreq, o_sfreq, npad,
-                                     window=window, n_jobs=n_jobs, pad=pad))
+                                     window=window, n_jobs=n_jobs, pad=pad,
+                                     method=method))
             new_ntimes = new_data[ri].shape[1]
 
             # In empirical testing, it was faster to resample all channels
@@ -2091,6 +2299,10 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
                 preload = False
 
         if preload is False:
+            if any(len(r._stream_filters) > 0 for r in all_raws):
+                raise RuntimeError('Raw instances that are filtered while '
+                                   'reading can only be concatenated with '
+                                   'preload=True (or a string)')
             if self.preload:
                 self._data = None
             self.preload = False
@@ -2123,6 +2335,7 @@ class BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
                     _data[:, c_ns[ri]:c_ns[ri + 1]] = raws[ri]._data
             self._data = _data
             self.preload = True
+            self._stream_filters = list()
 
         # now combine information from each raw file to construct new self
         annotations = self.annotations
@@ -13,7 +13,8 @@ import os.path as op
 import numpy as np
 
 from ..constants import FIFF
-from ..open import fiff_open, _fiff_get_fid, _get_next_fname
+from ..open import (fiff_open, _fiff_get_fid, _get_next_fname,
+                    _fiff_index_key, _get_fiff_index, _set_fiff_index)
 from ..meas_info import read_meas_info
 from ..tree import dir_tree_find
 from ..tag import read_tag, read_tag_info
@@ -26,6 +27,7 @@ from ...annotations import (Annotations, _combine_annotations,
 
 from ...event import AcqParserFIF
 from ...utils import check_fname, logger, verbose, warn
+from ...externals.six import string_types
 
 
 class Raw(BaseRaw):
@@ -49,7 +51,13 @@ class Raw(BaseRaw):
         If True, the data will be preloaded into memory (fast, requires
         large amount of memory). If preload is a string, preload is the
         file name of a memory-mapped file which is used to store the data
-        on the hard drive (slower, requires less memory).
+        on the hard drive (slower, requires less memory). If preload is
+        ``'mmap'``, the data are not preloaded but the data buffers of the
+        (uncompressed) file are memory-mapped, so that indexing reads only
+        the requested samples without copying whole buffers.
+
+        .. versionadded:: 0.17
+           Support for ``preload='mmap'``.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -79,10 +87,16 @@ class Raw(BaseRaw):
         fnames = [op.realpath(fname)]
         del fname
         split_fnames = []
+        mmap = isinstance(preload, string_types) and preload == 'mmap'
+        if mmap:
+            preload = False
 
         raws = []
         for ii, fname in enumerate(fnames):
             do_check_fname = fname not in split_fnames
+            if mmap and fname.lower().endswith('.gz'):
+                raise ValueError('preload="mmap" is not supported for '
+                                 'compressed files, got %s' % fname)
             raw, next_fname, buffer_size_sec = \
                 self._read_raw_file(fname, allow_maxshield,
                                     preload, do_check_fname)
@@ -103,6 +117,8 @@ class Raw(BaseRaw):
             [r.filename for r in raws], [r._raw_extras for r in raws],
             raws[0].orig_format, None, buffer_size_sec=buffer_size_sec,
             verbose=verbose)
+        # per-file buffer offset indices, built on first memory-mapped read
+        self._mmap_index = dict() if mmap else None
 
         # combine annotations
         self.set_annotations(raws[0].annotations, False)
@@ -152,7 +168,13 @@ class Raw(BaseRaw):
         with ff as fid:
             #   Read the measurement info
 
-            info, meas = read_meas_info(fid, tree, clean_bads=True)
+            key = _fiff_index_key(fname, fid)
+            meas_info = _get_fiff_index(key, 'meas_info')
+            if meas_info is None:
+                info, meas = read_meas_info(fid, tree, clean_bads=True)
+                _set_fiff_index(key, meas_info=(info.copy(), meas))
+            else:  # the info is modified, so do not share it with the cache
+                info, meas = meas_info[0].copy(), meas_info[1]
             annotations = _read_annotations_fif(fid, tree)
 
             #   Locate the data of interest
@@ -319,8 +341,24 @@ class Raw(BaseRaw):
         self._dtype_ = dtype
         return dtype
 
+    def _get_mmap_index(self, fi):
+        """Get the data buffer index used for memory-mapped reads.
+
+        Returns None if the file cannot be memory-mapped (e.g., a compressed
+        file appended to the data), which is then read normally.
+        """
+        fname = self._filenames[fi]
+        if fname not in self._mmap_index:
+            self._mmap_index[fname] = _make_mmap_index(
+                fname, self._raw_extras[fi])
+        return self._mmap_index[fname]
+
     def _read_segment_file(self, data, idx, fi, start, stop, cals, mult):
         """Read a segment of data from a file."""
+        if getattr(self, '_mmap_index', None) is not None and \
+                self._get_mmap_index(fi) is not None:
+            return self._read_segment_file_mmap(data, idx, fi, start, stop,
+                                                cals, mult)
         stop -= 1
         offset = 0
         with _fiff_get_fid(self._filenames[fi]) as fid:
@@ -368,6 +406,30 @@ class Raw(BaseRaw):
                 if this['last'] >= stop:
                     break
 
+    def _read_segment_file_mmap(self, data, idx, fi, start, stop, cals,
+                                mult):
+        """Read a segment of data from a file using memory mapping."""
+        index = self._get_mmap_index(fi)
+        nchan = self.info['nchan']
+        # buffers with last >= start and first < stop (stop is exclusive)
+        b_start = np.searchsorted(index['last'], start)
+        b_stop = np.searchsorted(index['first'], stop)
+        if b_start >= b_stop:
+            return
+        mm = np.memmap(self._filenames[fi], dtype=np.uint8, mode='r')
+        for bi in range(b_start, b_stop):
+            first, offset = index['first'][bi], index['offset'][bi]
+            lo = max(start, first)
+            hi = min(stop, index['last'][bi] + 1)
+            if offset < 0:  # acquisition skip, leave as zeros
+                continue
+            one = np.ndarray((index['nsamp'][bi], nchan),
+                             dtype=index['dtype'][bi], buffer=mm,
+                             offset=offset)
+            _mult_cal_one(data[:, lo - start:hi - start],
+                          one[lo - first:hi - first].T, idx, cals, mult)
+        del mm
+
     def fix_mag_coil_types(self):
         """Fix Elekta magnetometer coil types.
 
@@ -413,6 +475,41 @@ class Raw(BaseRaw):
         return self._acqparser
 
 
+def _make_mmap_index(fname, raw_extras):
+    """Build the sample and byte offset index of the data buffers.
+
+    Returns None if the buffers of the file cannot be memory-mapped.
+    """
+    if fname.lower().endswith('.gz'):
+        return None
+    first = np.array([r['first'] for r in raw_extras], np.int64)
+    last = np.array([r['last'] for r in raw_extras], np.int64)
+    nsamp = np.array([r['nsamp'] for r in raw_extras], np.int64)
+    offset = np.full(len(raw_extras), -1, np.int64)
+    dtype = list()
+    for ri, r in enumerate(raw_extras):
+        if r['ent'] is None:
+            dtype.append(None)
+            continue
+        if r['ent'].type not in _mmap_dtypes:
+            return None
+        dtype.append(np.dtype(_mmap_dtypes[r['ent'].type]))
+        offset[ri] = r['ent'].pos + 16  # skip the tag header
+    return dict(first=first, last=last, nsamp=nsamp, offset=offset,
+                dtype=dtype)
+
+
+_mmap_dtypes = {
+    FIFF.FIFFT_DAU_PACK16: '>i2',
+    FIFF.FIFFT_SHORT: '>i2',
+    FIFF.FIFFT_INT: '>i4',
+    FIFF.FIFFT_FLOAT: '>f4',
+    FIFF.FIFFT_DOUBLE: '>f8',
+    FIFF.FIFFT_COMPLEX_FLOAT: '>c8',
+    FIFF.FIFFT_COMPLEX_DOUBLE: '>c16',
+}
+
+
 def _check_entry(first, nent):
     """Sanity check entries."""
     if first >= nent:
@@ -440,7 +537,13 @@ def read_raw_fif(fname, allow_maxshield=False, preload=False, verbose=None):
         If True, the data will be preloaded into memory (fast, requires
         large amount of memory). If preload is a string, preload is the
         file name of a memory-mapped file which is used to store the data
-        on the hard drive (slower, requires less memory).
+        on the hard drive (slower, requires less memory). If preload is
+        ``'mmap'``, the data are not preloaded but the data buffers of the
+        (uncompressed) file are memory-mapped, so that indexing reads only
+        the requested samples without copying whole buffers.
+
+        .. versionadded:: 0.17
+           Support for ``preload='mmap'``.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
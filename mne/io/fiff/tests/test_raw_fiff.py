@@ -7,6 +7,7 @@
 from copy import deepcopy
 from functools import partial
 import itertools as itt
+import os
 import os.path as op
 import sys
 
@@ -949,6 +950,71 @@ def test_filter_picks():
         pytest.raises(RuntimeError, raw_.filter, 10, 30)
 
 
+def test_filter_streaming():
+    """Test FIR filtering of data that are not loaded."""
+    tempdir = _TempDir()
+    raw = read_raw_fif(test_fif_fname).crop(0, 10)
+    raw.set_annotations(Annotations([4.], [0.5], ['edge']))
+    picks = pick_types(raw.info, meg='grad')
+    kwargs_bp = dict(picks=picks[:40], fir_design='firwin')
+    kwargs_lp = dict(picks=picks[20:], fir_design='firwin')
+    raw_filt = raw.copy().load_data().filter(1., 40., **kwargs_bp)
+    raw_filt.filter(None, 20., **kwargs_lp)
+    raw_stream = raw.copy().filter(1., 40., **kwargs_bp)
+    raw_stream.filter(None, 20., n_jobs='threads:2', **kwargs_lp)
+    assert not raw_stream.preload
+    assert raw_stream.info['lowpass'] == raw_filt.info['lowpass']
+    edge = raw.time_as_index(4.)[0]
+    for start, stop in ((0, 100), (1000, 3000), (edge - 50, edge + 50),
+                        (edge + 400, None)):
+        assert_allclose(raw_stream[picks, start:stop][0],
+                        raw_filt[picks, start:stop][0], rtol=1e-7, atol=1e-20)
+    assert_array_equal(raw_stream[-5:, :][0], raw_filt[-5:, :][0])
+    # write blocks to disk
+    fname = op.join(tempdir, 'test_filt_raw.fif')
+    raw_stream.save(fname, buffer_size_sec=1.)
+    assert_allclose(read_raw_fif(fname)[picks][0], raw_filt[picks][0],
+                    rtol=1e-6, atol=1e-20)
+    # loading applies the filters once
+    raw_stream.load_data()
+    assert len(raw_stream._stream_filters) == 0
+    assert_allclose(raw_stream._data[picks], raw_filt._data[picks],
+                    rtol=1e-7, atol=1e-20)
+    # IIR filtering needs the data
+    with pytest.raises(RuntimeError, match='method="iir"'):
+        raw.copy().filter(1., 40., method='iir')
+    raw_stream = raw.copy().filter(1., 40., **kwargs_bp)
+    with pytest.raises(RuntimeError, match='concatenated'):
+        concatenate_raws([raw_stream, raw.copy()])
+    raw_concat = concatenate_raws([raw_stream.copy(), raw.copy()],
+                                  preload=True)
+    n_times = len(raw.times)
+    assert_allclose(raw_concat[picks, :n_times][0], raw_stream[picks][0])
+    # the projector is applied in the same order as to loaded data
+    meg = pick_types(raw.info, meg=True)
+    for proj_first in (False, True):
+        raw_filt = raw.copy().load_data()
+        raw_stream = raw.copy()
+        for inst in (raw_filt, raw_stream):
+            if proj_first:
+                inst.apply_proj()
+            inst.filter(1., 40., **kwargs_bp)
+            if not proj_first:
+                inst.apply_proj()
+            inst.filter(None, 20., **kwargs_lp)
+        for start, stop in ((0, 100), (edge - 50, edge + 50)):
+            for these_picks in (meg, picks[::7]):
+                assert_allclose(raw_stream[these_picks, start:stop][0],
+                                raw_filt[these_picks, start:stop][0],
+                                rtol=1e-6, atol=1e-20)
+    # compensation cannot be changed after filtering
+    raw_ctf = read_raw_fif(ctf_comp_fname).filter(
+        None, 40., picks=[0], fir_design='firwin')
+    with pytest.raises(RuntimeError, match='pending filters'):
+        raw_ctf.apply_gradient_compensation(
+            1 if raw_ctf.compensation_grade != 1 else 0)
+
+
 @testing.requires_testing_data
 def test_crop():
     """Test cropping raw files."""
@@ -1522,4 +1588,72 @@ def test_memmap(tmpdir):
     # require them.
 
 
+def test_fiff_index_cache(tmpdir, monkeypatch):
+    """Test caching of the tag directory, tree and info."""
+    from mne.io.open import _fiff_index_memory
+    import shutil
+    cache_dir = op.join(str(tmpdir), 'cache')
+    os.mkdir(cache_dir)
+    fname = op.join(str(tmpdir), 'test_raw.fif')
+    shutil.copyfile(test_fif_fname, fname)
+    raw = read_raw_fif(fname)
+    monkeypatch.setenv('MNE_FIFF_INDEX_CACHE_DIR', cache_dir)
+    raw_cache = read_raw_fif(fname)
+    index_fnames = os.listdir(cache_dir)
+    assert len(index_fnames) == 1
+    assert index_fnames[0].endswith('-index.npz')  # no pickle
+    assert object_diff(raw.info, raw_cache.info) == ''
+    _fiff_index_memory.clear()  # force reading from disk
+    raw_cache = read_raw_fif(fname)
+    assert object_diff(raw.info, raw_cache.info) == ''
+    assert_array_equal(raw[:, :100][0], raw_cache[:, :100][0])
+    # a corrupt index is ignored (and rewritten)
+    _fiff_index_memory.clear()
+    with open(op.join(cache_dir, index_fnames[0]), 'wb') as fid:
+        fid.write(b'corrupt')
+    raw_cache = read_raw_fif(fname)
+    assert object_diff(raw.info, raw_cache.info) == ''
+    # modifying the in-memory info must not affect the cache
+    raw_cache.info['bads'] = raw_cache.ch_names[:2]
+    raw_cache = read_raw_fif(fname)
+    assert raw_cache.info['bads'] == raw.info['bads']
+    # changes to the file invalidate the cache
+    raw_cache = read_raw_fif(fname, preload=True)
+    raw_cache.info['bads'] = raw_cache.ch_names[:2]
+    raw_cache.save(fname, overwrite=True)
+    raw_cache = read_raw_fif(fname)
+    assert raw_cache.info['bads'] == raw.ch_names[:2]
+    _fiff_index_memory.clear()
+
+
+def test_preload_mmap():
+    """Test memory-mapped reading of data buffers."""
+    raw = read_raw_fif(test_fif_fname, preload=True)
+    raw_mmap = read_raw_fif(test_fif_fname, preload='mmap')
+    assert not raw_mmap.preload
+    buf_len = raw_mmap._raw_extras[0][0]['nsamp']
+    picks = [0, 5, 10, 306]
+    for start, stop in ((0, 10), (buf_len - 3, 2 * buf_len + 7),
+                        (0, len(raw.times))):
+        assert_allclose(raw_mmap[picks, start:stop][0],
+                        raw[picks, start:stop][0], rtol=1e-6, atol=1e-20)
+    assert_allclose(raw_mmap[:, 100:200][0], raw[:, 100:200][0])
+    # projection is applied lazily
+    raw.apply_proj()
+    raw_mmap.apply_proj()
+    assert not raw_mmap.preload
+    assert_allclose(raw_mmap[:, 100:2000][0], raw[:, 100:2000][0])
+    assert_allclose(raw_mmap.copy().load_data()._data, raw._data)
+    with pytest.raises(ValueError, match='compressed'):
+        read_raw_fif(test_fif_gz_fname, preload='mmap')
+    # compressed files appended to the data are read normally
+    raw_mmap = read_raw_fif(test_fif_fname, preload='mmap')
+    raw_mmap.append(read_raw_fif(test_fif_gz_fname))
+    raw = concatenate_raws([read_raw_fif(test_fif_fname, preload=True),
+                            read_raw_fif(test_fif_gz_fname, preload=True)])
+    n_times = len(raw_mmap.times) // 2
+    assert_allclose(raw_mmap[:, n_times - 10:n_times + 10][0],
+                    raw[:, n_times - 10:n_times + 10][0])
+
+
 run_tests_if_main()
@@ -4,6 +4,9 @@
 #
 # License: BSD (3-clause)
 
+from collections import OrderedDict
+import hashlib
+import os
 import os.path as op
 from io import BytesIO
 from gzip import GzipFile
@@ -14,7 +17,7 @@ from scipy import sparse
 from .tag import read_tag_info, read_tag, read_big, Tag, _call_dict_names
 from .tree import make_dir_tree, dir_tree_find
 from .constants import FIFF
-from ..utils import logger, verbose
+from ..utils import logger, verbose, get_config, warn
 from ..externals.six import string_types, iteritems, text_type
 
 
@@ -74,6 +77,144 @@ def _get_next_fname(fid, fname, tree):
     return next_fname
 
 
+def _make_fiff_index(fid, fname):
+    """Read or create the tag directory and tree of an open FIF file."""
+    fid.seek(0, 0)
+    read_tag_info(fid)  # skip the file id tag
+    tag = read_tag(fid)
+
+    if tag.kind != FIFF.FIFF_DIR_POINTER:
+        raise ValueError('file does not have a directory pointer')
+
+    #   Read or create the directory tree
+    logger.debug('    Creating tag directory for %s...' % fname)
+
+    dirpos = int(tag.data)
+    if dirpos > 0:
+        tag = read_tag(fid, dirpos)
+        directory = tag.data
+    else:
+        fid.seek(0, 0)
+        directory = list()
+        while tag.next >= 0:
+            pos = fid.tell()
+            tag = read_tag_info(fid)
+            if tag is None:
+                break  # HACK : to fix file ending with empty tag...
+            else:
+                tag.pos = pos
+                directory.append(tag)
+
+    tree, _ = make_dir_tree(fid, directory)
+    logger.debug('[done]')
+    return directory, tree
+
+
+##############################################################################
+# Tag directory index cache
+
+_fiff_index_memory = OrderedDict()
+_FIFF_INDEX_MEMORY_SIZE = 32
+_TAG_FIELDS = ('kind', 'type', 'size', 'next', 'pos')
+
+
+def _fiff_index_key(fname, fid):
+    """Get the key (path, size, mtime and file id) to validate a cache.
+
+    Returns None if the cache is disabled (``MNE_FIFF_INDEX_CACHE_DIR`` is not
+    set) or if ``fname`` is not a filename.
+    """
+    if get_config('MNE_FIFF_INDEX_CACHE_DIR', None) is None or \
+            not isinstance(fname, string_types):
+        return None
+    stat = os.stat(fname)
+    pos = fid.tell()
+    fid.seek(0, 0)
+    file_id = fid.read(36)  # the FIFF_FILE_ID tag, header + id struct
+    fid.seek(pos, 0)
+    return (op.realpath(fname), stat.st_size, stat.st_mtime, file_id)
+
+
+def _fiff_index_fname(key):
+    """Get the name of the sidecar file for a given key."""
+    cache_dir = get_config('MNE_FIFF_INDEX_CACHE_DIR')
+    path_hash = hashlib.sha1(key[0].encode('utf-8')).hexdigest()
+    return op.join(cache_dir, '%s-index.npz' % path_hash)
+
+
+def _read_fiff_index(key):
+    """Read the tag directory of a file from its sidecar, or None."""
+    fname = _fiff_index_fname(key)
+    if not op.isfile(fname):
+        return None
+    try:
+        with np.load(fname, allow_pickle=False) as npz:
+            if (text_type(npz['path']) != key[0] or
+                    int(npz['size']) != key[1] or
+                    float(npz['mtime']) != key[2] or
+                    npz['file_id'].tobytes() != key[3]):
+                return None
+            tags = npz['tags']
+    except Exception:  # corrupt or partially written, just redo
+        return None
+    return [Tag(*tag) for tag in tags.tolist()]
+
+
+def _write_fiff_index(key, directory):
+    """Write the tag directory of a file to its sidecar."""
+    fname = _fiff_index_fname(key)
+    tags = np.array([[getattr(tag, field) for field in _TAG_FIELDS]
+                     for tag in directory], np.int64).reshape(-1, 5)
+    try:
+        with open(fname, 'wb') as fid:
+            np.savez(fid, path=text_type(key[0]), size=key[1], mtime=key[2],
+                     file_id=np.frombuffer(key[3], np.uint8), tags=tags)
+    except (IOError, OSError) as exp:
+        warn('Could not write FIF index cache file %s: %s' % (fname, exp))
+
+
+def _remember_fiff_index(entry):
+    """Add an entry to the bounded in-memory cache."""
+    _fiff_index_memory.pop(entry['key'][0], None)
+    _fiff_index_memory[entry['key'][0]] = entry
+    while len(_fiff_index_memory) > _FIFF_INDEX_MEMORY_SIZE:
+        _fiff_index_memory.popitem(last=False)
+
+
+def _get_fiff_index(key, name):
+    """Get a cached item for a file, or None if not cached.
+
+    The item is shared with the cache and must not be modified. Only the tag
+    directory (``'directory'``) is also cached on disk.
+    """
+    if key is None:
+        return None
+    entry = _fiff_index_memory.get(key[0])
+    if entry is None or entry['key'] != key:
+        directory = _read_fiff_index(key)
+        if directory is None:
+            return None
+        entry = dict(key=key, directory=directory)
+        _remember_fiff_index(entry)
+    return entry.get(name)
+
+
+def _set_fiff_index(key, **kwargs):
+    """Cache items (e.g., the tag directory and tree) for a file.
+
+    The items are not copied, so they must not be modified afterward.
+    """
+    if key is None:
+        return
+    entry = _fiff_index_memory.get(key[0])
+    if entry is None or entry['key'] != key:
+        entry = dict(key=key)
+    entry.update(kwargs)
+    _remember_fiff_index(entry)
+    if 'directory' in kwargs:
+        _write_fiff_index(key, kwargs['directory'])
+
+
 @verbose
 def fiff_open(fname, preload=False, verbose=None):
     """Open a FIF file.
@@ -99,6 +240,15 @@ def fiff_open(fname, preload=False, verbose=None):
         lists and tags.
     directory : list
         A list of tags.
+
+    Notes
+    -----
+    If the ``MNE_FIFF_INDEX_CACHE_DIR`` configuration value is set to an
+    existing directory, the tag directory of opened files is cached there (as
+    ``.npz`` files of tag positions) and, with the tree, in memory, keyed by
+    the file path, size, modification time and file id. Re-opening an
+    unchanged file then skips scanning it for tags. The returned tree and
+    directory may then be shared with the cache and must not be modified.
     """
     fid = _fiff_get_fid(fname)
     # do preloading of entire file
@@ -121,33 +271,17 @@ def fiff_open(fname, preload=False, verbose=None):
     if tag.size != 20:
         raise ValueError('file does not start with a file id tag')
 
-    tag = read_tag(fid)
-
-    if tag.kind != FIFF.FIFF_DIR_POINTER:
-        raise ValueError('file does not have a directory pointer')
-
-    #   Read or create the directory tree
-    logger.debug('    Creating tag directory for %s...' % fname)
-
-    dirpos = int(tag.data)
-    if dirpos > 0:
-        tag = read_tag(fid, dirpos)
-        directory = tag.data
+    key = _fiff_index_key(fname, fid)
+    directory = _get_fiff_index(key, 'directory')
+    tree = _get_fiff_index(key, 'tree')
+    if directory is None:
+        directory, tree = _make_fiff_index(fid, fname)
+        _set_fiff_index(key, directory=directory, tree=tree)
     else:
-        fid.seek(0, 0)
-        directory = list()
-        while tag.next >= 0:
-            pos = fid.tell()
-            tag = read_tag_info(fid)
-            if tag is None:
-                break  # HACK : to fix file ending with empty tag...
-            else:
-                tag.pos = pos
-                directory.append(tag)
-
-    tree, _ = make_dir_tree(fid, directory)
-
-    logger.debug('[done]')
+        logger.debug('    Using cached tag directory for %s' % fname)
+        if tree is None:  # only the directory is cached on disk
+            tree, _ = make_dir_tree(fid, directory)
+            _set_fiff_index(key, tree=tree)
 
     #   Back to the beginning
     fid.seek(0)
@@ -189,7 +323,7 @@ def show_fiff(fname, indent='    ', read_limit=np.inf, max_str=30,
     f, tree, directory = fiff_open(fname)
     # This gets set to 0 (unknown) by fiff_open, but FIFFB_ROOT probably
     # makes more sense for display
-    tree['block'] = FIFF.FIFFB_ROOT
+    tree = dict(tree, block=FIFF.FIFFB_ROOT)  # the tree may be cached
     with f as fid:
         out = _show_tree(fid, tree, indent=indent, level=0,
                          read_limit=read_limit, max_str=max_str, tag_id=tag)
@@ -8,6 +8,7 @@ from scipy import linalg
 
 from ..defaults import _handle_default
 from ..fixes import _safe_svd
+from ..parallel import parallel_func
 from ..utils import warn, logger
 
 
@@ -29,6 +30,7 @@ def _compute_eloreta(inv, lambda2, options):
                         np.allclose(inv['orient_prior']['data'], 1.))
         force_equal = True if is_loose else False
     force_equal = bool(force_equal)
+    n_jobs = options['n_jobs']
 
     # eps=1e-6, max_iter=20, force_equal=False):
     # Reassemble the gain matrix (should be fast enough)
@@ -56,9 +58,9 @@ def _compute_eloreta(inv, lambda2, options):
     W[:] = 1. if force_equal or n_orient == 1 else np.eye(n_orient)[np.newaxis]
     # Here we keep the weights normalized to roughly n_src * n_orient.
     # Not sure if there is a better way to normalize.
-    extra = ' (this make take a while)' if n_orient == 3 else ''
-    logger.info('        Fitting up to %d iterations%s...'
-                % (max_iter, extra))
+    logger.info('        Fitting up to %d iterations...' % (max_iter,))
+    parallel, p_fun, n_jobs = parallel_func(_sqrtm_sym_blocks, n_jobs,
+                                            backend='threading')
     for kk in range(max_iter):
         # Compute inverse of the weights (stabilized) and corresponding M
         M, _ = _compute_eloreta_inv(G, W, n_orient, n_nzero, lambda2,
@@ -70,33 +72,33 @@ def _compute_eloreta(inv, lambda2, options):
             W[:] = np.sqrt((np.dot(M, G) * G).sum(0))
             W /= W.sum() / n_src
         else:
-            norm = 0.
-            for ii in range(n_src):
-                sl = slice(n_orient * ii, n_orient * (ii + 1))
-                this_w, this_s = _sqrtm_sym(
-                    np.dot(np.dot(G[:, sl].T, M), G[:, sl]))
-                W[ii] = np.mean(this_s) if force_equal else this_w
-                norm += np.mean(this_s)
-            W /= norm / n_src
+            # The square roots of the n_orient x n_orient diagonal blocks of
+            # G.T @ M @ G, computed for blocks of sources in parallel
+            MG = np.dot(M, G)
+            splits = _split_sources(n_src, n_orient, n_jobs)
+            out = parallel(p_fun(G[:, sl], MG[:, sl], n_orient)
+                           for sl in splits)
+            this_w = np.concatenate([o[0] for o in out])
+            this_s = np.concatenate([o[1] for o in out])
+            W[:] = this_s if force_equal else this_w
+            W /= this_s.sum() / n_src
 
         # Check for weight convergence
         delta = (linalg.norm(W.ravel() - W_last.ravel()) /
                  linalg.norm(W_last.ravel()))
-        logger.debug('            Iteration %s / %s ...%s'
-                     % (kk + 1, max_iter, extra))
+        logger.debug('            Iteration %s / %s: delta=%0.2g'
+                     % (kk + 1, max_iter, delta))
         if delta < eps:
             logger.info('        Converged on iteration %d (%0.2g < %0.2g)'
                         % (kk, delta, eps))
             break
     else:
-        warn('eLORETA weight fitting did not converge (>= %s)' % eps)
+        warn('eLORETA weight fitting did not converge (%0.2g >= %s)'
+             % (delta, eps))
     logger.info('        Assembling eLORETA kernel and modifying inverse')
     M, W_inv = _compute_eloreta_inv(G, W, n_orient, n_nzero, lambda2,
                                     force_equal)
-    K = np.zeros((n_src * n_orient, n_chan))
-    for ii in range(n_src):
-        sl = slice(n_orient * ii, n_orient * (ii + 1))
-        K[sl] = np.dot(W_inv[ii], np.dot(G.T[sl], M))
+    K = _weight_sources(W_inv, np.dot(G.T, M), n_orient)
     # Avoid the scaling to get to currents
     K /= np.sqrt(inv['source_cov']['data'])[:, np.newaxis]
     # eLORETA seems to break our simple relationships with noisenorm etc.,
@@ -111,25 +113,21 @@ def _compute_eloreta(inv, lambda2, options):
 
 def _compute_eloreta_inv(G, W, n_orient, n_nzero, lambda2, force_equal):
     """Invert weights and compute M."""
-    W_inv = np.empty_like(W)
-    n_src = W_inv.shape[0]
     if n_orient == 1 or force_equal:
-        W_inv[:] = 1. / W
+        W_inv = 1. / W
+        W_inv_sqrt = np.sqrt(W_inv)
     else:
-        for ii in range(n_src):
-            # Here we use a single-precision-suitable `rcond` (given our
-            # 3x3 matrix size) because the inv could be saved in single
-            # precision.
-            W_inv[ii] = linalg.pinv2(W[ii], rcond=1e-7)
-
-    # Weight the gain matrix
-    W_inv_Gt = np.empty_like(G).T
-    for ii in range(n_src):
-        sl = slice(n_orient * ii, n_orient * (ii + 1))
-        W_inv_Gt[sl, :] = np.dot(W_inv[ii], G[:, sl].T)
+        # Here we use a single-precision-suitable `rcond` (given our
+        # 3x3 matrix size) because the inv could be saved in single
+        # precision.
+        W_inv, W_inv_sqrt = _pinv_sym(W, rcond=1e-7)
+
+    # Weight the gain matrix, G @ W_inv @ G.T is computed as B @ B.T because
+    # the symmetric product takes half the operations
+    B = _weight_sources(W_inv_sqrt, G.T, n_orient).T
 
     # Compute the inverse, normalizing by the trace
-    G_W_inv_Gt = np.dot(G, W_inv_Gt)
+    G_W_inv_Gt = np.dot(B, B.T)
     G_W_inv_Gt *= n_nzero / np.trace(G_W_inv_Gt)
     u, s, v = linalg.svd(G_W_inv_Gt)
     s = s / (s ** 2 + lambda2)
@@ -137,12 +135,48 @@ def _compute_eloreta_inv(G, W, n_orient, n_nzero, lambda2, force_equal):
     return M, W_inv
 
 
+def _weight_sources(W, A, n_orient):
+    """Multiply the n_orient rows of A of each source by its weight."""
+    if W.ndim == 1:
+        return np.repeat(W, n_orient)[:, np.newaxis] * A
+    A = A.reshape(len(W), n_orient, -1)
+    return np.einsum('iab,ibc->iac', W, A).reshape(len(W) * n_orient, -1)
+
+
+def _split_sources(n_src, n_orient, n_jobs):
+    """Split the columns of the gain matrix into blocks of whole sources."""
+    bounds = np.linspace(0, n_src, n_jobs + 1).astype(int) * n_orient
+    return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop > start]
+
+
+def _sqrtm_sym_blocks(G, MG, n_orient):
+    """Compute the square roots of the source blocks of G.T @ M @ G."""
+    n_chan = G.shape[0]
+    G = G.reshape(n_chan, -1, n_orient)
+    MG = MG.reshape(n_chan, -1, n_orient)
+    return _sqrtm_sym(np.einsum('cia,cib->iab', G, MG))
+
+
 def _sqrtm_sym(C):
-    """Compute the square root of a symmetric matrix."""
-    # Same as linalg.sqrtm(C) but faster, also yields the eigenvalues
-    s, u = linalg.eigh(C)
-    mask = s > s.max() * 1e-7
-    u = u[:, mask]
-    s = np.sqrt(s[mask])
-    a = np.dot(s * u, u.T)
-    return a, s
+    """Compute the square roots of a stack of symmetric matrices."""
+    # Same as linalg.sqrtm(C) but faster, also yields the mean of the
+    # square roots of the (non-negligible) eigenvalues
+    s, u = np.linalg.eigh(C)
+    mask = s > s.max(axis=-1, keepdims=True) * 1e-7
+    s = np.sqrt(np.where(mask, s, 0.))
+    a = np.einsum('...ij,...j,...kj->...ik', u, s, u)
+    return a, s.sum(-1) / mask.sum(-1)
+
+
+def _pinv_sym(C, rcond):
+    """Compute the pseudo-inverses of a stack of symmetric PSD matrices.
+
+    The square roots of the pseudo-inverses are returned as well.
+    """
+    s, u = np.linalg.eigh(C)
+    mask = s > s.max(axis=-1, keepdims=True) * rcond
+    s_inv = np.zeros_like(s)
+    s_inv[mask] = 1. / s[mask]
+    return (np.einsum('...ij,...j,...kj->...ik', u, s_inv, u),
+            np.einsum('...ij,...j,...kj->...ik', u, np.sqrt(s_inv), u))
@@ -35,7 +35,19 @@ from ..source_space import (_read_source_spaces_from_tree,
                             _write_source_spaces_to_fid, label_src_vertno_sel)
 from ..transforms import _ensure_trans, transform_surface_to
 from ..source_estimate import _make_stc, _get_src_type
-from ..utils import check_fname, logger, verbose, warn
+from ..utils import (check_fname, logger, verbose, warn, object_hash,
+                     _LRUCache)
+
+# Maximum number of source values computed at once from a block of epochs
+_INVERSE_BATCH_SIZE = 1e7
+
+# Number and total size in bytes of the kernels kept by each operator
+_INVERSE_CACHE_SIZE = 4
+_INVERSE_CACHE_NBYTES = 5e8
+
+# Fields of the prepared inverse operator used after assembling the kernel
+_INVERSE_APPLY_KEYS = ('noise_cov', 'sing', 'reginv', 'whitener', 'proj',
+                       'eigen_fields', 'colorer')
 
 
 class InverseOperator(dict):
@@ -45,6 +57,12 @@ class InverseOperator(dict):
         """Return a copy of the InverseOperator."""
         return InverseOperator(deepcopy(self))
 
+    def __getstate__(self):  # noqa: D105
+        """Do not copy or pickle the cache of prepared kernels."""
+        state = self.__dict__.copy()
+        state.pop('_kernel_cache', None)
+        return state
+
     def __repr__(self):  # noqa: D105
         """Summarize inverse info instead of printing all."""
         entr = '<InverseOperator'
@@ -490,6 +508,49 @@ def _check_or_prepare(inv, nave, lambda2, method, method_params, prepared):
     return inv
 
 
+def _prepare_kernel(inverse_operator, nave, lambda2, method, method_params,
+                    prepared, label, pick_ori):
+    """Prepare the inverse operator and assemble its kernel.
+
+    The kernels are cached on the inverse operator, so that applying it
+    repeatedly with the same parameters (e.g., to several conditions) only
+    applies the kernel. The cached kernels are read-only, and only the
+    fields of the prepared operator that are used afterwards are kept.
+    """
+    cache = None
+    if isinstance(inverse_operator, InverseOperator):
+        cache = inverse_operator.__dict__.get('_kernel_cache')
+        if cache is None:
+            cache = _LRUCache(_INVERSE_CACHE_SIZE, _INVERSE_CACHE_NBYTES,
+                              config='MNE_INVERSE_CACHE_SIZE')
+            inverse_operator._kernel_cache = cache
+    if cache is None or cache.max_size <= 0:
+        inv = _check_or_prepare(inverse_operator, nave, lambda2, method,
+                                method_params, prepared)
+        return (inv,) + _assemble_kernel(inv, label, method, pick_ori)
+    if prepared:  # nave and lambda2 are already applied
+        prep_key = (True, method)
+    else:
+        prep_key = (False, float(nave), float(lambda2), method, method_params)
+    src_sel = None
+    if label is not None:
+        src_sel = label_src_vertno_sel(label, inverse_operator['src'])[1]
+    key = object_hash((prep_key, src_sel, pick_ori))
+    out = cache.get(key)
+    if out is None:
+        inv = _check_or_prepare(inverse_operator, nave, lambda2, method,
+                                method_params, prepared)
+        out = _assemble_kernel(inv, label, method, pick_ori)
+        for x in out[:2]:
+            if x is not None:
+                x.flags.writeable = False
+        out = (dict((k, inv[k]) for k in _INVERSE_APPLY_KEYS),) + out
+        cache.set(key, out)
+    else:
+        logger.info('    Using the cached kernel')
+    return out
+
+
 @verbose
 def prepare_inverse_operator(orig, nave, lambda2, method='dSPM',
                              method_params=None, verbose=None):
@@ -887,6 +948,11 @@ def apply_inverse(evoked, inverse_operator, lambda2=1. / 9., method="dSPM",
             location equal. The default is None, which means ``True`` for
             loose-orientation inverses and ``False`` for free- and
             fixed-orientation inverses. See below.
+        'n_jobs' : int
+            The number of threads used to update the weights of free- and
+            loose-orientation inverses (default 1). -1 uses all CPUs.
+
+            .. versionadded:: 0.17
 
     The eLORETA paper [4]_ defines how to compute inverses for fixed- and
     free-orientation inverses. In the free orientation case, the X/Y/Z
@@ -907,6 +973,17 @@ def apply_inverse(evoked, inverse_operator, lambda2=1. / 9., method="dSPM",
     and ``force_equal=False`` for free orientation inverses. This is the
     behavior used when the parameter ``force_equal=None`` (default behavior).
 
+    The kernel of the prepared inverse operator is cached on
+    ``inverse_operator`` for the last few combinations of ``nave``,
+    ``lambda2``, ``method``, ``method_params``, ``label`` and ``pick_ori``,
+    so that applying the same operator again (e.g., to several conditions,
+    or through :func:`apply_inverse_raw` and :func:`apply_inverse_epochs`)
+    only multiplies the data with the kernel. The number of cached kernels
+    can be set with the ``MNE_INVERSE_CACHE_SIZE`` config value (default 4,
+    0 disables the cache), and their total size is limited to 500 MB.
+    Modifying ``inverse_operator`` in place does not invalidate the cache,
+    so modify a copy of it instead.
+
     References
     ----------
     .. [1] Hamalainen M S and Ilmoniemi R. Interpreting magnetic fields of
@@ -934,8 +1011,9 @@ def apply_inverse(evoked, inverse_operator, lambda2=1. / 9., method="dSPM",
 
     _check_ch_names(inverse_operator, evoked.info)
 
-    inv = _check_or_prepare(inverse_operator, nave, lambda2, method,
-                            method_params, prepared)
+    inv, K, noise_norm, vertno, source_nn = _prepare_kernel(
+        inverse_operator, nave, lambda2, method, method_params, prepared,
+        label, pick_ori)
 
     #
     #   Pick the correct channels from the data
@@ -944,8 +1022,6 @@ def apply_inverse(evoked, inverse_operator, lambda2=1. / 9., method="dSPM",
     logger.info('Applying inverse operator to "%s"...' % (evoked.comment,))
     logger.info('    Picked %d channels from the data' % len(sel))
     logger.info('    Computing inverse...')
-    K, noise_norm, vertno, source_nn = _assemble_kernel(inv, label, method,
-                                                        pick_ori)
     sol = np.dot(K, evoked.data[sel])  # apply imaging kernel
     logger.info('    Computing residual...')
     # x̂(t) = G ĵ(t) = C ** 1/2 U Π w(t)
@@ -1047,7 +1123,10 @@ def apply_inverse_raw(raw, inverse_operator, lambda2, method="dSPM",
     Returns
     -------
     stc : SourceEstimate | VectorSourceEstimate | VolSourceEstimate
-        The source estimates.
+        The source estimates. For linear inverse solutions (fixed
+        orientations or ``pick_ori='normal'``) with fewer channels than
+        sources, the source estimate stores the imaging kernel and the
+        sensor data, and ``stc.data`` is only computed when accessed.
 
     See Also
     --------
@@ -1062,8 +1141,9 @@ def apply_inverse_raw(raw, inverse_operator, lambda2, method="dSPM",
     #
     #   Set up the inverse according to the parameters
     #
-    inv = _check_or_prepare(inverse_operator, nave, lambda2, method,
-                            method_params, prepared)
+    inv, K, noise_norm, vertno, source_nn = _prepare_kernel(
+        inverse_operator, nave, lambda2, method, method_params, prepared,
+        label, pick_ori)
 
     #
     #   Pick the correct channels from the data
@@ -1078,9 +1158,6 @@ def apply_inverse_raw(raw, inverse_operator, lambda2, method="dSPM",
     if time_func is not None:
         data = time_func(data)
 
-    K, noise_norm, vertno, source_nn = _assemble_kernel(inv, label, method,
-                                                        pick_ori)
-
     is_free_ori = (inverse_operator['source_ori'] ==
                    FIFF.FIFFV_MNE_FREE_ORI and pick_ori != 'normal')
 
@@ -1104,6 +1181,13 @@ def apply_inverse_raw(raw, inverse_operator, lambda2, method="dSPM",
 
             logger.info('        segment %d / %d done..'
                         % (pos / buffer_size + 1, n_seg))
+    elif not is_free_ori and len(sel) < K.shape[0]:
+        # Linear inverse: delayed computation, the solution is only computed
+        # when (and where) it is needed
+        if noise_norm is not None:
+            K = K * noise_norm
+            noise_norm = None
+        sol = (K, data)
     else:
         sol = np.dot(K, data)
         if is_free_ori and pick_ori != 'vector':
@@ -1130,8 +1214,13 @@ def apply_inverse_raw(raw, inverse_operator, lambda2, method="dSPM",
 def _apply_inverse_epochs_gen(epochs, inverse_operator, lambda2, method='dSPM',
                               label=None, nave=1, pick_ori=None,
                               prepared=False, method_params=None,
-                              verbose=None):
-    """Generate inverse solutions for epochs. Used in apply_inverse_epochs."""
+                              stack=False, verbose=None):
+    """Generate inverse solutions for epochs. Used in apply_inverse_epochs.
+
+    The kernel is applied to blocks of epochs at once. If stack is True, the
+    data of the source estimates are views of a single array of shape
+    (n_epochs, n_sources, n_times).
+    """
     _check_method(method)
     _check_ori(pick_ori, inverse_operator['source_ori'])
     _check_ch_names(inverse_operator, epochs.info)
@@ -1139,8 +1228,9 @@ def _apply_inverse_epochs_gen(epochs, inverse_operator, lambda2, method='dSPM',
     #
     #   Set up the inverse according to the parameters
     #
-    inv = _check_or_prepare(inverse_operator, nave, lambda2, method,
-                            method_params, prepared)
+    inv, K, noise_norm, vertno, source_nn = _prepare_kernel(
+        inverse_operator, nave, lambda2, method, method_params, prepared,
+        label, pick_ori)
 
     #
     #   Pick the correct channels from the data
@@ -1148,8 +1238,6 @@ def _apply_inverse_epochs_gen(epochs, inverse_operator, lambda2, method='dSPM',
     sel = _pick_channels_inverse_operator(epochs.ch_names, inv)
     logger.info('Picked %d channels from the data' % len(sel))
     logger.info('Computing inverse...')
-    K, noise_norm, vertno, source_nn = _assemble_kernel(inv, label, method,
-                                                        pick_ori)
 
     tstep = 1.0 / epochs.info['sfreq']
     tmin = epochs.times[0]
@@ -1162,38 +1250,66 @@ def _apply_inverse_epochs_gen(epochs, inverse_operator, lambda2, method='dSPM',
 
     if not is_free_ori and noise_norm is not None:
         # premultiply kernel with noise normalization
-        K *= noise_norm
+        K = K * noise_norm
 
     subject = _subject_from_inverse(inverse_operator)
-    for k, e in enumerate(epochs):
-        logger.info('Processing epoch : %d' % (k + 1))
-        if is_free_ori:
-            # Compute solution and combine current components (non-linear)
-            sol = np.dot(K, e[sel])  # apply imaging kernel
-
-            logger.info('combining the current components...')
-            if pick_ori != 'vector':
-                sol = combine_xyz(sol)
-
-            if noise_norm is not None:
-                sol *= noise_norm
+    src_type = _get_src_type(inverse_operator['src'], vertno)
+    vector = pick_ori == 'vector'
+    n_times = len(epochs.times)
+    n_batch = max(int(_INVERSE_BATCH_SIZE // (K.shape[0] * n_times)), 1)
+    blocks = list()  # the solutions of all epochs, if stacked
+    n_done = 0
+    for block in _iter_epochs_blocks(epochs, n_batch):
+        logger.info('Processing epochs : %d-%d'
+                    % (n_done + 1, n_done + len(block)))
+        block = block[:, sel]
+        if not is_free_ori and len(sel) < K.shape[0]:
+            # Linear inverse: delayed computation, all epochs share the kernel
+            sols = [(K, e) for e in block]
         else:
-            # Linear inverse: do computation here or delayed
-            if len(sel) < K.shape[1]:
-                sol = (K, e[sel])
+            # Apply imaging kernel to the epochs side by side, so that the
+            # current components of all epochs are combined at once
+            sol = np.dot(K, np.hstack(block))
+            if is_free_ori:
+                if not vector:
+                    sol = combine_xyz(sol)
+                if noise_norm is not None:
+                    sol *= noise_norm
+            sol = sol.reshape(len(sol), len(block), n_times).transpose(1, 0, 2)
+            if stack and not vector:
+                # the number of good epochs is only known once all are read
+                blocks.append(sol)
+                sols = list()
             else:
-                sol = np.dot(K, e[sel])
+                sols = np.ascontiguousarray(sol)
 
-        src_type = _get_src_type(inverse_operator['src'], vertno)
-        stc = _make_stc(sol, vertno, tmin=tmin, tstep=tstep, subject=subject,
-                        vector=(pick_ori == 'vector'), source_nn=source_nn,
-                        src_type=src_type)
+        for sol in sols:
+            yield _make_stc(sol, vertno, tmin=tmin, tstep=tstep,
+                            subject=subject, vector=vector,
+                            source_nn=source_nn, src_type=src_type)
+        n_done += len(block)
 
-        yield stc
+    if len(blocks) > 0:
+        for sol in np.concatenate(blocks):
+            yield _make_stc(sol, vertno, tmin=tmin, tstep=tstep,
+                            subject=subject, vector=vector,
+                            source_nn=source_nn, src_type=src_type)
 
     logger.info('[done]')
 
 
+def _iter_epochs_blocks(epochs, n_batch):
+    """Iterate over stacked blocks of at most n_batch epochs."""
+    block = list()
+    for epoch in epochs:
+        block.append(epoch)
+        if len(block) == n_batch:
+            yield np.array(block)
+            block = list()
+    if len(block) > 0:
+        yield np.array(block)
+
+
 @verbose
 def apply_inverse_epochs(epochs, inverse_operator, lambda2, method="dSPM",
                          label=None, nave=1, pick_ori=None,
@@ -1241,7 +1357,14 @@ def apply_inverse_epochs(epochs, inverse_operator, lambda2, method="dSPM",
     Returns
     -------
     stc : list of (SourceEstimate | VectorSourceEstimate | VolSourceEstimate)
-        The source estimates for all epochs.
+        The source estimates for all epochs. For linear inverse solutions
+        (fixed orientations or ``pick_ori='normal'``) with fewer channels
+        than sources, each source estimate stores the sensor data of its
+        epoch and the imaging kernel, which is shared by all epochs, and
+        ``stc.data`` is only computed when accessed. Otherwise, unless
+        ``return_generator`` is True or ``pick_ori='vector'``, their data are
+        views of a single array of shape (n_epochs, n_sources, n_times),
+        which can be obtained with ``stcs[0].data.base``.
 
     See Also
     --------
@@ -1251,7 +1374,7 @@ def apply_inverse_epochs(epochs, inverse_operator, lambda2, method="dSPM",
     stcs = _apply_inverse_epochs_gen(
         epochs, inverse_operator, lambda2, method=method, label=label,
         nave=nave, pick_ori=pick_ori, verbose=verbose, prepared=prepared,
-        method_params=method_params)
+        method_params=method_params, stack=not return_generator)
 
     if not return_generator:
         # return a list
@@ -413,6 +413,10 @@ def test_apply_inverse_sphere():
     # assert zero localization bias
     assert_array_equal(np.argmax(stc.data, axis=0),
                        np.repeat(np.arange(101), 3))
+    # fitting the weights with threads gives the same solution
+    stc_threads = apply_inverse(evoked, inv, method='eLORETA',
+                                method_params=dict(eps=1e-2, n_jobs=2))
+    assert_allclose(stc_threads.data, stc.data)
 
 
 @pytest.mark.slowtest
@@ -533,6 +537,47 @@ def test_inverse_residual():
         apply_inverse(evoked, inv, method="eLORETA", return_residual=True)
 
 
+@testing.requires_testing_data
+def test_inverse_cache(monkeypatch):
+    """Test caching of prepared inverse operators and kernels."""
+    evoked = _get_evoked()
+    inv = read_inverse_operator(fname_inv)
+    label = read_label(fname_label % 'Aud-lh')
+    stcs = dict()
+    for method in ('MNE', 'dSPM'):
+        for kwargs in (dict(), dict(label=label, pick_ori='normal')):
+            key = (method, len(kwargs))
+            stcs[key] = apply_inverse(evoked, inv, lambda2, method, **kwargs)
+            with catch_logging() as log:
+                stc = apply_inverse(evoked, inv, lambda2, method,
+                                    verbose=True, **kwargs)
+            log = log.getvalue()
+            assert 'Using the cached kernel' in log
+            assert 'Preparing the inverse operator' not in log
+            assert_allclose(stc.data, stcs[key].data)
+    assert inv._kernel_cache.info()['size'] == 4
+    # only the parts of the prepared operators used afterwards are cached
+    for value, _ in inv._kernel_cache._data.values():
+        assert 'src' not in value[0] and 'eigen_leads' not in value[0]
+    # a different number of averages needs a new kernel, the least
+    # recently used one is evicted
+    evoked.nave = 2 * evoked.nave
+    stc = apply_inverse(evoked, inv, lambda2, 'dSPM')
+    assert inv._kernel_cache.info()['size'] == 4
+    evoked.nave = evoked.nave // 2
+    # copies get their own cache
+    inv_copy = inv.copy()
+    assert not hasattr(inv_copy, '_kernel_cache')
+    stc = apply_inverse(evoked, inv_copy, lambda2, 'dSPM')
+    assert_allclose(stc.data, stcs[('dSPM', 0)].data)
+    # the cache can be disabled
+    monkeypatch.setenv('MNE_INVERSE_CACHE_SIZE', '0')
+    inv = read_inverse_operator(fname_inv)
+    stc = apply_inverse(evoked, inv, lambda2, 'dSPM')
+    assert_allclose(stc.data, stcs[('dSPM', 0)].data)
+    assert inv._kernel_cache.info()['size'] == 0
+
+
 @testing.requires_testing_data
 def test_make_inverse_operator_fixed():
     """Test MNE inverse computation (fixed orientation)."""
@@ -885,6 +930,56 @@ def test_apply_mne_inverse_epochs():
     assert_array_almost_equal(stcs_rh[0].data, label_stc.data)
 
 
+@testing.requires_testing_data
+def test_apply_inverse_epochs_batched(monkeypatch):
+    """Test applying the inverse to blocks of epochs at once."""
+    from mne.minimum_norm import inverse
+    inverse_operator = read_inverse_operator(fname_full)
+    raw = read_raw_fif(fname_raw)
+    picks = pick_types(raw.info, meg=True, exclude='bads')
+    events = read_events(fname_event)[:15]
+    # not preloaded, so that the bad epochs are only known while reading
+    epochs = Epochs(raw, events, None, -0.2, 0.2, picks=picks, preload=False,
+                    reject=dict(grad=4000e-13, mag=4e-12))
+    n_good = len(epochs.copy().drop_bad())
+    assert n_good > 3
+    inverse_operator = prepare_inverse_operator(inverse_operator, nave=1,
+                                                lambda2=lambda2,
+                                                method="dSPM")
+    for pick_ori in [None, "normal", "vector"]:
+        kwargs = dict(pick_ori=pick_ori, prepared=True)
+        stcs = apply_inverse_epochs(epochs, inverse_operator, lambda2,
+                                    "dSPM", **kwargs)
+        assert len(stcs) == n_good
+        # the bad epochs are not dropped from the epochs passed in
+        assert len(epochs) == len(events)
+        if pick_ori == 'normal':
+            # all the source estimates share one kernel
+            kernel = stcs[0]._kernel
+            assert kernel is not None and kernel.shape[1] == len(picks)
+            assert all(stc._kernel is kernel for stc in stcs)
+            assert all(stc._data is None for stc in stcs)
+        for stc, epoch in zip(stcs, epochs.iter_evoked()):
+            stc_evoked = apply_inverse(epoch, inverse_operator, lambda2,
+                                       "dSPM", **kwargs)
+            assert_allclose(stc.data, stc_evoked.data, rtol=1e-7)
+        if pick_ori is None:
+            # all the source estimates share one stacked array
+            data = stcs[0].data.base
+            assert data.shape == (len(stcs),) + stcs[0].data.shape
+            assert all(stc.data.base is data for stc in stcs)
+            assert_array_equal(data, [stc.data for stc in stcs])
+        # blocks of two epochs, as a generator
+        with monkeypatch.context() as m:
+            m.setattr(inverse, '_INVERSE_BATCH_SIZE',
+                      2 * stcs[0].data.size * (3 if pick_ori is None else 1))
+            stcs_gen = apply_inverse_epochs(epochs, inverse_operator, lambda2,
+                                            "dSPM", return_generator=True,
+                                            **kwargs)
+            for stc, stc_gen in zip(stcs, stcs_gen):
+                assert_allclose(stc.data, stc_gen.data, rtol=1e-7)
+
+
 @testing.requires_testing_data
 def test_make_inverse_operator_bads():
     """Test MNE inverse computation given a mismatch of bad channels."""
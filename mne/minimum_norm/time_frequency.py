@@ -15,7 +15,7 @@ from ..time_frequency.tfr import cwt, morlet
 from ..time_frequency.multitaper import (_psd_from_mt, _compute_mt_params,
                                          _psd_from_mt_adaptive, _mt_spectra)
 from ..baseline import rescale, _log_rescale
-from .inverse import (combine_xyz, _check_or_prepare, _assemble_kernel,
+from .inverse import (combine_xyz, _prepare_kernel,
                       _pick_channels_inverse_operator, _check_method,
                       _check_ori, _subject_from_inverse)
 from ..parallel import parallel_func
@@ -28,15 +28,6 @@ def _prepare_source_params(inst, inverse_operator, label=None,
                            decim=1, pca=True, pick_ori="normal",
                            prepared=False, method_params=None, verbose=None):
     """Prepare inverse operator and params for spectral / TFR analysis."""
-    inv = _check_or_prepare(inverse_operator, nave, lambda2, method,
-                            method_params, prepared)
-
-    #
-    #   Pick the correct channels from the data
-    #
-    sel = _pick_channels_inverse_operator(inst.ch_names, inv)
-    logger.info('Picked %d channels from the data' % len(sel))
-    logger.info('Computing inverse...')
     #
     #   Simple matrix multiplication followed by combination of the
     #   three current components
@@ -44,7 +35,16 @@ def _prepare_source_params(inst, inverse_operator, label=None,
     #   This does all the data transformations to compute the weights for the
     #   eigenleads
     #
-    K, noise_norm, vertno, _ = _assemble_kernel(inv, label, method, pick_ori)
+    inv, K, noise_norm, vertno, _ = _prepare_kernel(
+        inverse_operator, nave, lambda2, method, method_params, prepared,
+        label, pick_ori)
+
+    #
+    #   Pick the correct channels from the data
+    #
+    sel = _pick_channels_inverse_operator(inst.ch_names, inv)
+    logger.info('Picked %d channels from the data' % len(sel))
+    logger.info('Computing inverse...')
 
     if pca:
         U, s, Vh = linalg.svd(K, full_matrices=False)
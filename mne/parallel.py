@@ -5,9 +5,12 @@
 # License: Simplified BSD
 
 from .externals.six import string_types
+from functools import partial
 import logging
 import os
 
+import numpy as np
+
 from . import get_config
 from .utils import logger, verbose, warn, ProgressBar
 from .fixes import _get_args
@@ -18,9 +21,12 @@ else:
     _force_serial = None
 
 
+_BACKENDS = ('auto', 'loky', 'threading', 'shared_memory')
+
+
 @verbose
 def parallel_func(func, n_jobs, max_nbytes='auto', pre_dispatch='2 * n_jobs',
-                  total=None, verbose=None):
+                  total=None, prefer=None, backend=None, verbose=None):
     """Return parallel instance with delayed function.
 
     Util function to use joblib only if available
@@ -33,10 +39,10 @@ def parallel_func(func, n_jobs, max_nbytes='auto', pre_dispatch='2 * n_jobs',
         Number of jobs to run in parallel
     max_nbytes : int, str, or None
         Threshold on the minimum size of arrays passed to the workers that
-        triggers automated memory mapping. Can be an int in Bytes,
-        or a human-readable string, e.g., '1M' for 1 megabyte.
-        Use None to disable memmaping of large arrays. Use 'auto' to
-        use the value set using mne.set_memmap_min_size.
+        triggers automated memory mapping (or use of shared memory). Can be
+        an int in Bytes, or a human-readable string, e.g., '1M' for 1
+        megabyte. Use None to disable memmaping of large arrays. Use 'auto'
+        to use the value set using mne.set_memmap_min_size.
     pre_dispatch : int, or string, optional
         See :class:`joblib.Parallel`.
     total : int | None
@@ -44,6 +50,25 @@ def parallel_func(func, n_jobs, max_nbytes='auto', pre_dispatch='2 * n_jobs',
         jobs. This should only be used when directly iterating, not when
         using ``split_list`` or :func:`np.array_split`.
         If None (default), do not add a progress bar.
+    prefer : str | None
+        Soft hint for the ``'auto'`` backend. Use ``'threads'`` for functions
+        that spend most of their time in code that releases the GIL (e.g.,
+        NumPy/SciPy FFTs or BLAS), so that workers can operate on the
+        arrays without copying them. None (default) or ``'processes'`` uses
+        worker processes.
+    backend : str | None
+        The parallel backend to use. Can be ``'loky'`` (joblib worker
+        processes), ``'threading'`` (a thread pool, does not need joblib),
+        ``'shared_memory'`` (joblib worker processes, with arrays larger than
+        ``max_nbytes`` passed through :mod:`multiprocessing.shared_memory`
+        instead of being pickled; the workers get read-only views, and the
+        parent keeps the shared copies until the call returns), or
+        ``'auto'``, which uses threads if ``prefer='threads'`` and loky
+        otherwise. Shared memory is never chosen automatically, because
+        functions that write to their inputs would fail on the read-only
+        views; request it explicitly for functions that do not.
+        If None (default), use the ``MNE_PARALLEL_BACKEND`` config value,
+        which defaults to ``'auto'``.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more). INFO or DEBUG
@@ -59,8 +84,11 @@ def parallel_func(func, n_jobs, max_nbytes='auto', pre_dispatch='2 * n_jobs',
         Number of jobs >= 0
     """
     should_print = (logger.level <= logging.INFO)
+    backend = _check_backend(backend, prefer)
+    if n_jobs != 1 and backend == 'threading':
+        n_jobs = check_n_jobs(n_jobs)
     # for a single job, we don't need joblib
-    if n_jobs != 1:
+    if n_jobs != 1 and backend != 'threading':
         try:
             from joblib import Parallel, delayed
         except ImportError:
@@ -73,16 +101,28 @@ def parallel_func(func, n_jobs, max_nbytes='auto', pre_dispatch='2 * n_jobs',
         n_jobs = 1
         my_func = func
         parallel = list
+    elif backend == 'threading':
+        logger.debug('Using a thread pool with %d threads' % n_jobs)
+        my_func = _delayed(func)
+        parallel = partial(_thread_parallel, n_jobs)
     else:
         # check if joblib is recent enough to support memmaping
         p_args = _get_args(Parallel.__init__)
         joblib_mmap = ('temp_folder' in p_args and 'max_nbytes' in p_args)
 
         cache_dir = get_config('MNE_CACHE_DIR', None)
+        want_shm = backend == 'shared_memory'
         if isinstance(max_nbytes, string_types) and max_nbytes == 'auto':
             max_nbytes = get_config('MNE_MEMMAP_MIN_SIZE', None)
+            if max_nbytes is None and want_shm and _has_shared_memory():
+                max_nbytes = '1M'
+        use_shm = want_shm and max_nbytes is not None and \
+            _has_shared_memory()
+        if backend == 'shared_memory' and not use_shm:
+            warn('Shared memory cannot be used (it requires Python 3.8+ and '
+                 'max_nbytes not None), falling back to the loky backend.')
 
-        if max_nbytes is not None:
+        if max_nbytes is not None and not use_shm:
             if not joblib_mmap and cache_dir is not None:
                 warn('"MNE_CACHE_DIR" is set but a newer version of joblib is '
                      'needed to use the memmapping pool.')
@@ -99,14 +139,20 @@ def parallel_func(func, n_jobs, max_nbytes='auto', pre_dispatch='2 * n_jobs',
         kwargs['pre_dispatch'] = pre_dispatch
 
         if joblib_mmap:
-            if cache_dir is None:
-                max_nbytes = None  # disable memmaping
-            kwargs['temp_folder'] = cache_dir
-            kwargs['max_nbytes'] = max_nbytes
+            if cache_dir is None or use_shm:
+                kwargs['max_nbytes'] = None  # disable memmaping
+            else:
+                kwargs['temp_folder'] = cache_dir
+                kwargs['max_nbytes'] = max_nbytes
 
         n_jobs = check_n_jobs(n_jobs)
         parallel = Parallel(n_jobs, **kwargs)
         my_func = delayed(func)
+        if use_shm:
+            logger.debug('Passing arrays larger than %s to workers using '
+                         'shared memory' % (max_nbytes,))
+            parallel = partial(_shared_memory_parallel, parallel,
+                               _parse_nbytes(max_nbytes))
 
     if total is not None:
         def parallel_progress(op_iter):
@@ -118,6 +164,174 @@ def parallel_func(func, n_jobs, max_nbytes='auto', pre_dispatch='2 * n_jobs',
     return parallel_out, my_func, n_jobs
 
 
+def _check_backend(backend, prefer):
+    """Check the parallel backend and resolve thread preference."""
+    if backend is None:
+        backend = get_config('MNE_PARALLEL_BACKEND', 'auto')
+    if backend not in _BACKENDS:
+        raise ValueError('backend must be one of %s, got %r'
+                         % (_BACKENDS, backend))
+    if prefer not in (None, 'threads', 'processes'):
+        raise ValueError('prefer must be None, "threads" or "processes", '
+                         'got %r' % (prefer,))
+    if backend == 'auto' and prefer == 'threads':
+        backend = 'threading'
+    return backend
+
+
+def _parse_nbytes(nbytes):
+    """Convert a human-readable size (e.g., '1M') to a number of bytes."""
+    if isinstance(nbytes, string_types):
+        units = dict(K=1024, M=1024 ** 2, G=1024 ** 3)
+        if nbytes[-1] not in units:
+            raise ValueError('The size has to be given in kilo-, mega-, or '
+                             'gigabytes, e.g., 100K, 500M, 1G, got %s'
+                             % (nbytes,))
+        nbytes = float(nbytes[:-1]) * units[nbytes[-1]]
+    return int(nbytes)
+
+
+def _delayed(func):
+    """Wrap a function to return (func, args, kwargs) like joblib.delayed."""
+    def delayed_function(*args, **kwargs):
+        return func, args, kwargs
+    return delayed_function
+
+
+def _call(call):
+    """Call a (func, args, kwargs) tuple."""
+    func, args, kwargs = call
+    return func(*args, **kwargs)
+
+
+def _thread_parallel(n_jobs, calls):
+    """Run (func, args, kwargs) tuples in a thread pool."""
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(n_jobs)
+    try:
+        return pool.map(_call, calls)
+    finally:
+        pool.close()
+        pool.join()
+
+
+##############################################################################
+# Shared memory
+
+def _has_shared_memory():
+    """Check if multiprocessing.shared_memory is available."""
+    try:
+        from multiprocessing import shared_memory  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _is_memmap(x):
+    """Check if an array is (a view of) a :class:`numpy.memmap`."""
+    while isinstance(x, np.ndarray):
+        if isinstance(x, np.memmap):
+            return True
+        x = x.base
+    return False
+
+
+class _SharedArray(object):
+    """Reference to a read-only array stored in shared memory."""
+
+    def __init__(self, name, shape, dtype):  # noqa: D102
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing shared memory block (in a worker)."""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13, attaching registers the block
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        # the block belongs to the parent, so the tracker of the worker must
+        # not unlink it (or warn about it) when the worker exits
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _shared_memory_call(func, args, kwargs):
+    """Call a function with shared memory arrays attached as ndarrays."""
+    shms = dict()
+
+    def attach(x):
+        if not isinstance(x, _SharedArray):
+            return x
+        if x.name not in shms:
+            shms[x.name] = _attach_shared_memory(x.name)
+        x = np.ndarray(x.shape, x.dtype, buffer=shms[x.name].buf)
+        x.flags.writeable = False
+        return x
+
+    args = [attach(arg) for arg in args]
+    kwargs = dict((key, attach(val)) for key, val in kwargs.items())
+    shared = [arg for arg in list(args) + list(kwargs.values())
+              if isinstance(arg, np.ndarray) and not arg.flags.writeable]
+    out = func(*args, **kwargs)
+    out = _copy_shared(out, shared)
+    del args, kwargs, shared
+    for shm in shms.values():
+        try:
+            shm.close()
+        except BufferError:  # still referenced, released when collected
+            pass
+    return out
+
+
+def _copy_shared(out, shared):
+    """Copy the outputs that are views of shared memory arrays."""
+    if isinstance(out, np.ndarray):
+        if any(np.may_share_memory(out, x) for x in shared):
+            out = out.copy()
+    elif isinstance(out, (list, tuple)):
+        out = type(out)(_copy_shared(o, shared) for o in out)
+    return out
+
+
+def _shared_memory_parallel(parallel, max_nbytes, calls):
+    """Run joblib calls, passing large arrays through shared memory."""
+    from multiprocessing import shared_memory
+    segments = dict()  # id -> (array, shared memory, reference)
+
+    def share(x):
+        if not isinstance(x, np.ndarray) or x.nbytes < max_nbytes or \
+                x.dtype.hasobject or _is_memmap(x):
+            # memory-mapped arrays are passed by reference to their file
+            return x
+        if id(x) not in segments:
+            shm = shared_memory.SharedMemory(create=True,
+                                             size=max(x.nbytes, 1))
+            view = np.ndarray(x.shape, x.dtype, buffer=shm.buf)
+            view[:] = x
+            del view
+            # keep x alive so that its id is not reused
+            segments[id(x)] = (x, shm, _SharedArray(shm.name, x.shape,
+                                                    x.dtype))
+        return segments[id(x)][2]
+
+    def convert(calls):
+        for func, args, kwargs in calls:
+            args = tuple(share(arg) for arg in args)
+            kwargs = dict((key, share(val)) for key, val in kwargs.items())
+            yield _shared_memory_call, (func, args, kwargs), dict()
+
+    try:
+        return parallel(convert(calls))
+    finally:
+        for _, shm, _ in segments.values():
+            shm.close()
+            shm.unlink()
+
+
 def check_n_jobs(n_jobs, allow_cuda=False):
     """Check n_jobs in particular for negative values.
 
@@ -160,3 +374,37 @@ def check_n_jobs(n_jobs, allow_cuda=False):
                 n_jobs = 1
 
     return n_jobs
+
+
+def _check_n_jobs_threads(n_jobs):
+    """Parse thread specifications of the form 'threads' or 'threads:N'.
+
+    Parameters
+    ----------
+    n_jobs : int | str
+        The number of jobs. ``'threads:N'`` requests ``N`` threads, and
+        ``'threads'`` one thread per CPU.
+
+    Returns
+    -------
+    n_jobs : int | str
+        The number of threads for a thread specification, otherwise the
+        input unchanged.
+    use_threads : bool
+        Whether a thread specification was given.
+    """
+    if not isinstance(n_jobs, string_types) or \
+            not n_jobs.startswith('threads'):
+        return n_jobs, False
+    n_threads = n_jobs[len('threads'):]
+    if n_threads == '':
+        n_threads = -1
+    else:
+        try:
+            if not n_threads.startswith(':'):
+                raise ValueError
+            n_threads = int(n_threads[1:])
+        except ValueError:
+            raise ValueError('n_jobs must be "threads" or "threads:N" with N '
+                             'an integer, got %r' % (n_jobs,))
+    return check_n_jobs(n_threads), True
@@ -9,6 +9,7 @@
 from functools import partial
 from math import factorial
 from os import path as op
+import threading
 
 import numpy as np
 from scipy import linalg
@@ -29,6 +30,7 @@ from ..io.proc_history import _read_ctc
 from ..io.write import _generate_meas_id, DATE_NONE
 from ..io import _loc_to_coil_trans, _coil_trans_to_loc, BaseRaw
 from ..io.pick import pick_types, pick_info
+from ..parallel import parallel_func
 from ..utils import verbose, logger, _clean_names, warn, _time_mask, _pl
 from ..fixes import _get_args, _safe_svd, _get_sph_harm, einsum
 from ..externals.six import string_types
@@ -46,7 +48,8 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
                    st_correlation=0.98, coord_frame='head', destination=None,
                    regularize='in', ignore_ref=False, bad_condition='error',
                    head_pos=None, st_fixed=True, st_only=False, mag_scale=100.,
-                   skip_by_annotation=('edge', 'bad_acq_skip'), verbose=None):
+                   skip_by_annotation=('edge', 'bad_acq_skip'), n_jobs=1,
+                   head_pos_tol=None, verbose=None):
     u"""Apply Maxwell filter to data using multipole moments.
 
     .. warning:: Automatic bad channel detection is not currently implemented.
@@ -160,6 +163,23 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
         or :meth:`mne.io.Raw.append`, or separated during acquisition.
         To disable, provide an empty list.
 
+        .. versionadded:: 0.17
+    n_jobs : int
+        Number of threads to use to process the data windows (of duration
+        ``st_duration``, or 10 seconds when not using tSSS) in parallel.
+        The windows are independent and operate in place on the data, so
+        this does not require additional memory for copies of the data.
+
+        .. versionadded:: 0.17
+    head_pos_tol : tuple of float | None
+        Tolerance (translation in meters, rotation in degrees) under which
+        two head positions are considered identical during movement
+        compensation, in which case the SSS decomposition computed for the
+        first one is reused for the second one. This avoids recomputing
+        the decomposition for each (nearly) unchanged head position, e.g.
+        ``(1e-4, 0.1)`` for 0.1 mm and 0.1 degrees.
+        None (default) only reuses decompositions of identical positions.
+
         .. versionadded:: 0.17
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
@@ -319,6 +339,7 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
         raise ValueError('st_duration must not be None if st_only is True')
     head_pos = _check_pos(head_pos, head_frame, raw, st_fixed,
                           raw.info['sfreq'])
+    head_pos_tol = _check_pos_tol(head_pos_tol)
     _check_info(raw.info, sss=not st_only, tsss=st_duration is not None,
                 calibration=not st_only and calibration is not None,
                 ctc=not st_only and cross_talk is not None)
@@ -472,24 +493,46 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
             np.zeros(3)])
     else:
         this_pos_quat = None
-    _get_this_decomp_trans = partial(
+    _get_this_decomp_trans = _DecompCache(partial(
         _get_decomp, all_coils=all_coils,
         cal=calibration, regularize=regularize,
         exp=exp, ignore_ref=ignore_ref, coil_scale=coil_scale,
         grad_picks=grad_picks, mag_picks=mag_picks, good_picks=good_picks,
         mag_or_fine=mag_or_fine, bad_condition=bad_condition,
-        mag_scale=mag_scale)
-    S_decomp, pS_decomp, reg_moments, n_use_in = _get_this_decomp_trans(
-        info['dev_head_t'], t=0.)
-    reg_moments_0 = reg_moments.copy()
+        mag_scale=mag_scale), head_pos_tol)
+    decomp_0 = _get_this_decomp_trans(info['dev_head_t'], t=0.)
+    reg_moments_0 = decomp_0[2].copy()
+    # Figure out which positions to use in each block. The first interval of
+    # a block reuses the last transform of the previous block, so keep track
+    # of it here to let the blocks be processed independently
+    t_s_s_q_as, start_trans = list(), list()
+    last_trans = info['dev_head_t']
+    for start, stop in zip(starts, stops):
+        t_s_s_q_a = _trans_starts_stops_quats(head_pos, start, stop,
+                                              this_pos_quat)
+        t_s_s_q_as.append(t_s_s_q_a)
+        start_trans.append(last_trans)
+        for trans in t_s_s_q_a[0]:
+            if trans is not None:
+                last_trans = trans
+        if not st_only or st_when == 'after':
+            this_pos_quat = t_s_s_q_a[3][-1]
+    del last_trans, this_pos_quat
     # Loop through buffer windows of data
     n_sig = int(np.floor(np.log10(max(len(starts), 0)))) + 1
     logger.info('    Processing %s data chunk%s' % (len(starts), _pl(starts)))
-    for ii, (start, stop) in enumerate(zip(starts, stops)):
+
+    def _process_block(ii, decomp):
+        """Maxwell filter one block of data in place."""
+        start, stop = starts[ii], stops[ii]
+        t_s_s_q_a = t_s_s_q_as[ii]
         tsss_valid = (stop - start) >= st_duration
         rel_times = raw_sss.times[start:stop]
         t_str = '%8.3f - %8.3f sec' % tuple(rel_times[[0, -1]])
         t_str += ('(#%d/%d)' % (ii + 1, len(starts))).rjust(2 * n_sig + 5)
+        if decomp is None:  # transform at the start of the block
+            decomp = _get_this_decomp_trans(start_trans[ii], t=rel_times[0])
+        S_decomp, pS_decomp, reg_moments, n_use_in = decomp
 
         # Get original data
         orig_data = raw_sss._data[meg_picks[good_picks], start:stop]
@@ -500,10 +543,6 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
         if cross_talk is not None:
             orig_data = ctc.dot(orig_data)
         out_pos_data = np.empty((len(pos_picks), stop - start))
-
-        # Figure out which positions to use
-        t_s_s_q_a = _trans_starts_stops_quats(head_pos, start, stop,
-                                              this_pos_quat)
         n_positions = len(t_s_s_q_a[0])
 
         # Set up post-tSSS or do pre-tSSS
@@ -540,8 +579,9 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
                 # first position in this interval is the same as last of the
                 # previous interval)
                 if trans is not None:
-                    S_decomp, pS_decomp, reg_moments, n_use_in = \
-                        _get_this_decomp_trans(trans, t=rel_times[rel_start])
+                    decomp = _get_this_decomp_trans(
+                        trans, t=rel_times[rel_start])
+                    S_decomp, pS_decomp, reg_moments, n_use_in = decomp
 
                 # Determine multipole moments for this interval
                 mm_in = np.dot(pS_decomp[:n_use_in],
@@ -577,6 +617,23 @@ def maxwell_filter(raw, origin='auto', int_order=8, ext_order=3,
                         % (n_positions, _pl(n_positions), t_str))
         raw_sss._data[meg_picks, start:stop] = out_meg_data
         raw_sss._data[pos_picks, start:stop] = out_pos_data
+        return decomp
+
+    # The blocks write to disjoint parts of the data and spend most of
+    # their time in BLAS calls, so threads can process them in place
+    parallel, p_fun, n_jobs = parallel_func(_process_block, n_jobs,
+                                            backend='threading')
+    if n_jobs == 1:
+        decomp = decomp_0
+        for ii in range(len(starts)):
+            decomp = _process_block(ii, decomp)
+    else:
+        parallel(p_fun(ii, None) for ii in range(len(starts)))
+    if _get_this_decomp_trans.n_hits > 0:
+        logger.info('    Reused SSS decompositions for %d/%d head positions'
+                    % (_get_this_decomp_trans.n_hits,
+                       _get_this_decomp_trans.n_hits +
+                       _get_this_decomp_trans.n_misses))
 
     # Update info
     if not st_only:
@@ -837,6 +894,69 @@ def _check_pos(pos, head_frame, raw, st_fixed, sfreq):
     return pos
 
 
+def _check_pos_tol(pos_tol):
+    """Check the head position tolerance."""
+    if pos_tol is None:
+        return np.zeros(2)
+    out = np.array(pos_tol, float)
+    if out.shape != (2,) or not (out >= 0).all():
+        raise ValueError('head_pos_tol must be None or a tuple of two '
+                         'non-negative floats (translation in m, rotation '
+                         'in degrees), got %s' % (pos_tol,))
+    return out
+
+
+class _DecompCache(object):
+    """Reuse the SSS decompositions of (nearly) identical head positions."""
+
+    def __init__(self, get_decomp, pos_tol, max_size=100):
+        self._get_decomp = get_decomp
+        self._pos_tol = pos_tol
+        self._max_size = max_size
+        self._entries = list()  # most recent last
+        self._lock = threading.Lock()
+        self.n_hits = self.n_misses = 0
+
+    def _match(self, trans):
+        """Find the cached decomposition of a close enough transform."""
+        for other, t, decomp in self._entries[::-1]:
+            if trans is None or other is None:
+                if trans is other:
+                    return t, decomp
+                continue
+            if np.array_equal(trans, other):
+                return t, decomp
+            dist = np.sqrt(np.sum(_sq(trans[:3, 3] - other[:3, 3])))
+            if dist > self._pos_tol[0]:
+                continue
+            cos = (np.trace(np.dot(trans[:3, :3].T, other[:3, :3])) - 1) / 2.
+            angle = np.rad2deg(np.arccos(np.clip(cos, -1., 1.)))
+            if angle <= self._pos_tol[1]:
+                return t, decomp
+        return None
+
+    def __call__(self, trans, t):
+        """Get the decomposition for a transform."""
+        mat = trans['trans'] if isinstance(trans, Transform) else trans
+        with self._lock:
+            match = self._match(mat)
+            if match is not None:
+                self.n_hits += 1
+        if match is not None:
+            logger.info('        Reusing SSS decomposition from %8.3f for '
+                        '%8.3f' % (match[0], t))
+            return match[1]
+        decomp = self._get_decomp(trans, t=t)
+        for arr in decomp[:3]:
+            arr.setflags(write=False)
+        with self._lock:
+            self.n_misses += 1
+            self._entries.append((mat, t, decomp))
+            if len(self._entries) > self._max_size:
+                self._entries.pop(0)
+        return decomp
+
+
 def _get_decomp(trans, all_coils, cal, regularize, exp, ignore_ref,
                 coil_scale, grad_picks, mag_picks, good_picks, mag_or_fine,
                 bad_condition, t, mag_scale):
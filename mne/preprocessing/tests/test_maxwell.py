@@ -181,6 +181,22 @@ def test_movement_compensation():
     assert_meg_snr(raw_sss_mc, read_crop(tSSS_fname, lims),
                    0.6, 1.0, chpi_med_tol=None)
     assert_meg_snr(raw_sss_mc, raw_sss_mv, 0.6, 1.4)
+    # processing the windows in parallel gives the same result
+    raw_sss_mc_par = maxwell_filter(raw_nohpi, head_pos=head_pos,
+                                    st_duration=1., origin=mf_head_origin,
+                                    n_jobs=2)
+    raw_sss_mc = maxwell_filter(raw_nohpi, head_pos=head_pos, st_duration=1.,
+                                origin=mf_head_origin)
+    assert_allclose(raw_sss_mc_par._data, raw_sss_mc._data)
+    # reusing decompositions of nearby head positions changes little
+    with catch_logging() as log:
+        raw_sss_tol = maxwell_filter(raw_nohpi, head_pos=head_pos,
+                                     st_duration=1., origin=mf_head_origin,
+                                     head_pos_tol=(1e-3, 1.), verbose=True)
+    assert 'Reusing SSS decomposition' in log.getvalue()
+    assert_meg_snr(raw_sss_tol, raw_sss_mc, 40., 100.)
+    pytest.raises(ValueError, maxwell_filter, raw, head_pos=head_pos,
+                  head_pos_tol=(-1., 0.))
 
     # some degenerate cases
     raw_erm = read_crop(erm_fname)
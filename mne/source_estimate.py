@@ -421,6 +421,11 @@ def _make_stc(data, vertices, src_type=None, tmin=None, tstep=None,
     return stc
 
 
+def _is_scalar(a):
+    """Check if an operand is a scalar."""
+    return not isinstance(a, _BaseSourceEstimate) and np.ndim(a) == 0
+
+
 def _verify_source_estimate_compat(a, b):
     """Make sure two SourceEstimates are compatible for arith. operations."""
     compat = False
@@ -447,7 +452,11 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
         The data in source space. The data can either be a single array or
         a tuple with two arrays: "kernel" shape (n_vertices, n_sensors) and
         "sens_data" shape (n_sensors, n_times). In this case, the source
-        space data corresponds to "numpy.dot(kernel, sens_data)".
+        space data corresponds to "numpy.dot(kernel, sens_data)", which is
+        only computed when ``data`` is accessed. Cropping, selecting
+        vertices, summing over time, scaling, adding estimates that share the
+        same kernel, and extracting label time courses keep the data
+        factorized.
     vertices : array | list of two arrays
         Vertex numbers corresponding to the data.
     tmin : float
@@ -677,14 +686,24 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
         return stc
 
     def __iadd__(self, a):  # noqa: D105
-        self._remove_kernel_sens_data_()
         if isinstance(a, _BaseSourceEstimate):
             _verify_source_estimate_compat(self, a)
+            if self._shares_kernel(a):
+                self._sens_data = self._sens_data + a._sens_data
+                return self
+            self._remove_kernel_sens_data_()
             self.data += a.data
+        elif _is_scalar(a) and a == 0:
+            pass  # e.g., sum() of factorized source estimates
         else:
+            self._remove_kernel_sens_data_()
             self.data += a
         return self
 
+    def _shares_kernel(self, a):
+        """Check if both source estimates are factorized with one kernel."""
+        return self._kernel is not None and a._kernel is self._kernel
+
     def mean(self):
         """Make a summary stc file with mean over time points.
 
@@ -705,12 +724,14 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
         stc : SourceEstimate | VectorSourceEstimate
             The modified stc.
         """
-        data = self.data
-        tmax = self.tmin + self.tstep * data.shape[-1]
+        if self._kernel is not None:
+            data = (self._kernel, self._sens_data.sum(axis=-1, keepdims=True))
+        else:
+            data = self.data.sum(axis=-1, keepdims=True)
+        tmax = self.tmin + self.tstep * self.shape[-1]
         tmin = (self.tmin + tmax) / 2.
         tstep = tmax - self.tmin
-        sum_stc = self.__class__(self.data.sum(axis=-1, keepdims=True),
-                                 vertices=self.vertices, tmin=tmin,
+        sum_stc = self.__class__(data, vertices=self.vertices, tmin=tmin,
                                  tstep=tstep, subject=self.subject)
         return sum_stc
 
@@ -721,11 +742,15 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
         return stc
 
     def __isub__(self, a):  # noqa: D105
-        self._remove_kernel_sens_data_()
         if isinstance(a, _BaseSourceEstimate):
             _verify_source_estimate_compat(self, a)
+            if self._shares_kernel(a):
+                self._sens_data = self._sens_data - a._sens_data
+                return self
+            self._remove_kernel_sens_data_()
             self.data -= a.data
         else:
+            self._remove_kernel_sens_data_()
             self.data -= a
         return self
 
@@ -742,6 +767,9 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
         return self.__idiv__(a)
 
     def __idiv__(self, a):  # noqa: D105
+        if self._kernel is not None and _is_scalar(a):
+            self._sens_data = self._sens_data / a
+            return self
         self._remove_kernel_sens_data_()
         if isinstance(a, _BaseSourceEstimate):
             _verify_source_estimate_compat(self, a)
@@ -757,6 +785,9 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
         return stc
 
     def __imul__(self, a):  # noqa: D105
+        if self._kernel is not None and _is_scalar(a):
+            self._sens_data = self._sens_data * a
+            return self
         self._remove_kernel_sens_data_()
         if isinstance(a, _BaseSourceEstimate):
             _verify_source_estimate_compat(self, a)
@@ -790,8 +821,7 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
     def __neg__(self):  # noqa: D105
         """Negate the source estimate."""
         stc = self.copy()
-        stc._remove_kernel_sens_data_()
-        stc.data *= -1
+        stc *= -1
         return stc
 
     def __pos__(self):  # noqa: D105
@@ -823,7 +853,17 @@ class _BaseSourceEstimate(ToDataFrameMixin, TimeMixin):
 
     def copy(self):
         """Return copy of source estimate instance."""
-        return copy.deepcopy(self)
+        # the kernel is never modified in place, so copies can share it
+        memo = dict()
+        if self._kernel is not None:
+            memo[id(self._kernel)] = self._kernel
+        return copy.deepcopy(self, memo)
+
+    def _get_rows(self, idx):
+        """Get the data of some sources, as (kernel, sens_data) if possible."""
+        if self._kernel is not None:
+            return self._kernel[idx], self._sens_data
+        return self.data[idx]
 
     def bin(self, width, tstart=None, tstop=None, func=np.mean):
         """Return a source estimate object with data summarized over time bins.
@@ -1169,9 +1209,9 @@ class _BaseSurfaceSourceEstimate(_BaseSourceEstimate):
 
         # find data
         if label.hemi == 'rh':
-            values = self.data[idx + len(self.vertices[0])]
+            values = self._get_rows(idx + len(self.vertices[0]))
         else:
-            values = self.data[idx]
+            values = self._get_rows(idx)
 
         return vertices, values
 
@@ -1204,7 +1244,10 @@ class _BaseSurfaceSourceEstimate(_BaseSourceEstimate):
             lh_vert, lh_val = self._hemilabel_stc(label.lh)
             rh_vert, rh_val = self._hemilabel_stc(label.rh)
             vertices = [lh_vert, rh_vert]
-            values = np.vstack((lh_val, rh_val))
+            if isinstance(lh_val, tuple):  # keep the data factorized
+                values = (np.vstack((lh_val[0], rh_val[0])), lh_val[1])
+            else:
+                values = np.vstack((lh_val, rh_val))
         elif label.hemi == 'lh':
             lh_vert, values = self._hemilabel_stc(label)
             vertices = [lh_vert, np.array([], int)]
@@ -1300,7 +1343,7 @@ class _BaseSurfaceSourceEstimate(_BaseSourceEstimate):
         subject_orig = _ensure_src_subject(src_orig, subject_orig)
         data_idx, vertices = _get_morph_src_reordering(
             self.vertices, src_orig, subject_orig, self.subject, subjects_dir)
-        return self.__class__(self._data[data_idx], vertices,
+        return self.__class__(self._get_rows(data_idx), vertices,
                               self.tmin, self.tstep, subject_orig)
 
     @deprecated(_dep_str)
@@ -1394,7 +1437,11 @@ class SourceEstimate(_BaseSurfaceSourceEstimate):
         The data in source space. The data can either be a single array or
         a tuple with two arrays: "kernel" shape (n_vertices, n_sensors) and
         "sens_data" shape (n_sensors, n_times). In this case, the source
-        space data corresponds to "numpy.dot(kernel, sens_data)".
+        space data corresponds to "numpy.dot(kernel, sens_data)", which is
+        only computed when ``data`` is accessed. Cropping, selecting
+        vertices, summing over time, scaling, adding estimates that share the
+        same kernel, and extracting label time courses keep the data
+        factorized.
     vertices : list of two arrays
         Vertex numbers corresponding to the data.
     tmin : scalar
@@ -1706,7 +1753,11 @@ class VolSourceEstimate(_BaseSourceEstimate):
         The data in source space. The data can either be a single array or
         a tuple with two arrays: "kernel" shape (n_vertices, n_sensors) and
         "sens_data" shape (n_sensors, n_times). In this case, the source
-        space data corresponds to "numpy.dot(kernel, sens_data)".
+        space data corresponds to "numpy.dot(kernel, sens_data)", which is
+        only computed when ``data`` is accessed. Cropping, selecting
+        vertices, summing over time, scaling, adding estimates that share the
+        same kernel, and extracting label time courses keep the data
+        factorized.
     vertices : array
         Vertex numbers corresponding to the data.
     tmin : scalar
@@ -2078,7 +2129,11 @@ class MixedSourceEstimate(_BaseSourceEstimate):
         The data in source space. The data can either be a single array or
         a tuple with two arrays: "kernel" shape (n_vertices, n_sensors) and
         "sens_data" shape (n_sensors, n_times). In this case, the source
-        space data corresponds to "numpy.dot(kernel, sens_data)".
+        space data corresponds to "numpy.dot(kernel, sens_data)", which is
+        only computed when ``data`` is accessed. Cropping, selecting
+        vertices, summing over time, scaling, adding estimates that share the
+        same kernel, and extracting label time courses keep the data
+        factorized.
     vertices : list of arrays
         Vertex numbers corresponding to the data.
     tmin : scalar
@@ -2735,6 +2790,28 @@ def _get_label_flip(labels, label_vertidx, src):
     return label_flip
 
 
+def _label_data(stc, vertidx):
+    """Get the data of the vertices of a label."""
+    if stc._kernel is not None:
+        # only compute the rows that are needed
+        return np.dot(stc._kernel[vertidx], stc._sens_data)
+    return stc.data[vertidx, :]
+
+
+def _label_mean(stc, vertidx, flip=None):
+    """Average the (sign-flipped) data of the vertices of a label."""
+    if stc._kernel is not None:
+        # the data are linear in the kernel, so average its rows instead
+        kernel = stc._kernel[vertidx]
+        if flip is not None:
+            kernel = flip * kernel
+        return np.dot(np.mean(kernel, axis=0), stc._sens_data)
+    data = stc.data[vertidx, :]
+    if flip is not None:
+        data = flip * data
+    return np.mean(data, axis=0)
+
+
 @verbose
 def _gen_extract_label_time_course(stcs, labels, src, mode='mean',
                                    allow_empty=False, verbose=None):
@@ -2829,22 +2906,25 @@ def _gen_extract_label_time_course(stcs, labels, src, mode='mean',
                     % (n_labels, mode))
 
         # do the extraction
-        label_tc = np.zeros((n_labels, stc.data.shape[1]),
-                            dtype=stc.data.dtype)
+        if stc._kernel is not None:
+            dtype = np.result_type(stc._kernel, stc._sens_data)
+        else:
+            dtype = stc.data.dtype
+        label_tc = np.zeros((n_labels, stc.shape[1]), dtype=dtype)
         if mode == 'mean':
             for i, vertidx in enumerate(label_vertidx):
                 if vertidx is not None:
-                    label_tc[i] = np.mean(stc.data[vertidx, :], axis=0)
+                    label_tc[i] = _label_mean(stc, vertidx)
         elif mode == 'mean_flip':
             for i, (vertidx, flip) in enumerate(zip(label_vertidx,
                                                     label_flip)):
                 if vertidx is not None:
-                    label_tc[i] = np.mean(flip * stc.data[vertidx, :], axis=0)
+                    label_tc[i] = _label_mean(stc, vertidx, flip)
         elif mode == 'pca_flip':
             for i, (vertidx, flip) in enumerate(zip(label_vertidx,
                                                     label_flip)):
                 if vertidx is not None:
-                    U, s, V = linalg.svd(stc.data[vertidx, :],
+                    U, s, V = linalg.svd(_label_data(stc, vertidx),
                                          full_matrices=False)
                     # determine sign-flip
                     sign = np.sign(np.dot(U[:, 0], flip))
@@ -2856,7 +2936,8 @@ def _gen_extract_label_time_course(stcs, labels, src, mode='mean',
         elif mode == 'max':
             for i, vertidx in enumerate(label_vertidx):
                 if vertidx is not None:
-                    label_tc[i] = np.max(np.abs(stc.data[vertidx, :]), axis=0)
+                    label_tc[i] = np.max(np.abs(_label_data(stc, vertidx)),
+                                         axis=0)
         else:
             raise ValueError('%s is an invalid mode' % mode)
 
@@ -2868,7 +2949,7 @@ def _gen_extract_label_time_course(stcs, labels, src, mode='mean',
                 v2 = v1 + nv
                 v = range(v1, v2)
                 if nv != 0:
-                    label_tc[n_aparc + i] = np.mean(stc.data[v, :], axis=0)
+                    label_tc[n_aparc + i] = _label_mean(stc, v)
 
                 v1 = v2
 
@@ -10,234 +10,228 @@
 #
 # License: Simplified BSD
 
+from functools import partial
+
 import numpy as np
 from scipy import sparse
 
-from .parametric import f_oneway, ttest_1samp_no_p
-from ..parallel import parallel_func, check_n_jobs
+from .parametric import f_oneway, ttest_1samp_no_p, _ttest_1samp_no_p_signs
+from ..parallel import parallel_func, check_n_jobs, _is_memmap
 from ..utils import (split_list, logger, verbose, ProgressBar, warn, _pl,
                      check_random_state)
 from ..source_estimate import SourceEstimate
 from ..externals.six import string_types
 
+# maximum number of statistic values computed at once for batched
+# (sign-flip) permutations
+_PERM_BATCH_SIZE = 4e6
 
-def _get_clusters_spatial(s, neighbors):
-    """Form spatial clusters using neighbor lists.
-
-    This is equivalent to _get_components with n_times = 1, with a properly
-    reconfigured connectivity matrix (formed as "neighbors" list)
-    """
-    # s is a vector of spatial indices that are significant, like:
-    #     s = np.where(x_in)[0]
-    # for x_in representing a single time-instant
-    r = np.ones(s.shape, dtype=bool)
-    clusters = list()
-    next_ind = 0 if s.size > 0 else None
-    while next_ind is not None:
-        # put first point in a cluster, adjust remaining
-        t_inds = [next_ind]
-        r[next_ind] = False
-        icount = 1  # count of nodes in the current cluster
-        while icount <= len(t_inds):
-            ind = t_inds[icount - 1]
-            # look across other vertices
-            buddies = np.where(r)[0]
-            buddies = buddies[np.in1d(s[buddies], neighbors[s[ind]],
-                                      assume_unique=True)]
-            t_inds += buddies.tolist()
-            r[buddies] = False
-            icount += 1
-        # this is equivalent to np.where(r)[0] for these purposes, but it's
-        # a little bit faster. Unfortunately there's no way to tell numpy
-        # just to find the first instance (to save checking every one):
-        next_ind = np.argmax(r)
-        if next_ind == 0:
-            next_ind = None
-        clusters.append(s[t_inds])
-    return clusters
-
-
-def _reassign(check, clusters, base, num):
-    """Reassign cluster numbers."""
-    # reconfigure check matrix
-    check[check == num] = base
-    # concatenate new values into clusters array
-    clusters[base - 1] = np.concatenate((clusters[base - 1],
-                                         clusters[num - 1]))
-    clusters[num - 1] = np.array([], dtype=int)
-
-
-def _get_clusters_st_1step(keepers, neighbors):
-    """Directly calculate connectivity.
 
-    This uses knowledge that time points are
-    only connected to adjacent neighbors for data organized as time x space.
+def _get_edges(connectivity, n_tests, max_step=1):
+    """Get the undirected edges of a connectivity structure.
 
-    This algorithm time increases linearly with the number of time points,
-    compared to with the square for the standard (graph) algorithm.
+    Parameters
+    ----------
+    connectivity : sparse matrix | list
+        The connectivity. If a list, it holds the indices of the spatial
+        neighbors of each vertex, and the data are organized as time x space.
+    n_tests : int
+        The number of points to cluster.
+    max_step : int
+        For list connectivity, the maximal number of steps between time
+        points for a vertex to be connected to itself.
 
-    This algorithm creates clusters for each time point using a method more
-    efficient than the standard graph method (but otherwise equivalent), then
-    combines these clusters across time points in a reasonable way.
+    Returns
+    -------
+    edges : tuple
+        ``(indptr, indices, n_src, max_step)``, the larger neighbors of each
+        of the ``n_src`` spatial vertices in CSR format and the number of
+        time steps across which a vertex is connected to itself. They are
+        computed once so that they can be reused to label the clusters of
+        each permutation. For list connectivity the spatial edges are only
+        stored once, the edges at each time point are derived from them by
+        :func:`_active_edges`.
     """
-    n_src = len(neighbors)
-    n_times = len(keepers)
-    # start cluster numbering at 1 for diffing convenience
-    enum_offset = 1
-    check = np.zeros((n_times, n_src), dtype=int)
-    clusters = list()
-    for ii, k in enumerate(keepers):
-        c = _get_clusters_spatial(k, neighbors)
-        for ci, cl in enumerate(c):
-            check[ii, cl] = ci + enum_offset
-        enum_offset += len(c)
-        # give them the correct offsets
-        c = [cl + ii * n_src for cl in c]
-        clusters += c
-
-    # now that each cluster has been assigned a unique number, combine them
-    # by going through each time point
-    for check1, check2, k in zip(check[:-1], check[1:], keepers[:-1]):
-        # go through each one that needs reassignment
-        inds = k[check2[k] - check1[k] > 0]
-        check1_d = check1[inds]
-        n = check2[inds]
-        nexts = np.unique(n)
-        for num in nexts:
-            prevs = check1_d[n == num]
-            base = np.min(prevs)
-            for pr in np.unique(prevs[prevs != base]):
-                _reassign(check1, clusters, base, pr)
-            # reassign values
-            _reassign(check2, clusters, base, num)
-    # clean up clusters
-    clusters = [cl for cl in clusters if len(cl) > 0]
-    return clusters
-
+    if isinstance(connectivity, list):
+        n_src = len(connectivity)
+        a = np.repeat(np.arange(n_src), [len(n) for n in connectivity])
+        b = np.concatenate([np.asarray(n, int) for n in connectivity] +
+                           [np.zeros(0, int)])
+    else:
+        connectivity = connectivity.tocoo()
+        n_src, max_step = n_tests, 0
+        a, b = connectivity.row, connectivity.col
+    a, b = _unique_edges(a, b, n_src)  # sorted by a
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(a, minlength=n_src))])
+    return indptr, b, n_src, max_step
 
-def _get_clusters_st_multistep(keepers, neighbors, max_step=1):
-    """Directly calculate connectivity.
 
-    This uses knowledge that time points are
-    only connected to adjacent neighbors for data organized as time x space.
+def _active_edges(active, edges):
+    """Get the edges between the active points.
 
-    This algorithm time increases linearly with the number of time points,
-    compared to with the square for the standard (graph) algorithm.
+    Only the neighbors of the active points are looked up, so the time and
+    memory scale with the number of active points instead of the number of
+    edges of the whole (spatio-temporal) graph.
     """
-    n_src = len(neighbors)
-    n_times = len(keepers)
-    t_border = list()
-    t_border.append(0)
-    for ki, k in enumerate(keepers):
-        keepers[ki] = k + ki * n_src
-        t_border.append(t_border[ki] + len(k))
-    t_border = np.array(t_border)
-    keepers = np.concatenate(keepers)
-    v = keepers
-    t, s = divmod(v, n_src)
-
-    r = np.ones(t.shape, dtype=bool)
-    clusters = list()
-    next_ind = 0
-    inds = np.arange(t_border[0], t_border[n_times])
-    if s.size > 0:
-        while next_ind is not None:
-            # put first point in a cluster, adjust remaining
-            t_inds = [next_ind]
-            r[next_ind] = False
-            icount = 1  # count of nodes in the current cluster
-            # look for significant values at the next time point,
-            # same sensor, not placed yet, and add those
-            while icount <= len(t_inds):
-                ind = t_inds[icount - 1]
-                selves = inds[t_border[max(t[ind] - max_step, 0)]:
-                              t_border[min(t[ind] + max_step + 1, n_times)]]
-                selves = selves[r[selves]]
-                selves = selves[s[ind] == s[selves]]
-
-                # look at current time point across other vertices
-                buddies = inds[t_border[t[ind]]:t_border[t[ind] + 1]]
-                buddies = buddies[r[buddies]]
-                buddies = buddies[np.in1d(s[buddies], neighbors[s[ind]],
-                                          assume_unique=True)]
-                buddies = np.concatenate((selves, buddies))
-                t_inds += buddies.tolist()
-                r[buddies] = False
-                icount += 1
-            # this is equivalent to np.where(r)[0] for these purposes, but it's
-            # a little bit faster. Unfortunately there's no way to tell numpy
-            # just to find the first instance (to save checking every one):
-            next_ind = np.argmax(r)
-            if next_ind == 0:
-                next_ind = None
-            clusters.append(v[t_inds])
+    indptr, indices, n_src, max_step = edges
+    idx = np.flatnonzero(active)
+    v = idx % n_src
+    offsets = idx - v
+    # spatial neighbors at the same time point
+    starts = indptr[v]
+    counts = indptr[v + 1] - starts
+    n_edges = counts.sum()
+    pos = np.arange(n_edges) + np.repeat(starts - np.cumsum(counts) + counts,
+                                         counts)
+    a = [np.repeat(idx, counts)]
+    b = [indices[pos] + np.repeat(offsets, counts)]
+    # each vertex with itself across time
+    for step in range(1, max_step + 1):
+        a.append(idx)
+        b.append(idx + step * n_src)
+    a, b = np.concatenate(a), np.concatenate(b)
+    keep = b < len(active)
+    a, b = a[keep], b[keep]
+    keep = active[b]
+    return a[keep], b[keep]
+
+
+def _unique_edges(a, b, n):
+    """Remove self-loops and duplicate (undirected) edges."""
+    a, b = np.minimum(a, b).astype(np.int64), np.maximum(a, b)
+    keep = a != b
+    idx = np.unique(a[keep] * n + b[keep])
+    return idx // n, idx % n
+
+
+def _label_components(x_in, edges):
+    """Label connected components using a vectorized union-find.
+
+    Each point of ``x_in`` is labeled with the smallest index of the
+    component it belongs to, only using edges between points of ``x_in``.
+    """
+    a, b = _active_edges(x_in, edges)
+    labels = np.arange(len(x_in))
+    _union_components(labels, a, b, np.flatnonzero(x_in))
+    return labels
 
-    return clusters
 
+def _union_components(labels, a, b, idx):
+    """Merge the components joined by the edges (a, b) in place.
 
-def _get_clusters_st(x_in, neighbors, max_step=1):
-    """Choose the most efficient version."""
-    n_src = len(neighbors)
-    n_times = x_in.size // n_src
-    cl_goods = np.where(x_in)[0]
-    if len(cl_goods) > 0:
-        keepers = [np.array([], dtype=int)] * n_times
-        row, col = np.unravel_index(cl_goods, (n_times, n_src))
-        if isinstance(row, int):
-            row = [row]
-            col = [col]
-            lims = [0]
-        else:
-            order = np.argsort(row)
-            row = row[order]
-            col = col[order]
-            lims = [0] + (np.where(np.diff(row) > 0)[0] +
-                          1).tolist() + [len(row)]
-
-        for start, end in zip(lims[:-1], lims[1:]):
-            keepers[row[start]] = np.sort(col[start:end])
-        if max_step == 1:
-            return _get_clusters_st_1step(keepers, neighbors)
-        else:
-            return _get_clusters_st_multistep(keepers, neighbors,
-                                              max_step)
+    The labels of the points ``idx`` (which include all end points of the
+    edges) must be the roots of their components, and still are on return.
+    """
+    while len(a) > 0:
+        # after compression, the labels are the roots of the trees
+        lo, hi = labels[a], labels[b]
+        lo, hi = np.minimum(lo, hi), np.maximum(lo, hi)
+        keep = lo != hi
+        a, b, lo, hi = a[keep], b[keep], lo[keep], hi[keep]
+        # hook the larger root onto a smaller one (for duplicated roots one
+        # of the assignments wins, the others are handled in the next pass)
+        labels[hi] = lo
+        # compress the paths (pointer jumping)
+        while True:
+            parents = labels[labels[idx]]
+            if np.array_equal(parents, labels[idx]):
+                break
+            labels[idx] = parents
+
+
+def _get_tfce_scores(x, thresholds, tail, include, partitions, edges,
+                     h_power, e_power):
+    """Compute TFCE scores, growing the clusters as the threshold decreases.
+
+    Points and edges are added from the highest threshold down and the
+    components are merged (union-find) instead of being found from scratch
+    at each threshold. The scores are then accumulated in increasing
+    threshold order, so they are identical to the per-threshold clustering.
+    """
+    x = x.ravel()
+    include = include.ravel()
+    scores = np.zeros(x.size)
+    if len(thresholds) == 0:
+        return scores
+    # the score of each point is the sum of the h^H * e^E for each
+    # supporting section "rectangle" h x e.
+    hs = [abs(thresholds[0]) ** h_power]
+    hs += [abs(thresh - last) ** h_power
+           for thresh, last in zip(thresholds[1:], thresholds[:-1])]
+    # as values v and increasing levels, a point is above a level if v > level
+    if tail == -1:
+        directions = [(-x, -thresholds)]
+    elif tail == 1:
+        directions = [(x, thresholds)]
     else:
-        return []
-
-
-def _get_components(x_in, connectivity, return_list=True):
+        directions = [(x, thresholds), (-x, thresholds)]
+    for v, levels in directions:
+        active = np.logical_and(v > levels[0], include)
+        points = np.flatnonzero(active)
+        points = points[np.argsort(-v[points], kind='mergesort')]
+        points_neg = -v[points]
+        this_a, this_b = _active_edges(active, edges)
+        if partitions is not None:
+            keep = partitions[this_a] == partitions[this_b]
+            this_a, this_b = this_a[keep], this_b[keep]
+        edges_neg = -np.minimum(v[this_a], v[this_b])
+        order = np.argsort(edges_neg, kind='mergesort')
+        this_a, this_b, edges_neg = this_a[order], this_b[order], \
+            edges_neg[order]
+        labels = np.arange(x.size)
+        contribs = list()
+        n_points = n_edges = 0
+        for ti in range(len(levels) - 1, -1, -1):
+            # add the points and edges above this level
+            n_new = np.searchsorted(edges_neg, -levels[ti])
+            n_points = np.searchsorted(points_neg, -levels[ti])
+            _union_components(labels, this_a[n_edges:n_new],
+                              this_b[n_edges:n_new], points[:n_points])
+            n_edges = n_new
+            if n_points == 0:
+                continue
+            _, inverse, counts = np.unique(labels[points[:n_points]],
+                                           return_inverse=True,
+                                           return_counts=True)
+            # same operations as for each cluster separately
+            sizes, size_inverse = np.unique(counts, return_inverse=True)
+            values = np.array([hs[ti] * (int(size) ** e_power)
+                               for size in sizes])
+            contribs.append((n_points, values[size_inverse][inverse]))
+        for n_points, values in contribs[::-1]:
+            scores[points[:n_points]] += values
+    return scores
+
+
+def _labels_to_clusters(x_in, labels):
+    """Convert component labels to a list of index arrays."""
+    idx = np.flatnonzero(x_in)
+    roots, inverse = np.unique(labels[idx], return_inverse=True)
+    if len(idx) == 0:
+        return list(), inverse
+    order = np.argsort(inverse, kind='mergesort')
+    splits = np.flatnonzero(np.diff(inverse[order])) + 1
+    return np.split(idx[order], splits), inverse
+
+
+def _get_components(x_in, connectivity, return_list=True, edges=None):
     """Get connected components from a mask and a connectivity matrix."""
+    x_in = np.asarray(x_in).astype(bool)
     if connectivity is False:
         components = np.arange(len(x_in))
     else:
-        from scipy.sparse.csgraph import connected_components
-        mask = np.logical_and(x_in[connectivity.row], x_in[connectivity.col])
-        data = connectivity.data[mask]
-        row = connectivity.row[mask]
-        col = connectivity.col[mask]
-        shape = connectivity.shape
-        idx = np.where(x_in)[0]
-        row = np.concatenate((row, idx))
-        col = np.concatenate((col, idx))
-        data = np.concatenate((data, np.ones(len(idx), dtype=data.dtype)))
-        connectivity = sparse.coo_matrix((data, (row, col)), shape=shape)
-        _, components = connected_components(connectivity)
+        if edges is None:
+            edges = _get_edges(connectivity, len(x_in))
+        components = _label_components(x_in, edges)
     if return_list:
-        start = np.min(components)
-        stop = np.max(components)
-        comp_list = [list() for i in range(start, stop + 1, 1)]
-        mask = np.zeros(len(comp_list), dtype=bool)
-        for ii, comp in enumerate(components):
-            comp_list[comp].append(ii)
-            mask[comp] += x_in[ii]
-        clusters = [np.array(k) for k, m in zip(comp_list, mask) if m]
-        return clusters
+        return _labels_to_clusters(x_in, components)[0]
     else:
-        return components
+        return np.unique(components, return_inverse=True)[1]
 
 
 def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
-                   include=None, partitions=None, t_power=1, show_info=False):
+                   include=None, partitions=None, t_power=1, show_info=False,
+                   edges=None):
     """Find all clusters which are above/below a certain threshold.
 
     When doing a two-tailed test (tail == 0), only points with the same
@@ -278,6 +272,9 @@ def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
     show_info : bool
         If True, display information about thresholds used (for TFCE). Should
         only be done for the standard permutation.
+    edges : tuple | None
+        The edges of the connectivity from ``_get_edges``. If None, they are
+        computed from ``connectivity``.
 
     Returns
     -------
@@ -335,12 +332,28 @@ def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
     # include all points by default
     if include is None:
         include = np.ones(x.shape, dtype=bool)
+    if edges is None and (isinstance(connectivity, list) or
+                          isinstance(connectivity, sparse.spmatrix)):
+        edges = _get_edges(connectivity, x.size, max_step)
 
     if tail in [0, 1] and not np.all(np.diff(thresholds) > 0):
         raise ValueError('Thresholds must be monotonically increasing')
     if tail == -1 and not np.all(np.diff(thresholds) < 0):
         raise ValueError('Thresholds must be monotonically decreasing')
 
+    if tfce is True and connectivity is not None:
+        # grow the clusters as the threshold decreases
+        if connectivity is False:
+            edges = (np.zeros(x.size + 1, int), np.zeros(0, int), x.size, 0)
+        elif edges is None:
+            raise ValueError('Connectivity must be a sparse matrix or list')
+        elif x.ndim > 1:
+            raise Exception("Data should be 1D when using a connectivity "
+                            "to define clusters.")
+        scores = _get_tfce_scores(x, thresholds, tail, include, partitions,
+                                  edges, h_power, e_power)
+        thresholds = list()  # no need to cluster each threshold below
+
     # set these here just in case thresholds == []
     clusters = list()
     sums = np.empty(0)
@@ -360,7 +373,7 @@ def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
             if np.any(x_in):
                 out = _find_clusters_1dir_parts(x, x_in, connectivity,
                                                 max_step, partitions, t_power,
-                                                ndimage)
+                                                ndimage, edges)
                 clusters += out[0]
                 sums = np.concatenate((sums, out[1]))
         if tfce is True:
@@ -394,17 +407,17 @@ def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
                 clusters = [(clusters == ii).ravel()
                             for ii in range(len(clusters))]
         else:
-            clusters = [np.array([c]) for c in clusters]
+            clusters = list(clusters[:, np.newaxis])
         sums = scores
     return clusters, sums
 
 
 def _find_clusters_1dir_parts(x, x_in, connectivity, max_step, partitions,
-                              t_power, ndimage):
+                              t_power, ndimage, edges=None):
     """Deal with partitions, and pass the work to _find_clusters_1dir."""
     if partitions is None:
         clusters, sums = _find_clusters_1dir(x, x_in, connectivity, max_step,
-                                             t_power, ndimage)
+                                             t_power, ndimage, edges)
     else:
         # cluster each partition separately
         clusters = list()
@@ -412,14 +425,15 @@ def _find_clusters_1dir_parts(x, x_in, connectivity, max_step, partitions,
         for p in range(np.max(partitions) + 1):
             x_i = np.logical_and(x_in, partitions == p)
             out = _find_clusters_1dir(x, x_i, connectivity, max_step, t_power,
-                                      ndimage)
+                                      ndimage, edges)
             clusters += out[0]
             sums.append(out[1])
         sums = np.concatenate(sums)
     return clusters, sums
 
 
-def _find_clusters_1dir(x, x_in, connectivity, max_step, t_power, ndimage):
+def _find_clusters_1dir(x, x_in, connectivity, max_step, t_power, ndimage,
+                        edges=None):
     """Actually call the clustering algorithm."""
     if connectivity is None:
         labels, n_labels = ndimage.label(x_in)
@@ -453,17 +467,21 @@ def _find_clusters_1dir(x, x_in, connectivity, max_step, t_power, ndimage):
         if x.ndim > 1:
             raise Exception("Data should be 1D when using a connectivity "
                             "to define clusters.")
-        if isinstance(connectivity, sparse.spmatrix) or connectivity is False:
-            clusters = _get_components(x_in, connectivity)
-        elif isinstance(connectivity, list):  # use temporal adjacency
-            clusters = _get_clusters_st(x_in, connectivity, max_step)
+        if connectivity is False:
+            clusters = [np.array([c]) for c in np.flatnonzero(x_in)]
+            inverse = np.arange(len(clusters))
+        elif isinstance(connectivity, (list, sparse.spmatrix)):
+            if edges is None:
+                edges = _get_edges(connectivity, x.size, max_step)
+            clusters, inverse = _labels_to_clusters(
+                x_in, _label_components(x_in, edges))
         else:
             raise ValueError('Connectivity must be a sparse matrix or list')
-        if t_power == 1:
-            sums = np.array([np.sum(x[c]) for c in clusters])
-        else:
-            sums = np.array([np.sum(np.sign(x[c]) * np.abs(x[c]) ** t_power)
-                             for c in clusters])
+        # sum the values of each cluster directly from the labels
+        x_c = x[x_in]
+        if t_power != 1:
+            x_c = np.sign(x_c) * np.abs(x_c) ** t_power
+        sums = np.bincount(inverse, weights=x_c, minlength=len(clusters))
 
     return clusters, np.atleast_1d(sums)
 
@@ -522,10 +540,34 @@ def _setup_connectivity(connectivity, n_vertices, n_times):
     return connectivity
 
 
+def _take_rows(X, idx, start=None, stop=None):
+    """Take rows (and a range of columns) from X.
+
+    X can also be a list of arrays, indexed as if they were concatenated
+    along the first axis.
+    """
+    if not isinstance(X, list):
+        return X[idx, start:stop]
+    n_vars = len(range(X[0].shape[1])[start:stop])
+    out = np.empty((len(idx), n_vars), np.result_type(*X))
+    offset = 0
+    for x in X:
+        mask = (idx >= offset) & (idx < offset + len(x))
+        out[mask] = x[idx[mask] - offset, start:stop]
+        offset += len(x)
+    return out
+
+
 def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
                      max_step, include, partitions, t_power, orders,
-                     sample_shape, buffer_size, progress_bar):
-    n_samp, n_vars = X_full.shape
+                     sample_shape, buffer_size, progress_bar,
+                     edges=None):
+    if isinstance(X_full, list):  # memory-mapped groups (not concatenated)
+        n_vars = X_full[0].shape[1]
+        dtype = np.result_type(*X_full)
+    else:
+        n_vars = X_full.shape[1]
+        dtype = X_full.dtype
 
     if buffer_size is not None and n_vars <= buffer_size:
         buffer_size = None  # don't use buffer for few variables
@@ -535,7 +577,7 @@ def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
 
     if buffer_size is not None:
         # allocate buffer, so we don't need to allocate memory during loop
-        X_buffer = [np.empty((len(X_full[s]), buffer_size), dtype=X_full.dtype)
+        X_buffer = [np.empty((s.stop - s.start, buffer_size), dtype=dtype)
                     for s in slices]
 
     for seed_idx, order in enumerate(orders):
@@ -545,11 +587,12 @@ def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
 
         if buffer_size is None:
             # shuffle all data at once
-            X_shuffle_list = [X_full[idx, :] for idx in idx_shuffle_list]
+            X_shuffle_list = [_take_rows(X_full, idx)
+                              for idx in idx_shuffle_list]
             t_obs_surr = stat_fun(*X_shuffle_list)
         else:
             # only shuffle a small data buffer, so we need less memory
-            t_obs_surr = np.empty(n_vars, dtype=X_full.dtype)
+            t_obs_surr = np.empty(n_vars, dtype=dtype)
 
             for pos in range(0, n_vars, buffer_size):
                 # number of variables for this loop
@@ -557,8 +600,8 @@ def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
 
                 # fill buffer
                 for i, idx in enumerate(idx_shuffle_list):
-                    X_buffer[i][:, :n_var_loop] =\
-                        X_full[idx, pos: pos + n_var_loop]
+                    X_buffer[i][:, :n_var_loop] = _take_rows(
+                        X_full, idx, pos, pos + n_var_loop)
 
                 # apply stat_fun and store result
                 tmp = stat_fun(*X_buffer)
@@ -572,7 +615,7 @@ def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
         out = _find_clusters(t_obs_surr, threshold=threshold, tail=tail,
                              max_step=max_step, connectivity=connectivity,
                              partitions=partitions, include=include,
-                             t_power=t_power)
+                             t_power=t_power, edges=edges)
         perm_clusters_sums = out[1]
 
         if len(perm_clusters_sums) > 0:
@@ -585,23 +628,40 @@ def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
     return max_cluster_sums
 
 
-def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
-                           max_step, include, partitions, t_power, orders,
-                           sample_shape, buffer_size, progress_bar):
-    n_samp, n_vars = X.shape
-    assert slices is None  # should be None for the 1 sample case
-
-    if buffer_size is not None and n_vars <= buffer_size:
-        buffer_size = None  # don't use buffer for few variables
+def _get_1samp_batch_fun(stat_fun):
+    """Get a function computing stat_fun for a batch of sign flips.
 
-    # allocate space for output
-    max_cluster_sums = np.empty(len(orders), dtype=np.double)
+    Returns None if stat_fun has no batched equivalent.
+    """
+    kwargs = dict()
+    if isinstance(stat_fun, partial) and len(stat_fun.args) == 0:
+        kwargs = stat_fun.keywords or dict()
+        stat_fun = stat_fun.func
+    use_kwargs = set(kwargs) <= set(['sigma', 'method'])
+    if stat_fun is ttest_1samp_no_p and use_kwargs:
+        return partial(_ttest_1samp_no_p_signs, **kwargs)
+    return None
+
+
+def _iter_1samp_stats(X, orders, stat_fun, buffer_size):
+    """Yield the statistic of X for each sign flip in orders."""
+    n_samp, n_vars = X.shape
+    batch_fun = _get_1samp_batch_fun(stat_fun)
+    if batch_fun is not None:
+        # evaluate many sign flips at once, limiting the memory used
+        n_batch = max(int(_PERM_BATCH_SIZE // n_vars), 1)
+        for start in range(0, len(orders), n_batch):
+            signs = 2 * np.array(orders[start:start + n_batch], int) - 1
+            assert signs.shape[1] == n_samp  # guaranteed by parent
+            for t_obs_surr in batch_fun(X, signs, buffer_size=buffer_size):
+                yield t_obs_surr
+        return
 
     if buffer_size is not None:
         # allocate a buffer so we don't need to allocate memory in loop
         X_flip_buffer = np.empty((n_samp, buffer_size), dtype=X.dtype)
 
-    for seed_idx, order in enumerate(orders):
+    for order in orders:
         assert isinstance(order, np.ndarray)
         # new surrogate data with specified sign flip
         assert order.size == n_samp  # should be guaranteed by parent
@@ -610,8 +670,9 @@ def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
             raise ValueError('signs from rng must be +/- 1')
 
         if buffer_size is None:
-            # be careful about non-writable memmap (GH#1507)
-            if X.flags.writeable:
+            # be careful about non-writable memmap (GH#1507), and do not
+            # write to memory-mapped files
+            if X.flags.writeable and not _is_memmap(X):
                 X *= signs
                 # Recompute statistic on randomized data
                 t_obs_surr = stat_fun(X)
@@ -633,16 +694,33 @@ def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
                 # apply stat_fun and store result
                 tmp = stat_fun(X_flip_buffer)
                 t_obs_surr[pos: pos + n_var_loop] = tmp[:n_var_loop]
+        yield t_obs_surr
+
+
+def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
+                           max_step, include, partitions, t_power, orders,
+                           sample_shape, buffer_size, progress_bar,
+                           edges=None):
+    n_samp, n_vars = X.shape
+    assert slices is None  # should be None for the 1 sample case
+
+    if buffer_size is not None and n_vars <= buffer_size:
+        buffer_size = None  # don't use buffer for few variables
+
+    # allocate space for output
+    max_cluster_sums = np.empty(len(orders), dtype=np.double)
 
+    for seed_idx, t_obs_surr in enumerate(
+            _iter_1samp_stats(X, orders, stat_fun, buffer_size)):
         # The stat should have the same shape as the samples for no conn.
         if connectivity is None:
-            t_obs_surr.shape = sample_shape
+            t_obs_surr = t_obs_surr.reshape(sample_shape)
 
         # Find cluster on randomized stats
         out = _find_clusters(t_obs_surr, threshold=threshold, tail=tail,
                              max_step=max_step, connectivity=connectivity,
                              partitions=partitions, include=include,
-                             t_power=t_power)
+                             t_power=t_power, edges=edges)
         perm_clusters_sums = out[1]
         if len(perm_clusters_sums) > 0:
             # get max with sign info
@@ -733,6 +811,23 @@ def _get_1samp_orders(n_samples, n_permutations, tail, rng):
     return orders, n_permutations, extra
 
 
+def _stat_fun_blocks(stat_fun, X, buffer_size):
+    """Compute stat_fun in blocks of buffer_size variables."""
+    n_tests = X[0].shape[1]
+    batch_fun = _get_1samp_batch_fun(stat_fun) if len(X) == 1 else None
+    if batch_fun is not None:
+        signs = np.ones((1, X[0].shape[0]), int)
+        return batch_fun(X[0], signs, buffer_size=buffer_size)[0]
+    t_obs = None
+    for pos in range(0, n_tests, buffer_size):
+        this_t = stat_fun(*[np.asarray(x[:, pos:pos + buffer_size])
+                            for x in X])
+        if t_obs is None:
+            t_obs = np.empty(n_tests, this_t.dtype)
+        t_obs[pos:pos + buffer_size] = this_t
+    return t_obs
+
+
 def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
                               connectivity, n_jobs, seed, max_step,
                               exclude, step_down_p, t_power, out_type,
@@ -766,19 +861,28 @@ def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
     X = [np.reshape(x, (x.shape[0], -1)) for x in X]
     n_tests = X[0].shape[1]
 
+    edges = None
     if connectivity is not None and connectivity is not False:
         connectivity = _setup_connectivity(connectivity, n_tests, n_times)
+        # computed once and reused for each permutation
+        edges = _get_edges(connectivity, n_tests, max_step)
 
     if (exclude is not None) and not exclude.size == n_tests:
         raise ValueError('exclude must be the same shape as X[0]')
 
+    # memory-mapped data are processed in blocks of variables
+    out_of_core = any(_is_memmap(x) for x in X)
+
     # Step 1: Calculate t-stat for original data
     # -------------------------------------------------------------
-    t_obs = stat_fun(*X)
+    if out_of_core and buffer_size is not None:
+        t_obs = _stat_fun_blocks(stat_fun, X, buffer_size)
+    else:
+        t_obs = stat_fun(*X)
     logger.info('stat_fun(H1): min=%f max=%f' % (np.min(t_obs), np.max(t_obs)))
 
     # test if stat_fun treats variables independently
-    if buffer_size is not None:
+    if buffer_size is not None and not out_of_core:
         t_obs_buffer = np.zeros_like(t_obs)
         for pos in range(0, n_tests, buffer_size):
             t_obs_buffer[pos: pos + buffer_size] =\
@@ -808,7 +912,7 @@ def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
     out = _find_clusters(t_obs, threshold, tail, connectivity,
                          max_step=max_step, include=include,
                          partitions=partitions, t_power=t_power,
-                         show_info=True)
+                         show_info=True, edges=edges)
     clusters, cluster_stats = out
     # For TFCE, return the "adjusted" statistic instead of raw scores
     if isinstance(threshold, dict):
@@ -844,12 +948,13 @@ def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
     else:
         n_permutations = int(n_permutations)
         do_perm_func = _do_permutations
-        X_full = np.concatenate(X, axis=0)
+        # avoid loading memory-mapped data by concatenating it
+        X_full = list(X) if out_of_core else np.concatenate(X, axis=0)
         n_samples_per_condition = [x.shape[0] for x in X]
         splits_idx = np.append([0], np.cumsum(n_samples_per_condition))
         slices = [slice(splits_idx[k], splits_idx[k + 1])
                   for k in range(len(X))]
-        orders = [rng.permutation(len(X_full))
+        orders = [rng.permutation(splits_idx[-1])
                   for _ in range(n_permutations - 1)]
     del rng
     parallel, my_do_perm_func, _ = parallel_func(
@@ -882,7 +987,7 @@ def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
                 my_do_perm_func(X_full, slices, threshold, tail, connectivity,
                                 stat_fun, max_step, this_include, partitions,
                                 t_power, order, sample_shape, buffer_size,
-                                progress_bar.subset(idx))
+                                progress_bar.subset(idx), edges)
                 for idx, order in split_list(orders, n_jobs, idx=True))
         # include original (true) ordering
         if tail == -1:  # up tail
@@ -1042,6 +1147,11 @@ def permutation_cluster_test(
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+        If X is a :class:`numpy.memmap` (for multiple groups, if any of them
+        is), it is shared with the workers through its file. It is only
+        read in blocks of variables (and thus never fully loaded into
+        memory) if buffer_size is not None, in which case stat_fun must
+        treat variables independently.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -1104,7 +1214,11 @@ def permutation_cluster_1samp_test(
         the distribution.
     stat_fun : callable | None
         Function used to compute the statistical map (default None will use
-        :func:`mne.stats.ttest_1samp_no_p`).
+        :func:`mne.stats.ttest_1samp_no_p`). With
+        :func:`mne.stats.ttest_1samp_no_p` (possibly wrapped in
+        :func:`functools.partial` to set ``sigma`` or ``method``), the
+        statistic is computed for many permutations at once, which is
+        much faster.
     connectivity : sparse matrix | None | False
         Defines connectivity between features. The matrix is assumed to
         be symmetric and only the upper triangular half is used.
@@ -1158,6 +1272,11 @@ def permutation_cluster_1samp_test(
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+        If X is a :class:`numpy.memmap` (for multiple groups, if any of them
+        is), it is shared with the workers through its file. It is only
+        read in blocks of variables (and thus never fully loaded into
+        memory) if buffer_size is not None, in which case stat_fun must
+        treat variables independently.
 
     Returns
     -------
@@ -1244,7 +1363,11 @@ def spatio_temporal_cluster_1samp_test(
         the distribution.
     stat_fun : callable | None
         Function used to compute the statistical map (default None will use
-        :func:`mne.stats.ttest_1samp_no_p`).
+        :func:`mne.stats.ttest_1samp_no_p`). With
+        :func:`mne.stats.ttest_1samp_no_p` (possibly wrapped in
+        :func:`functools.partial` to set ``sigma`` or ``method``), the
+        statistic is computed for many permutations at once, which is
+        much faster.
     connectivity : sparse matrix or None
         Defines connectivity between features. The matrix is assumed to
         be symmetric and only the upper triangular half is used.
@@ -1292,6 +1415,11 @@ def spatio_temporal_cluster_1samp_test(
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+        If X is a :class:`numpy.memmap` (for multiple groups, if any of them
+        is), it is shared with the workers through its file. It is only
+        read in blocks of variables (and thus never fully loaded into
+        memory) if buffer_size is not None, in which case stat_fun must
+        treat variables independently.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -1409,6 +1537,11 @@ def spatio_temporal_cluster_test(
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+        If X is a :class:`numpy.memmap` (for multiple groups, if any of them
+        is), it is shared with the workers through its file. It is only
+        read in blocks of variables (and thus never fully loaded into
+        memory) if buffer_size is not None, in which case stat_fun must
+        treat variables independently.
 
     Returns
     -------
@@ -1479,16 +1612,9 @@ def _get_partitions_from_connectivity(connectivity, n_times, verbose=None):
     """Specify disjoint subsets (e.g., hemispheres) based on connectivity."""
     if isinstance(connectivity, list):
         test = np.ones(len(connectivity))
-        test_conn = np.zeros((len(connectivity), len(connectivity)),
-                             dtype='bool')
-        for vi in range(len(connectivity)):
-            test_conn[connectivity[vi], vi] = True
-        test_conn = sparse.coo_matrix(test_conn, dtype='float')
     else:
         test = np.ones(connectivity.shape[0])
-        test_conn = connectivity
-
-    part_clusts = _find_clusters(test, 0, 1, test_conn)[0]
+    part_clusts = _find_clusters(test, 0, 1, connectivity)[0]
     if len(part_clusts) > 1:
         logger.info('%i disjoint connectivity sets found'
                     % len(part_clusts))
@@ -69,6 +69,57 @@ def ttest_1samp_no_p(X, sigma=0, method='relative'):
     return np.mean(X, axis=0) / np.sqrt(var / X.shape[0])
 
 
+def _ttest_1samp_no_p_signs(X, signs, sigma=0, method='relative',
+                            buffer_size=None):
+    """Compute one-sample t-values for a batch of sign flips of X.
+
+    Row ``ii`` of the output is ``ttest_1samp_no_p(signs[ii][:, None] * X)``.
+    Sign flips leave the sum of squares unchanged, so with ``X = mu + d``
+    (``mu`` the mean over samples) only the means of the flipped deviations
+    ``d`` have to be computed for each flip (as a single matrix product).
+    Expressing the variance in terms of ``d`` rather than ``X`` avoids the
+    cancellation of ``sum(X ** 2) - n * mean ** 2`` for large means.
+    If ``buffer_size`` is not None, X is read in blocks of that many
+    variables (e.g., for memory-mapped data).
+    """
+    if method not in ['absolute', 'relative']:
+        raise ValueError('method must be "absolute" or "relative", not %s'
+                         % method)
+    n_samples, n_vars = X.shape
+    if buffer_size is None:
+        buffer_size = n_vars
+    dtype = np.result_type(X.dtype, signs.dtype)
+    mu = np.empty(n_vars, dtype)
+    mean_d = np.empty((len(signs), n_vars), dtype)
+    ss = np.empty(n_vars, dtype)
+    err = np.empty(n_vars, dtype)  # mean of d, zero up to round-off
+    for pos in range(0, n_vars, buffer_size):
+        this_X = np.asarray(X[:, pos:pos + buffer_size], dtype)
+        mu[pos:pos + buffer_size] = this_mu = np.mean(this_X, axis=0)
+        this_X = this_X - this_mu
+        mean_d[:, pos:pos + buffer_size] = np.dot(signs, this_X)
+        ss[pos:pos + buffer_size] = np.sum(this_X * this_X, axis=0)
+        err[pos:pos + buffer_size] = np.mean(this_X, axis=0)
+    mean_d /= n_samples
+    mean_s = np.mean(signs, axis=1)[:, np.newaxis]
+    mean = mean_s * mu + mean_d
+    # sum((s * X - mean) ** 2), with s * X - mean written as
+    # mu * (s - mean_s) + (s * d - mean_d). Keeping the round-off err makes
+    # the large mu terms cancel exactly when all signs are equal.
+    var = (ss - n_samples * mean_d * mean_d +
+           n_samples * mu * (mu * (1. - mean_s * mean_s) +
+                             2. * (err - mean_s * mean_d)))
+    var /= n_samples - 1
+    np.maximum(var, 0., out=var)  # guard against round-off
+    if sigma > 0:
+        if method == 'relative':
+            limit = sigma * np.max(var, axis=1)[:, np.newaxis]
+        else:
+            limit = sigma
+        var += limit
+    return mean / np.sqrt(var / n_samples)
+
+
 def f_oneway(*args):
     """Perform a 1-way ANOVA.
 
@@ -9,7 +9,7 @@ import os
 import numpy as np
 from scipy import sparse, linalg, stats
 from numpy.testing import (assert_equal, assert_array_equal,
-                           assert_array_almost_equal)
+                           assert_array_almost_equal, assert_allclose)
 import pytest
 
 from mne.parallel import _force_serial
@@ -17,7 +17,9 @@ from mne.stats.cluster_level import (permutation_cluster_test, f_oneway,
                                      permutation_cluster_1samp_test,
                                      spatio_temporal_cluster_test,
                                      spatio_temporal_cluster_1samp_test,
-                                     ttest_1samp_no_p, summarize_clusters_stc)
+                                     ttest_1samp_no_p, summarize_clusters_stc,
+                                     _find_clusters, _setup_connectivity,
+                                     _get_edges)
 from mne.utils import run_tests_if_main, _TempDir, catch_logging
 
 
@@ -116,6 +118,48 @@ def test_cache_dir():
             del os.environ['MNE_MEMMAP_MIN_SIZE']
 
 
+def test_permutation_memmap():
+    """Test cluster level permutations on memory-mapped data."""
+    tempdir = _TempDir()
+    rng = np.random.RandomState(0)
+    X = [rng.randn(9, 5, 20) + 0.5, rng.randn(7, 5, 20)]
+    X_mmap = list()
+    for ii, x in enumerate(X):
+        x_mmap = np.memmap(os.path.join(tempdir, 'x%d.dat' % ii), x.dtype,
+                           'w+', shape=x.shape)
+        x_mmap[:] = x
+        x_mmap.flush()
+        X_mmap.append(np.memmap(x_mmap.filename, x.dtype, 'r+',
+                                shape=x.shape))
+    del x_mmap
+    kwargs = dict(threshold=1.5, n_permutations=50, seed=0, buffer_size=7)
+    for stat_fun in (None, partial(ttest_1samp_no_p, sigma=1e-3)):
+        if stat_fun is None:
+            want = permutation_cluster_1samp_test(X[0], **kwargs)
+        else:
+            # in memory, the relative sigma disables the buffer
+            with pytest.warns(RuntimeWarning, match='independently'):
+                want = permutation_cluster_1samp_test(X[0], stat_fun=stat_fun,
+                                                      **kwargs)
+        for n_jobs in (1, 2):
+            got = permutation_cluster_1samp_test(
+                X_mmap[0], stat_fun=stat_fun, n_jobs=n_jobs, **kwargs)
+            assert_array_almost_equal(want[0], got[0])
+            assert_array_almost_equal(want[2], got[2])
+            assert_array_almost_equal(want[3], got[3])
+    # the data on disk are left untouched
+    assert_array_equal(X_mmap[0], X[0])
+    want = permutation_cluster_test(X, **kwargs)
+    for n_jobs in (1, 2):
+        got = permutation_cluster_test(X_mmap, n_jobs=n_jobs, **kwargs)
+        assert_array_almost_equal(want[0], got[0])
+        assert_array_almost_equal(want[2], got[2])
+        assert_array_almost_equal(want[3], got[3])
+    # mixed in-memory and memory-mapped groups
+    got = permutation_cluster_test([X[0], X_mmap[1]], **kwargs)
+    assert_array_almost_equal(want[3], got[3])
+
+
 def test_permutation_large_n_samples():
     """Test that non-replacement works with large N."""
     X = np.random.RandomState(0).randn(72, 1) + 1
@@ -238,6 +282,54 @@ def test_cluster_permutation_t_test():
             assert_array_equal(cluster_p_values_neg, cluster_p_values_neg_buff)
 
 
+def test_permutation_1samp_batch():
+    """Test batched sign-flip permutations for the default t-test."""
+    condition1 = _get_conditions()[0]
+    for kwargs in (dict(), dict(sigma=1e-1), dict(sigma=1e-3,
+                                                  method='absolute')):
+        batch_fun = partial(ttest_1samp_no_p, **kwargs)
+
+        def loop_fun(X):  # not recognized, so not batched
+            return ttest_1samp_no_p(X, **kwargs)
+
+        for stat_fun, buffer_size in ((batch_fun, None), (loop_fun, None),
+                                      (loop_fun, 10)):
+            kwargs_perm = dict(n_permutations=100, threshold=1.67, seed=1,
+                               stat_fun=stat_fun, buffer_size=buffer_size)
+            if buffer_size is not None and 'sigma' in kwargs and \
+                    kwargs.get('method', 'relative') == 'relative':
+                # a relative sigma depends on all the variables
+                with pytest.warns(RuntimeWarning, match='independently'):
+                    out = permutation_cluster_1samp_test(condition1,
+                                                         **kwargs_perm)
+            else:
+                out = permutation_cluster_1samp_test(condition1,
+                                                     **kwargs_perm)
+            if stat_fun is batch_fun:
+                T_obs, clusters, cluster_pv, H0 = out
+            else:
+                assert_array_equal(T_obs, out[0])
+                assert_array_almost_equal(cluster_pv, out[2])
+                assert_array_almost_equal(H0, out[3])
+
+
+def test_permutation_1samp_batch_offset():
+    """Test batched sign-flip t-values for data with large means."""
+    from mne.stats.parametric import _ttest_1samp_no_p_signs
+    rng = np.random.RandomState(0)
+    signs = np.sign(rng.randn(10, 20))
+    signs[0], signs[1] = 1, -1
+    for offset in (0., 1e3, 1e5, 1e7):
+        X = offset + 1e-2 * rng.randn(20, 5)
+        for kwargs in (dict(), dict(sigma=1e-3)):
+            want = [ttest_1samp_no_p(s[:, np.newaxis] * X, **kwargs)
+                    for s in signs]
+            for buffer_size in (None, 2):
+                t = _ttest_1samp_no_p_signs(X, signs, buffer_size=buffer_size,
+                                            **kwargs)
+                assert_allclose(t, want, rtol=1e-10)
+
+
 def test_cluster_permutation_with_connectivity():
     """Test cluster level permutations with connectivity matrix."""
     try:
@@ -462,6 +554,69 @@ def test_permutation_connectivity_equiv():
         assert_array_equal(stat_map, this_stat_map)
 
 
+def test_find_clusters_connectivity_equiv():
+    """Test that list and sparse connectivity give the same clusters."""
+    rng = np.random.RandomState(0)
+    n_time, n_space = 10, 30
+    # random symmetric spatial adjacency
+    spatial = sparse.random(n_space, n_space, density=0.1, random_state=rng)
+    spatial = sparse.lil_matrix(((spatial + spatial.T) > 0).astype(int))
+    spatial.setdiag(0)
+    spatial = sparse.coo_matrix(spatial)
+    st_conn = sparse.kron(sparse.eye(n_time), spatial) + sparse.kron(
+        sparse.eye(n_time, k=1) + sparse.eye(n_time, k=-1),
+        sparse.eye(n_space))
+    st_conn = sparse.coo_matrix(st_conn)
+    list_conn = _setup_connectivity(spatial, n_time * n_space, n_time)
+    # the spatial edges are stored once, not once per time point
+    edges = _get_edges(list_conn, n_time * n_space)
+    assert_equal(len(edges[1]), sparse.triu(spatial, 1).nnz)
+    x = rng.randn(n_time * n_space)
+    for tail, thresh in ((0, 1.), (1, 0.5), (-1, -0.5)):
+        clusters_sp, sums_sp = _find_clusters(x, thresh, tail, st_conn)
+        clusters_li, sums_li = _find_clusters(x, thresh, tail, list_conn)
+        assert len(clusters_sp) > 1
+        assert_equal(len(clusters_sp), len(clusters_li))
+        # clusters are returned in the same order
+        for c_sp, c_li in zip(clusters_sp, clusters_li):
+            assert_array_equal(np.sort(c_sp), np.sort(c_li))
+        assert_array_almost_equal(sums_sp, sums_li)
+
+
+def test_tfce_incremental():
+    """Test that TFCE matches clustering each threshold separately."""
+    rng = np.random.RandomState(0)
+    n_space = 40
+    connectivity = sparse.random(n_space, n_space, density=0.1,
+                                 random_state=rng)
+    connectivity = sparse.coo_matrix((connectivity + connectivity.T) > 0)
+    x = rng.randn(n_space) * 2
+    include = rng.rand(n_space) > 0.1
+    for tail, step in ((0, 0.2), (1, 0.3), (-1, -0.2)):
+        stop = {0: np.max(np.abs(x)), 1: np.max(x), -1: np.min(x)}[tail]
+        thresholds = np.arange(0.1 * np.sign(step), stop, step)
+        want = np.zeros(n_space)
+        for ti, thresh in enumerate(thresholds):
+            h = abs(thresh - (thresholds[ti - 1] if ti > 0 else 0.))
+            clusters = _find_clusters(x, thresh, tail, connectivity,
+                                      include=include)[0]
+            for c in clusters:
+                want[c] += h ** 2 * len(c) ** 0.5
+        threshold = dict(start=0.1 * np.sign(step), step=step)
+        for conn in (connectivity, [np.array(n) for n in
+                                    connectivity.tolil().rows]):
+            got = _find_clusters(x, threshold, tail, conn,
+                                 include=include)[1]
+            assert_array_almost_equal(got, want)
+        # without connectivity, each point is its own cluster
+        got = _find_clusters(x, threshold, tail, False)[1]
+        want = np.zeros(n_space)
+        for ti, thresh in enumerate(thresholds):
+            h = abs(thresh - (thresholds[ti - 1] if ti > 0 else 0.))
+            want[(tail * x if tail else np.abs(x)) > abs(thresh)] += h ** 2
+        assert_array_almost_equal(got, want)
+
+
 def test_spatio_temporal_cluster_connectivity():
     """Test spatio-temporal cluster permutations."""
     try:
@@ -15,7 +15,8 @@ from mne.io import (read_raw_fif, read_raw_artemis123, read_raw_ctf, read_info,
                     RawArray)
 from mne.io.constants import FIFF
 from mne.chpi import (_calculate_chpi_positions, _calculate_chpi_coil_locs,
-                      _calculate_head_pos_ctf, head_pos_to_trans_rot_t,
+                      _iter_chpi_positions, _calculate_head_pos_ctf,
+                      head_pos_to_trans_rot_t,
                       read_head_pos, write_head_pos, filter_chpi,
                       _get_hpi_info, _get_hpi_initial_fit)
 from mne.transforms import rot_to_quat, _angle_between_quats
@@ -189,6 +190,18 @@ def test_calculate_chpi_positions():
                                              verbose='debug')
     assert log.getvalue().startswith('HPIFIT')
     _assert_quats(py_quats, mf_quats, dist_tol=0.004, angle_tol=2.5)
+    # segments fit in parallel
+    py_quats_par = _calculate_chpi_positions(raw_dec, t_step_max=1.,
+                                             n_jobs=2)
+    _assert_quats(py_quats_par, mf_quats, dist_tol=0.004, angle_tol=2.5)
+    # velocities are relative to the previous fit, even across segments
+    for quats in (py_quats, py_quats_par):
+        v = 100 * np.abs(np.diff(quats[:, 4:7], axis=0).sum(-1)) / 0.2
+        assert_allclose(quats[1:, 9], v, atol=1e-7)
+    # positions can be streamed to disk as they are fit
+    temp_name = op.join(_TempDir(), 'temp.pos')
+    write_head_pos(temp_name, _iter_chpi_positions(raw_dec, t_step_max=1.))
+    assert_allclose(read_head_pos(temp_name), py_quats, atol=1e-3)
 
     # degenerate conditions
     raw_no_chpi = read_raw_fif(test_fif_fname)
@@ -1104,6 +1104,44 @@ def test_reject_epochs():
     assert_equal(epochs._is_good_epoch(data), (True, None))
 
 
+def test_vectorized_reject():
+    """Test vectorized rejection against epoch-by-epoch rejection."""
+    from mne.epochs import _get_bad_epochs, _is_good
+    ch_names = ['a', 'b', 'c', 'd']
+    channel_type_idx = dict(grad=[0, 1], mag=[2], eeg=[3])
+    data = rng.randn(50, 4, 20)
+    data[::3, 2] *= 1e-3  # flat mag
+    data[1::4, 0] *= 10  # noisy grad
+    this_reject, this_flat = dict(grad=15., eeg=4.5), dict(mag=1e-2)
+    bad_lists = _get_bad_epochs(data, ch_names, channel_type_idx,
+                                this_reject, this_flat, ignore_chs=['b'])
+    assert len(bad_lists) == len(data)
+    assert any(bad_list is None for bad_list in bad_lists)
+    assert any(bad_list is not None for bad_list in bad_lists)
+    for e, bad_list in zip(data, bad_lists):
+        ptp = np.ptp(e, axis=-1)
+        want = [ch_names[ii] for ii in (0, 3)
+                if ptp[ii] > this_reject['grad' if ii == 0 else 'eeg']]
+        want += ['c'] if ptp[2] < this_flat['mag'] else []
+        assert bad_list == (want if len(want) > 0 else None)
+        is_good = _is_good(e, ch_names, channel_type_idx, this_reject,
+                           this_flat, ignore_chs=['b'])
+        assert is_good == (bad_list is None)
+
+    # preloaded and non-preloaded epochs produce the same drop log
+    raw, events, picks = _get_data()
+    kwargs = dict(event_id=None, tmin=tmin, tmax=tmax, picks=picks,
+                  reject=reject, flat=flat, reject_tmin=0., proj='delayed')
+    epochs = Epochs(raw, events, **kwargs)
+    epochs_preload = Epochs(raw, events, preload=True, **kwargs)
+    epochs.drop_bad()
+    assert epochs.drop_log == epochs_preload.drop_log
+    assert_allclose(epochs.get_data(), epochs_preload.get_data())
+    epochs_preload.drop_bad(reject=dict(reject, grad=500e-12))
+    epochs.drop_bad(reject=dict(reject, grad=500e-12))
+    assert epochs.drop_log == epochs_preload.drop_log
+
+
 def test_preload_epochs():
     """Test preload of epochs."""
     raw, events, picks = _get_data()
@@ -1120,6 +1158,71 @@ def test_preload_epochs():
                               epochs.average().data, 18)
 
 
+def test_batched_epochs_from_raw():
+    """Test batched reading of epochs from raw against one-by-one reading."""
+    raw, events, picks = _get_data()
+    # overlapping epochs, epochs at the edges and an annotated bad segment
+    events = np.concatenate([events, [[raw.first_samp + 10, 0, 1],
+                                      [raw.last_samp - 10, 0, 1]]])
+    events = events[np.argsort(events[:, 0])]
+    raw.set_annotations(Annotations([10.], [1.], ['BAD_segment'],
+                                    orig_time=None))
+    epochs = Epochs(raw, events, None, tmin, tmax, picks=picks,
+                    baseline=None, reject_by_annotation=True)
+    indices = np.arange(len(epochs.events))
+    batched = epochs._get_epochs_from_raw(indices)
+    assert len(batched) == len(indices)
+    n_bad = 0
+    for idx, epoch in zip(indices, batched):
+        single = epochs._get_epoch_from_raw(idx)
+        if single is None or isinstance(single, str):
+            assert not isinstance(epoch, np.ndarray)
+            assert epoch == single
+            n_bad += 1
+        else:
+            assert_allclose(epoch, single)
+    # first event (starts before the data) and annotated epochs
+    assert batched[0] is None
+    assert n_bad >= 2
+    assert 'BAD_segment' in [e for e in batched if isinstance(e, str)]
+    # the batched reads are used when loading data
+    data = epochs.get_data()
+    epochs_preload = Epochs(raw, events, None, tmin, tmax, picks=picks,
+                            baseline=None, reject_by_annotation=True,
+                            preload=True)
+    assert_allclose(data, epochs_preload.get_data())
+    assert epochs.drop_log == epochs_preload.drop_log
+
+
+def test_streaming_aggregate(monkeypatch):
+    """Test block-wise mean and standard error of non-preloaded epochs."""
+    from mne.epochs import _block_stats, _combine_stats
+    data = rng.randn(23, 3, 4)
+    stats = (0, 0., 0.)
+    bounds = [0, 1, 8, 20, 23]
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        stats = _combine_stats(stats, _block_stats(data[start:stop]))
+    n, mean, m2 = stats
+    assert n == len(data)
+    assert_allclose(mean, data.mean(axis=0))
+    assert_allclose(np.sqrt(m2 / n), data.std(axis=0))
+
+    raw, events, picks = _get_data()
+    kwargs = dict(event_id=None, tmin=tmin, tmax=tmax, picks=picks,
+                  reject=reject, flat=flat)
+    epochs = Epochs(raw, events, **kwargs)
+    # force several blocks
+    monkeypatch.setattr(BaseEpochs, '_get_batch_size', lambda self: 5)
+    epochs_preload = Epochs(raw, events, preload=True, **kwargs)
+    for n_jobs in (1, 2):
+        assert_allclose(epochs.average(n_jobs=n_jobs).data,
+                        epochs_preload.average().data, rtol=1e-7, atol=1e-20)
+        assert_allclose(epochs.standard_error(n_jobs=n_jobs).data,
+                        epochs_preload.standard_error().data, rtol=1e-7,
+                        atol=1e-20)
+        assert epochs.average(n_jobs=n_jobs).nave == len(epochs_preload)
+
+
 def test_indexing_slicing():
     """Test of indexing and slicing operations."""
     raw, events, picks = _get_data()
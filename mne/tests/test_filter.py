@@ -12,7 +12,8 @@ from mne.io import RawArray, read_raw_fif
 from mne.filter import (filter_data, resample, _resample_stim_channels,
                         construct_iir_filter, notch_filter, detrend,
                         _overlap_add_filter, _smart_pad, design_mne_c_filter,
-                        estimate_ringing_samples, create_filter, _Interp2)
+                        estimate_ringing_samples, create_filter, _Interp2,
+                        get_filter_cache_info, clear_filter_cache)
 
 from mne.utils import (sum_squared, run_tests_if_main,
                        catch_logging, requires_version, _TempDir,
@@ -274,6 +275,52 @@ def test_resample_scipy():
                 assert_allclose(x_p5, x_p5_sp, atol=1e-12, err_msg=err_msg)
 
 
+@requires_version('scipy', '0.18')
+def test_resample_polyphase(monkeypatch):
+    """Test polyphase resampling."""
+    rng = np.random.RandomState(0)
+    sfreq = 5000.
+    t = np.arange(int(sfreq)) / sfreq
+    freqs = np.array([3., 17., 101.])
+    x = np.sin(2 * np.pi * freqs[:, np.newaxis] * t)
+    for up, down in ((1000., 5000.), (3, 2), (2, 1), (1, 3)):
+        x_rs = resample(x, up, down, method='polyphase')
+        assert x_rs.shape == resample(x, up, down).shape
+        t_rs = np.arange(x_rs.shape[1]) / (sfreq * up / down)
+        want = np.sin(2 * np.pi * freqs[:, np.newaxis] * t_rs)
+        assert_allclose(x_rs[:, 100:-100], want[:, 100:-100], atol=5e-3)
+    # output length conventions and axis handling
+    for n_times in (1, 2, 7, 100, 101):
+        for up, down in ((1, 5), (5, 1), (2, 3)):
+            x = rng.randn(2, n_times)
+            assert resample(x, up, down, method='polyphase').shape == \
+                (2, int(round(n_times * float(up) / down)))
+    x = rng.randn(3, 4, 50)
+    x_rs = resample(x, 1, 2, axis=1, method='polyphase')
+    assert x_rs.shape == (3, 2, 50)
+    assert_allclose(x_rs, resample(x.swapaxes(1, 2), 1, 2,
+                                   method='polyphase').swapaxes(1, 2))
+    assert_array_equal(resample(x, 1, 2, method='polyphase', n_jobs=2),
+                       resample(x, 1, 2, method='polyphase'))
+    # the blocks give the same result as the whole signal
+    x = rng.randn(2, 1001)
+    for up, down in ((1, 5), (3, 2), (7, 11)):
+        x_rs = resample(x, up, down, method='polyphase')
+        with monkeypatch.context() as m:
+            m.setattr('mne.filter._POLYPHASE_BLOCK_SIZE', 30)
+            assert_allclose(resample(x, up, down, method='polyphase'), x_rs,
+                            rtol=1e-12, atol=1e-14)
+    pytest.raises(ValueError, resample, x, 150., 600.615, method='polyphase')
+    pytest.raises(ValueError, resample, x, 1, 2, method='foo')
+    # Raw and Epochs
+    raw = RawArray(rng.randn(2, 5000), create_info(2, sfreq, 'eeg'))
+    raw_fft = raw.copy().resample(1000.)
+    raw.resample(1000., method='polyphase')
+    assert raw.info['sfreq'] == 1000.
+    assert_array_equal(raw.times, raw_fft.times)
+    assert raw.first_samp == raw_fft.first_samp
+
+
 def test_resamp_stim_channel():
     """Test resampling of stim channels."""
     # Downsampling
@@ -484,6 +531,61 @@ def test_filter_auto():
                   10, filter_length='auto', h_trans_bandwidth='auto', **kwargs)
 
 
+def test_filter_threads():
+    """Test thread-based in-place filtering."""
+    sfreq = 1000.
+    x = rng.randn(5, 4000)
+    picks = [0, 2, 3]
+    for method in ('fir', 'iir'):
+        kwargs = dict(sfreq=sfreq, l_freq=1., h_freq=40., picks=picks,
+                      method=method)
+        x_filt = filter_data(x, **kwargs)
+        for n_jobs in ('threads', 'threads:2'):
+            x_thread = x.copy()
+            out = filter_data(x_thread, n_jobs=n_jobs, copy=False, **kwargs)
+            assert out is x_thread
+            assert_allclose(x_thread, x_filt, atol=1e-12)
+            assert_array_equal(x_thread[[1, 4]], x[[1, 4]])
+    x_notch = notch_filter(x, sfreq, 60., method='spectrum_fit')
+    assert_allclose(notch_filter(x, sfreq, 60., method='spectrum_fit',
+                                 n_jobs='threads:2'), x_notch, atol=1e-12)
+    for n_jobs in ('threads:', 'threads:two', 'threads2'):
+        pytest.raises(ValueError, filter_data, x, sfreq, 1., 40.,
+                      n_jobs=n_jobs)
+
+
+def test_filter_cache(monkeypatch):
+    """Test the filter design cache."""
+    sfreq = 1000.
+    x = rng.randn(2, 4000)
+    clear_filter_cache()
+    x_fir = filter_data(x, sfreq, 1., 40.)
+    info = get_filter_cache_info()
+    assert info['hits'] == 0
+    assert info['misses'] == info['size'] == 2  # design and kernel FFT
+    assert info['nbytes'] > 0
+    assert_array_equal(filter_data(x, sfreq, 1., 40.), x_fir)
+    info = get_filter_cache_info()
+    assert info['hits'] == 2
+    assert info['misses'] == info['size'] == 2
+    # returned filters can be modified without affecting the cache
+    h = create_filter(x, sfreq, 1., 40.)
+    h[:] = 0.
+    assert_array_equal(filter_data(x, sfreq, 1., 40.), x_fir)
+    # IIR designs and padding estimates are cached too
+    x_iir = filter_data(x, sfreq, 1., 40., method='iir')
+    n_misses = get_filter_cache_info()['misses']
+    assert_array_equal(filter_data(x, sfreq, 1., 40., method='iir'), x_iir)
+    assert get_filter_cache_info()['misses'] == n_misses
+    clear_filter_cache()
+    info = get_filter_cache_info()
+    assert info['hits'] == info['misses'] == info['size'] == 0
+    # disabled
+    monkeypatch.setenv('MNE_FILTER_CACHE_SIZE', '0')
+    assert_array_equal(filter_data(x, sfreq, 1., 40.), x_fir)
+    assert get_filter_cache_info()['size'] == 0
+
+
 def test_cuda_fir():
     """Test CUDA-based filtering."""
     # Using `n_jobs='cuda'` on a non-CUDA system should be fine,
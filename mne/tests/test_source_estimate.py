@@ -598,6 +598,40 @@ def test_transform_data():
             assert_allclose(data_f, stc_data_t)
 
 
+def test_kernel_factorized():
+    """Test operations that keep kernel-factorized source estimates lazy."""
+    n_sensors, n_verts, n_times = 5, 10, 4
+    vertices = [np.arange(n_verts), np.arange(n_verts)]
+    kernel = rng.randn(2 * n_verts, n_sensors)
+    stcs = [SourceEstimate((kernel, rng.randn(n_sensors, n_times)),
+                           vertices=vertices, tmin=0., tstep=1.)
+            for _ in range(3)]
+    datas = [np.dot(kernel, stc._sens_data) for stc in stcs]
+    # arithmetic with scalars and source estimates sharing the kernel
+    stc_mean = sum(stcs) / len(stcs)
+    stc = -(2 * stcs[0] - stcs[1] * 0.5)
+    stc_copy = stcs[0].copy()
+    for s in (stc_mean, stc, stc_copy):
+        assert s._kernel is kernel and s._data is None
+    assert stcs[0]._data is None  # the operands are left untouched
+    assert_allclose(stc_mean.data, np.mean(datas, axis=0))
+    assert_allclose(stc.data, -(2 * datas[0] - 0.5 * datas[1]))
+    # cropping, label selection and time summaries
+    label = Label(vertices=np.arange(3, 7), hemi='rh')
+    stc_label = stc_copy.in_label(label)
+    assert stc_label._kernel is not None
+    assert_allclose(stc_label.data, datas[0][n_verts + 3:n_verts + 7])
+    stc_sum = stc_copy.copy().crop(1., None).sum()
+    assert stc_sum._kernel is kernel
+    assert_allclose(stc_sum.data, datas[0][:, 1:].sum(axis=1, keepdims=True))
+    assert stc_copy._data is None
+    assert_allclose(stc_copy.data, datas[0])
+    # operations between different kernels materialize the data
+    stc = stcs[1] + SourceEstimate(datas[2], vertices, 0., 1.)
+    assert stc._kernel is None
+    assert_allclose(stc.data, datas[1] + datas[2])
+
+
 def test_transform():
     """Test applying linear (time) transform to data."""
     # make up some data
@@ -15,7 +15,7 @@ from mne.datasets import testing
 from mne.externals.six.moves import StringIO
 from mne.io import show_fiff, read_raw_fif
 from mne.epochs import _segment_raw
-from mne.parallel import parallel_func
+from mne.parallel import parallel_func, _has_shared_memory
 from mne.time_frequency import tfr_morlet
 from mne.utils import (set_log_level, set_log_file, _TempDir,
                        get_config, set_config, deprecated, _fetch_file,
@@ -31,7 +31,8 @@ from mne.utils import (set_log_level, set_log_file, _TempDir,
                        check_fname, get_config_path, warn,
                        object_size, buggy_mkl_svd, _get_inst_data,
                        copy_doc, copy_function_doc_to_method_doc, ProgressBar,
-                       linkcode_resolve, array_split_idx, filter_out_warnings)
+                       linkcode_resolve, array_split_idx, filter_out_warnings,
+                       requires_version)
 
 
 base_dir = op.join(op.dirname(__file__), '..', 'io', 'tests', 'data')
@@ -827,6 +828,49 @@ def test_progressbar_parallel_advanced(capsys):
     assert '100.00%' in capsys.readouterr().out
 
 
+def _sum_row(x, ii):
+    return x[ii].sum(), x[ii]
+
+
+@requires_version('joblib', '0.8')
+@pytest.mark.parametrize('backend', ('auto', 'loky', 'threading',
+                                     'shared_memory'))
+def test_parallel_backends(backend):
+    """Test the parallel backends."""
+    if backend == 'shared_memory' and not _has_shared_memory():
+        pytest.skip('multiprocessing.shared_memory not available')
+    x = np.random.RandomState(0).randn(4, 50000)  # > 1M
+    parallel, p_fun, n_jobs = parallel_func(_sum_row, 2, backend=backend,
+                                            max_nbytes='1M')
+    assert n_jobs == 2
+    out = parallel(p_fun(x, ii) for ii in range(len(x)))
+    assert_allclose([o[0] for o in out], x.sum(axis=1))
+    assert_array_equal(np.array([o[1] for o in out]), x)
+    parallel, p_fun, n_jobs = parallel_func(_sum_row, 2, prefer='threads',
+                                            backend=backend)
+    out = parallel(p_fun(x, ii) for ii in range(len(x)))
+    assert_allclose([o[0] for o in out], x.sum(axis=1))
+    with pytest.raises(ValueError, match='backend must be'):
+        parallel_func(_sum_row, 2, backend='foo')
+    with pytest.raises(ValueError, match='prefer must be'):
+        parallel_func(_sum_row, 2, prefer='foo')
+
+
+def _double(x):
+    x *= 2
+    return x
+
+
+@requires_version('joblib', '0.8')
+def test_parallel_auto_writable():
+    """Test that the default backend passes writable arrays."""
+    x = np.random.RandomState(0).randn(2, 50000)  # > 1M
+    parallel, p_fun, _ = parallel_func(_double, 2)
+    out = parallel(p_fun(xx) for xx in [x, x])
+    for o in out:
+        assert_allclose(o, 2 * x)
+
+
 def _identity_block_wide(x, pb):
     for ii in range(len(x)):
         for jj in range(2):
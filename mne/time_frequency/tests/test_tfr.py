@@ -2,7 +2,7 @@ import numpy as np
 import os.path as op
 
 from numpy.testing import (assert_array_almost_equal, assert_array_equal,
-                           assert_equal)
+                           assert_equal, assert_allclose)
 import pytest
 
 import mne
@@ -35,6 +35,30 @@ def test_tfr_ctf():
         method(epochs, [10], 1)  # smoke test
 
 
+def test_tfr_stream(monkeypatch):
+    """Test averaging the TFR of non-preloaded epochs block by block."""
+    raw = read_raw_fif(raw_fname)
+    events = read_events(event_fname)
+    picks = pick_types(raw.info, meg='grad', exclude='bads')[:3]
+    epochs = Epochs(raw, events, 1, -0.2, 0.5, picks=picks,
+                    reject=dict(grad=1000e-13))
+    epochs_pre = epochs.copy().load_data()
+    # read a few epochs at a time
+    monkeypatch.setattr(Epochs, '_get_batch_size', lambda self: 3)
+    freqs = np.arange(6., 20., 5.)
+    for method in (tfr_morlet, tfr_multitaper):
+        power, itc = method(epochs, freqs, n_cycles=2., use_fft=True,
+                            decim=2, n_jobs='threads:2')
+        power_pre, itc_pre = method(epochs_pre, freqs, n_cycles=2.,
+                                    use_fft=True, decim=2)
+        assert power.nave == itc.nave == len(epochs_pre)
+        assert_allclose(power.data, power_pre.data, rtol=1e-7)
+        assert_allclose(itc.data, itc_pre.data, rtol=1e-7)
+        assert_array_equal(power.times, power_pre.times)
+        assert power.ch_names == power_pre.ch_names
+    assert not epochs.preload
+
+
 def test_morlet():
     """Test morlet with and without zero mean."""
     Wz = morlet(1000, [10], 2., zero_mean=True)
@@ -640,4 +664,32 @@ def test_compute_tfr():
             assert_array_equal(shape[1:], out.shape)
 
 
+def test_compute_tfr_batched(monkeypatch):
+    """Test batched and threaded _compute_tfr against direct convolution."""
+    from mne.time_frequency import tfr as tfr_mod
+    rng = np.random.RandomState(0)
+    data = rng.randn(7, 3, 500)
+    sfreq = 250.
+    freqs = np.arange(6., 40., 5.)
+    # several blocks of epochs, and wavelets of different lengths
+    monkeypatch.setattr(tfr_mod, '_CWT_BATCH_SIZE', 2e4)
+    n_cycles = np.linspace(2., 7., len(freqs))
+    for output in ('complex', 'power', 'avg_power_itc'):
+        want = _compute_tfr(data, freqs, sfreq, n_cycles=n_cycles,
+                            use_fft=False, output=output)
+        for n_jobs in (1, 'threads:2'):
+            got = _compute_tfr(data, freqs, sfreq, n_cycles=n_cycles,
+                               use_fft=True, output=output, n_jobs=n_jobs)
+            assert_allclose(got, want, rtol=1e-7, atol=1e-12)
+    # complex signals and the other convolution modes
+    Ws = morlet(sfreq, freqs, n_cycles=n_cycles)
+    X = data[:, 0] + 1j * data[:, 1]
+    for mode in ('same', 'valid'):
+        want = cwt(X, Ws, use_fft=False, mode=mode)
+        assert_allclose(cwt(X, Ws, use_fft=True, mode=mode), want,
+                        rtol=1e-7, atol=1e-12)
+    pytest.raises(ValueError, _compute_tfr, data, freqs, sfreq,
+                  n_jobs='threads:foo')
+
+
 run_tests_if_main()
@@ -16,10 +16,9 @@ from warnings import warn
 
 import numpy as np
 from scipy import linalg
-from scipy.fftpack import fft, ifft
 
 from ..baseline import rescale
-from ..parallel import parallel_func
+from ..parallel import parallel_func, _check_n_jobs_threads
 from ..utils import logger, verbose, _time_mask, check_fname, sizeof_fmt
 from ..channels.channels import ContainsMixin, UpdateChannelsMixin
 from ..channels.layout import _pair_grad_sensors
@@ -34,6 +33,10 @@ from ..viz.utils import (figure_nobar, plt_show, _setup_cmap,
 from ..externals.h5io import write_hdf5, read_hdf5
 from ..externals.six import string_types
 
+# Maximum number of complex values in the spectra of a block of signals
+# convolved with all the wavelets at once
+_CWT_BATCH_SIZE = 1e6
+
 
 # Make wavelet
 
@@ -182,80 +185,103 @@ def _cwt(X, Ws, mode="same", decim=1, use_fft=True):
         .. note:: Decimation may create aliasing artifacts.
 
     use_fft : bool, defaults to True
-        Use the FFT for convolutions or not.
+        Use the FFT for convolutions or not. If True, the wavelets are grouped
+        by FFT size, and each block of signals is transformed once per group
+        and multiplied with the stacked spectra of all the wavelets of the
+        group. The spectra of real signals are computed with real-input FFTs.
 
     Returns
     -------
-    out : array, shape (n_signals, n_freqs, n_time_decim)
-        The time-frequency transform of the signals.
+    out : generator of array, shape (n_block, n_freqs, n_time_decim)
+        The time-frequency transform of consecutive blocks of signals.
     """
     if mode not in ['same', 'valid', 'full']:
         raise ValueError("`mode` must be 'same', 'valid' or 'full', "
                          "got %s instead." % mode)
+    from ..filter import next_fast_len
     decim = _check_decim(decim)
     X = np.asarray(X)
 
-    # Precompute wavelets for given frequency range to save time
     n_signals, n_times = X.shape
     n_times_out = X[:, decim].shape[1]
     n_freqs = len(Ws)
 
-    Ws_max_size = max(W.size for W in Ws)
-    size = n_times + Ws_max_size - 1
-    # Always use 2**n-sized FFT
-    fsize = 2 ** int(np.ceil(np.log2(size)))
-
-    # precompute FFTs of Ws
-    if use_fft:
-        fft_Ws = np.empty((n_freqs, fsize), dtype=np.complex128)
-
-    warn_me = True
-    for i, W in enumerate(Ws):
-        if use_fft:
-            fft_Ws[i] = fft(W, fsize)
-        if len(W) > n_times and warn_me:
+    for W in Ws:
+        if len(W) > n_times:
             msg = ('At least one of the wavelets is longer than the signal. '
                    'Consider padding the signal or using shorter wavelets.')
             if use_fft:
                 warn(msg)
-                warn_me = False  # Suppress further warnings
+                break  # Suppress further warnings
             else:
                 raise ValueError(msg)
 
-    # Make generator looping across signals
-    tfr = np.zeros((n_freqs, n_times_out), dtype=np.complex128)
-    for x in X:
-        if use_fft:
-            fft_x = fft(x, fsize)
-
-        # Loop across wavelets
-        for ii, W in enumerate(Ws):
-            if use_fft:
-                ret = ifft(fft_x * fft_Ws[ii])[:n_times + W.size - 1]
-            else:
+    if not use_fft:
+        for x in X:
+            tfr = np.zeros((1, n_freqs, n_times_out), dtype=np.complex128)
+            for ii, W in enumerate(Ws):
                 ret = np.convolve(x, W, mode=mode)
-
-            # Center and decimate decomposition
-            if mode == 'valid':
-                sz = int(abs(W.size - n_times)) + 1
-                offset = (n_times - sz) // 2
-                this_slice = slice(offset // decim.step,
-                                   (offset + sz) // decim.step)
-                if use_fft:
-                    ret = _centered(ret, sz)
-                tfr[ii, this_slice] = ret[decim]
-            elif mode == 'full' and not use_fft:
-                start = (W.size - 1) // 2
-                end = len(ret) - (W.size // 2)
-                ret = ret[start:end]
-                tfr[ii, :] = ret[decim]
-            else:
-                if use_fft:
-                    ret = _centered(ret, n_times)
-                tfr[ii, :] = ret[decim]
+                # Center and decimate decomposition
+                if mode == 'valid':
+                    sz = int(abs(W.size - n_times)) + 1
+                    offset = (n_times - sz) // 2
+                    this_slice = slice(offset // decim.step,
+                                       (offset + sz) // decim.step)
+                    tfr[0, ii, this_slice] = ret[decim]
+                elif mode == 'full':
+                    start = (W.size - 1) // 2
+                    end = len(ret) - (W.size // 2)
+                    tfr[0, ii] = ret[start:end][decim]
+                else:
+                    tfr[0, ii] = ret[decim]
+            yield tfr
+        return
+
+    # Group the wavelets that share a fast FFT size, so that shorter wavelets
+    # do not pay for the longest one
+    fsizes = np.array([next_fast_len(n_times + W.size - 1) for W in Ws])
+    groups = list()
+    for fsize in np.unique(fsizes):
+        idx = np.where(fsizes == fsize)[0]
+        fft_Ws = np.array([np.fft.fft(Ws[ii], fsize) for ii in idx])
+        groups.append((fsize, idx, fft_Ws))
+
+    n_batch = max(int(_CWT_BATCH_SIZE // (n_freqs * fsizes.max())), 1)
+    for start in range(0, n_signals, n_batch):
+        x = X[start:start + n_batch]
+        tfr = np.zeros((len(x), n_freqs, n_times_out), dtype=np.complex128)
+        for fsize, idx, fft_Ws in groups:
+            fft_x = _fft_signals(x, fsize)
+            ret = np.fft.ifft(fft_x[:, np.newaxis] * fft_Ws)
+            for jj, ii in enumerate(idx):
+                # Center and decimate decomposition
+                W_size = Ws[ii].size
+                if mode == 'valid':
+                    sz = int(abs(W_size - n_times)) + 1
+                    offset = (n_times - sz) // 2
+                    this_slice = slice(offset // decim.step,
+                                       (offset + sz) // decim.step)
+                else:
+                    sz = n_times
+                    this_slice = slice(None)
+                first = (n_times + W_size - 1 - sz) // 2
+                window = slice(first, first + sz)
+                tfr[:, ii, this_slice] = ret[:, jj, window][:, decim]
         yield tfr
 
 
+def _fft_signals(x, n_fft):
+    """Compute the full spectra of signals, with a real-input FFT if real."""
+    if np.iscomplexobj(x):
+        return np.fft.fft(x, n_fft)
+    fft_x = np.empty((len(x), n_fft), dtype=np.complex128)
+    n_pos = n_fft // 2 + 1
+    fft_x[:, :n_pos] = np.fft.rfft(x, n_fft)
+    # negative frequencies are the conjugates of the positive ones
+    fft_x[:, n_pos:] = fft_x[:, 1:(n_fft + 1) // 2][:, ::-1].conj()
+    return fft_x
+
+
 # Loop of convolution: single trial
 
 
@@ -310,9 +336,12 @@ def _compute_tfr(epoch_data, freqs, sfreq=1.0, method='morlet',
         * 'avg_power_itc' : average of single trial power and inter-trial
           coherence across trials.
 
-    n_jobs : int, defaults to 1
+    n_jobs : int | str, defaults to 1
         The number of epochs to process at the same time. The parallelization
-        is implemented across channels.
+        is implemented across channels. Can also be ``'threads:N'`` (or
+        ``'threads'`` for one thread per CPU) to process the channels with
+        ``N`` threads sharing the data, without copying it to worker
+        processes.
     verbose : bool, str, int, or None, defaults to None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -337,19 +366,8 @@ def _compute_tfr(epoch_data, freqs, sfreq=1.0, method='morlet',
         _check_tfr_param(freqs, sfreq, method, zero_mean, n_cycles,
                          time_bandwidth, use_fft, decim, output)
 
-    # Setup wavelet
-    if method == 'morlet':
-        W = morlet(sfreq, freqs, n_cycles=n_cycles, zero_mean=zero_mean)
-        Ws = [W]  # to have same dimensionality as the 'multitaper' case
-
-    elif method == 'multitaper':
-        Ws = _make_dpss(sfreq, freqs, n_cycles=n_cycles,
-                        time_bandwidth=time_bandwidth, zero_mean=zero_mean)
-
-    # Check wavelets
-    if len(Ws[0][0]) > epoch_data.shape[2]:
-        raise ValueError('At least one of the wavelets is longer than the '
-                         'signal. Use a longer signal or shorter wavelets.')
+    Ws = _setup_wavelets(method, sfreq, freqs, n_cycles, zero_mean,
+                         time_bandwidth, epoch_data.shape[2])
 
     # Initialize output
     decim = _check_decim(decim)
@@ -367,17 +385,26 @@ def _compute_tfr(epoch_data, freqs, sfreq=1.0, method='morlet',
     else:
         out = np.empty((n_chans, n_epochs, n_freqs, n_times), dtype)
 
-    # Parallel computation
-    parallel, my_cwt, _ = parallel_func(_time_frequency_loop, n_jobs)
-
     # Parallelization is applied across channels.
-    tfrs = parallel(
-        my_cwt(channel, Ws, output, use_fft, 'same', decim)
-        for channel in epoch_data.transpose(1, 0, 2))
+    n_jobs, use_threads = _check_n_jobs_threads(n_jobs)
+    if use_threads:
+        # Threads share out, so each task writes its channel directly
+        def _channel_loop(channel_idx):
+            out[channel_idx] = _time_frequency_loop(
+                epoch_data[:, channel_idx], Ws, output, use_fft, 'same', decim)
+
+        parallel, my_cwt, _ = parallel_func(_channel_loop, n_jobs,
+                                            backend='threading')
+        parallel(my_cwt(channel_idx) for channel_idx in range(n_chans))
+    else:
+        parallel, my_cwt, _ = parallel_func(_time_frequency_loop, n_jobs)
+        tfrs = parallel(
+            my_cwt(channel, Ws, output, use_fft, 'same', decim)
+            for channel in epoch_data.transpose(1, 0, 2))
 
-    # FIXME: to avoid overheads we should use np.array_split()
-    for channel_idx, tfr in enumerate(tfrs):
-        out[channel_idx] = tfr
+        # FIXME: to avoid overheads we should use np.array_split()
+        for channel_idx, tfr in enumerate(tfrs):
+            out[channel_idx] = tfr
 
     if ('avg_' not in output) and ('itc' not in output):
         # This is to enforce that the first dimension is for epochs
@@ -385,6 +412,86 @@ def _compute_tfr(epoch_data, freqs, sfreq=1.0, method='morlet',
     return out
 
 
+def _setup_wavelets(method, sfreq, freqs, n_cycles, zero_mean, time_bandwidth,
+                    n_times):
+    """Aux. function to _compute_tfr to make and check the wavelets."""
+    if method == 'morlet':
+        W = morlet(sfreq, freqs, n_cycles=n_cycles, zero_mean=zero_mean)
+        Ws = [W]  # to have same dimensionality as the 'multitaper' case
+
+    elif method == 'multitaper':
+        Ws = _make_dpss(sfreq, freqs, n_cycles=n_cycles,
+                        time_bandwidth=time_bandwidth, zero_mean=zero_mean)
+
+    # Check wavelets
+    if len(Ws[0][0]) > n_times:
+        raise ValueError('At least one of the wavelets is longer than the '
+                         'signal. Use a longer signal or shorter wavelets.')
+    return Ws
+
+
+def _compute_tfr_stream(epochs, freqs, picks, method='morlet', n_cycles=7.0,
+                        zero_mean=None, time_bandwidth=None, use_fft=True,
+                        decim=1, output='avg_power', n_jobs=1):
+    """Compute the average TFR of epochs read from disk in blocks.
+
+    Only running sums of the power and of the phase (for each taper) are
+    kept, so that the memory used does not depend on the number of epochs.
+
+    Parameters
+    ----------
+    epochs : instance of Epochs
+        The epochs, not preloaded.
+    picks : array of int | slice
+        The channels to decompose.
+    output : 'avg_power' | 'itc' | 'avg_power_itc'
+        The output.
+
+    See :func:`_compute_tfr` for the other parameters.
+
+    Returns
+    -------
+    out : array, shape (n_chans, n_freqs, n_times)
+        The average TFR, as returned by :func:`_compute_tfr`.
+    nave : int
+        The number of good epochs averaged.
+    """
+    freqs, sfreq, zero_mean, n_cycles, time_bandwidth, decim = \
+        _check_tfr_param(freqs, epochs.info['sfreq'], method, zero_mean,
+                         n_cycles, time_bandwidth, use_fft, decim, output)
+    Ws = _setup_wavelets(method, sfreq, freqs, n_cycles, zero_mean,
+                         time_bandwidth, len(epochs.times))
+
+    n_jobs, use_threads = _check_n_jobs_threads(n_jobs)
+    backend = 'threading' if use_threads else None
+    parallel, my_sums, _ = parallel_func(_time_frequency_sums, n_jobs,
+                                         backend=backend)
+
+    itc = 'itc' in output
+    n_chans = len(np.arange(len(epochs.ch_names))[picks])
+    power = np.zeros((n_chans, len(freqs), len(epochs.times[decim])))
+    plf = np.zeros((len(Ws),) + power.shape, np.complex) if itc else None
+    nave = 0
+    n_events = len(epochs.events)
+    n_batch = epochs._get_batch_size()
+    for start in range(0, n_events, n_batch):
+        indices = np.arange(start, min(start + n_batch, n_events))
+        epochs_out, is_good, _ = epochs._load_epochs_from_raw(indices)
+        data = [epoch for epoch, good in zip(epochs_out, is_good) if good]
+        if len(data) == 0:
+            continue
+        data = np.array(data)[:, picks]
+        # Parallelization is applied across channels.
+        sums = parallel(my_sums(channel, Ws, itc, use_fft, 'same', decim)
+                        for channel in data.transpose(1, 0, 2))
+        for channel_idx, (this_power, this_plf) in enumerate(sums):
+            power[channel_idx] += this_power
+            if itc:
+                plf[:, channel_idx] += this_plf
+        nave += len(data)
+    return _average_tfr_sums(power, plf, nave, len(Ws), output), nave
+
+
 def _check_tfr_param(freqs, sfreq, method, zero_mean, n_cycles,
                      time_bandwidth, use_fft, decim, output):
     """Aux. function to _compute_tfr to check the params validity."""
@@ -489,63 +596,91 @@ def _time_frequency_loop(X, Ws, output, use_fft, mode, decim):
         The decimation slice: e.g. power[:, decim]
     """
     # Set output type
-    dtype = np.float
-    if output in ['complex', 'avg_power_itc']:
-        dtype = np.complex
+    dtype = np.complex if output == 'complex' else np.float
 
     # Init outputs
     decim = _check_decim(decim)
     n_epochs, n_times = X[:, decim].shape
     n_freqs = len(Ws[0])
     if ('avg_' in output) or ('itc' in output):
-        tfrs = np.zeros((n_freqs, n_times), dtype=dtype)
-    else:
-        tfrs = np.zeros((n_epochs, n_freqs, n_times), dtype=dtype)
+        power, plf = _time_frequency_sums(X, Ws, 'itc' in output, use_fft,
+                                          mode, decim)
+        return _average_tfr_sums(power, plf, n_epochs, len(Ws), output)
+    tfrs = np.zeros((n_epochs, n_freqs, n_times), dtype=dtype)
 
     # Loops across tapers.
     for W in Ws:
-        coefs = _cwt(X, W, mode, decim=decim, use_fft=use_fft)
-
-        # Inter-trial phase locking is apparently computed per taper...
-        if 'itc' in output:
-            plf = np.zeros((n_freqs, n_times), dtype=np.complex)
-
-        # Loop across epochs
-        for epoch_idx, tfr in enumerate(coefs):
+        # Loop across blocks of epochs
+        start = 0
+        for tfr in _cwt(X, W, mode, decim=decim, use_fft=use_fft):
+            epoch_slice = slice(start, start + len(tfr))
+            start += len(tfr)
             # Transform complex values
-            if output in ['power', 'avg_power']:
-                tfr = (tfr * tfr.conj()).real  # power
+            if output == 'power':
+                tfr = tfr.real ** 2 + tfr.imag ** 2  # power
             elif output == 'phase':
                 tfr = np.angle(tfr)
-            elif output == 'avg_power_itc':
-                tfr_abs = np.abs(tfr)
-                plf += tfr / tfr_abs  # phase
-                tfr = tfr_abs ** 2  # power
-            elif output == 'itc':
-                plf += tfr / np.abs(tfr)  # phase
-                continue  # not need to stack anything else than plf
-
-            # Stack or add
-            if ('avg_' in output) or ('itc' in output):
-                tfrs += tfr
-            else:
-                tfrs[epoch_idx] += tfr
-
-        # Compute inter trial coherence
-        if output == 'avg_power_itc':
-            tfrs += 1j * np.abs(plf)
-        elif output == 'itc':
-            tfrs += np.abs(plf)
-
-    # Normalization of average metrics
-    if ('avg_' in output) or ('itc' in output):
-        tfrs /= n_epochs
+            tfrs[epoch_slice] += tfr
 
     # Normalization by number of taper
     tfrs /= len(Ws)
     return tfrs
 
 
+def _time_frequency_sums(X, Ws, itc, use_fft, mode, decim):
+    """Sum the time-frequency power and phase of a channel across epochs.
+
+    Parameters
+    ----------
+    X : array, shape (n_epochs, n_times)
+        The epochs data of a single channel.
+    Ws : list, shape (n_tapers, n_wavelets, n_times)
+        The wavelets.
+    itc : bool
+        Whether to sum the phase as well.
+    use_fft : bool
+        Use the FFT for convolutions or not.
+    mode : {'full', 'valid', 'same'}
+        See numpy.convolve.
+    decim : slice
+        The decimation slice: e.g. power[:, decim]
+
+    Returns
+    -------
+    power : array, shape (n_freqs, n_times)
+        The power, summed across epochs and tapers.
+    plf : array, shape (n_tapers, n_freqs, n_times) | None
+        The unit phase vectors, summed across epochs. None if not itc.
+    """
+    decim = _check_decim(decim)
+    n_times = X[:, decim].shape[1]
+    n_freqs = len(Ws[0])
+    power = np.zeros((n_freqs, n_times))
+    # Inter-trial phase locking is apparently computed per taper...
+    plf = np.zeros((len(Ws), n_freqs, n_times), np.complex) if itc else None
+    for taper_idx, W in enumerate(Ws):
+        for tfr in _cwt(X, W, mode, decim=decim, use_fft=use_fft):
+            if itc:
+                tfr_abs = np.abs(tfr)
+                plf[taper_idx] += (tfr / tfr_abs).sum(axis=0)  # phase
+                power += (tfr_abs ** 2).sum(axis=0)
+            else:
+                power += (tfr.real ** 2 + tfr.imag ** 2).sum(axis=0)
+    return power, plf
+
+
+def _average_tfr_sums(power, plf, n_epochs, n_tapers, output):
+    """Compute the average power and ITC from their sums across epochs."""
+    power = power / (n_epochs * n_tapers)
+    if output == 'avg_power':
+        return power
+    # Inter-trial coherence is averaged across tapers
+    itc = np.abs(plf).sum(axis=0) / (n_epochs * n_tapers)
+    if output == 'itc':
+        return itc
+    return power + 1j * itc
+
+
 def cwt(X, Ws, use_fft=True, mode='same', decim=1):
     """Compute time freq decomposition with continuous wavelet transform.
 
@@ -583,11 +718,11 @@ def cwt(X, Ws, use_fft=True, mode='same', decim=1):
     decim = _check_decim(decim)
     n_signals, n_times = X[:, decim].shape
 
-    coefs = _cwt(X, Ws, mode, decim=decim, use_fft=use_fft)
-
     tfrs = np.empty((n_signals, len(Ws), n_times), dtype=np.complex)
-    for k, tfr in enumerate(coefs):
-        tfrs[k] = tfr
+    start = 0
+    for tfr in _cwt(X, Ws, mode, decim=decim, use_fft=use_fft):
+        tfrs[start:start + len(tfr)] = tfr
+        start += len(tfr)
 
     return tfrs
 
@@ -595,12 +730,17 @@ def cwt(X, Ws, use_fft=True, mode='same', decim=1):
 def _tfr_aux(method, inst, freqs, decim, return_itc, picks, average,
              output=None, **tfr_params):
     """Help reduce redundancy between tfr_morlet and tfr_multitaper."""
+    from ..epochs import BaseEpochs
     decim = _check_decim(decim)
-    data = _get_data(inst, return_itc)
-    info = inst.info
-
-    info, data, picks = _prepare_picks(info, data, picks)
-    data = data[:, picks, :]
+    # Average non-preloaded epochs block by block instead of loading them
+    stream = average and isinstance(inst, BaseEpochs) and not inst.preload
+    if stream:
+        data = None
+        info, _, picks = _prepare_picks(inst.info, inst.info['chs'], picks)
+    else:
+        data = _get_data(inst, return_itc)
+        info, data, picks = _prepare_picks(inst.info, data, picks)
+        data = data[:, picks, :]
 
     if average:
         if output == 'complex':
@@ -615,8 +755,14 @@ def _tfr_aux(method, inst, freqs, decim, return_itc, picks, average,
             raise ValueError('Inter-trial coherence is not supported'
                              ' with average=False')
 
-    out = _compute_tfr(data, freqs, info['sfreq'], method=method,
-                       output=output, decim=decim, **tfr_params)
+    if stream:
+        out, nave = _compute_tfr_stream(inst, freqs, picks, method=method,
+                                        output=output, decim=decim,
+                                        **tfr_params)
+    else:
+        out = _compute_tfr(data, freqs, info['sfreq'], method=method,
+                           output=output, decim=decim, **tfr_params)
+        nave = len(data)
     times = inst.times[decim].copy()
 
     if average:
@@ -624,7 +770,6 @@ def _tfr_aux(method, inst, freqs, decim, return_itc, picks, average,
             power, itc = out.real, out.imag
         else:
             power = out
-        nave = len(data)
         out = AverageTFR(info, power, times, freqs, nave,
                          method='%s-power' % method)
         if return_itc:
@@ -664,8 +809,11 @@ def tfr_morlet(inst, freqs, n_cycles, use_fft=False, return_itc=True, decim=1,
 
         .. note:: Decimation may create aliasing artifacts.
 
-    n_jobs : int, defaults to 1
-        The number of jobs to run in parallel.
+    n_jobs : int | str, defaults to 1
+        The number of jobs to run in parallel. Can also be ``'threads:N'``
+        (or ``'threads'`` for one thread per CPU) to process the channels
+        with ``N`` threads sharing the data, without copying it to worker
+        processes.
     picks : array-like of int | None, defaults to None
         The indices of the channels to decompose. If None, all available
         good data channels are decomposed.
@@ -674,7 +822,10 @@ def tfr_morlet(inst, freqs, n_cycles, use_fft=False, return_itc=True, decim=1,
 
         .. versionadded:: 0.13.0
     average : bool, defaults to True
-        If True average across Epochs.
+        If True average across Epochs. If the epochs are not preloaded, they
+        are read from disk in blocks and only the running sums of power and
+        phase are kept, so memory usage does not grow with the number of
+        epochs.
 
         .. versionadded:: 0.13.0
     output : str
@@ -751,9 +902,13 @@ def tfr_array_morlet(epoch_data, sfreq, freqs, n_cycles=7.0,
         * 'avg_power_itc' : average of single trial power and inter-trial
           coherence across trials.
 
-    n_jobs : int
+    n_jobs : int | str
         The number of epochs to process at the same time. The parallelization
-        is implemented across channels. Defaults to 1
+        is implemented across channels. Can also be ``'threads:N'`` (or
+        ``'threads'`` for one thread per CPU) to process the channels with
+        ``N`` threads sharing the data, without copying it to worker
+        processes.
+        Defaults to 1.
     verbose : bool, str, int, or None, defaults to None
         If not None, override default verbose level (see :func:`mne.verbose`
         and :ref:`Logging documentation <tut_logging>` for more).
@@ -821,13 +976,19 @@ def tfr_multitaper(inst, freqs, n_cycles, time_bandwidth=4.0,
 
         .. note:: Decimation may create aliasing artifacts.
 
-    n_jobs : int,  defaults to 1
-        The number of jobs to run in parallel.
+    n_jobs : int | str, defaults to 1
+        The number of jobs to run in parallel. Can also be ``'threads:N'``
+        (or ``'threads'`` for one thread per CPU) to process the channels
+        with ``N`` threads sharing the data, without copying it to worker
+        processes.
     picks : array-like of int | None, defaults to None
         The indices of the channels to decompose. If None, all available
         good data channels are decomposed.
     average : bool, defaults to True
-        If True average across Epochs.
+        If True average across Epochs. If the epochs are not preloaded, they
+        are read from disk in blocks and only the running sums of power and
+        phase are kept, so memory usage does not grow with the number of
+        epochs.
 
         .. versionadded:: 0.13.0
     verbose : bool, str, int, or None, defaults to None
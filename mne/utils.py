@@ -7,7 +7,7 @@ from __future__ import print_function
 # License: BSD (3-clause)
 
 import atexit
-from collections import Iterable
+from collections import Iterable, OrderedDict
 from contextlib import contextmanager
 from distutils.version import LooseVersion
 from functools import wraps
@@ -30,6 +30,7 @@ from string import Formatter
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import traceback
 from unittest import SkipTest
@@ -505,6 +506,76 @@ class _Counter():
         return c
 
 
+class _LRUCache(object):
+    """Bounded least-recently-used cache that counts hits and misses.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of entries. Zero disables the cache.
+    max_nbytes : int | None
+        Maximum total size of the cached values in bytes, as estimated by
+        :func:`object_size`. None means no limit, in which case the sizes
+        are not estimated and the values can be arbitrary objects.
+    config : str | None
+        Config key that, if set, overrides ``max_size``.
+    """
+
+    def __init__(self, max_size, max_nbytes=None, config=None):  # noqa: D102
+        self._max_size = max_size
+        self.max_nbytes = max_nbytes
+        self.config = config
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.clear()
+
+    @property
+    def max_size(self):
+        """The maximum number of entries."""
+        if self.config is None:
+            return self._max_size
+        return int(get_config(self.config, self._max_size))
+
+    def get(self, key, default=None):
+        """Get a value, marking it as the most recently used."""
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                item = self._data.pop(key)
+                self._data[key] = item
+                return item[0]
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        """Add a value, evicting the least recently used ones as needed."""
+        max_size = self.max_size
+        nbytes = 0 if self.max_nbytes is None else object_size(value)
+        if max_size <= 0 or (self.max_nbytes is not None and
+                             nbytes > self.max_nbytes):
+            return
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._data.pop(key)[1]
+            self._data[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while len(self._data) > max_size or (
+                    self.max_nbytes is not None and
+                    self.nbytes > self.max_nbytes):
+                self.nbytes -= self._data.popitem(last=False)[1][1]
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self.nbytes = self.hits = self.misses = 0
+
+    def info(self):
+        """Get the cache statistics."""
+        return dict(hits=self.hits, misses=self.misses, size=len(self._data),
+                    max_size=self.max_size, nbytes=self.nbytes)
+
+
 class WrapStdOut(object):
     """Dynamically wrap to sys.stdout.
 
@@ -1744,13 +1815,17 @@ known_config_types = (
     'MNE_DATASETS_KILOWORD_PATH',
     'MNE_DATASETS_FIELDTRIP_CMC_PATH',
     'MNE_DATASETS_PHANTOM_4DBTI_PATH',
+    'MNE_FIFF_INDEX_CACHE_DIR',
+    'MNE_FILTER_CACHE_SIZE',
     'MNE_FORCE_SERIAL',
+    'MNE_INVERSE_CACHE_SIZE',
     'MNE_KIT2FIFF_STIM_CHANNELS',
     'MNE_KIT2FIFF_STIM_CHANNEL_CODING',
     'MNE_KIT2FIFF_STIM_CHANNEL_SLOPE',
     'MNE_KIT2FIFF_STIM_CHANNEL_THRESHOLD',
     'MNE_LOGGING_LEVEL',
     'MNE_MEMMAP_MIN_SIZE',
+    'MNE_PARALLEL_BACKEND',
     'MNE_SKIP_FTP_TESTS',
     'MNE_SKIP_NETWORK_TESTS',
     'MNE_SKIP_TESTING_DATASET_TESTS',